@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark de arranque en frío de Realtime y Flask_Server.
+
+Mide, en procesos nuevos:
+  • importación de Flask_Server (lo que tarda el puerto en poder abrirse)
+  • calentamiento (carga del modelo + predicciones de prueba) hasta que "/" responde 200
+  • los módulos más lentos según `python -X importtime`
+
+cmd:
+python benchmarks/arranque.py                      # imprime el reporte
+python benchmarks/arranque.py --salida benchmarks/arranque.txt
+"""
+
+import argparse
+import os
+import platform
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+CODIGO_ARRANQUE = """
+import time
+t0 = time.perf_counter()
+import Flask_Server
+t1 = time.perf_counter()
+cliente = Flask_Server.app.test_client()
+estado_inicial = cliente.get("/").status_code
+Flask_Server.iniciar_calentamiento().join()
+assert cliente.get("/").status_code == 200
+t2 = time.perf_counter()
+print(f"{t1 - t0:.6f} {t2 - t0:.6f} {estado_inicial}")
+"""
+
+
+def ejecutar(argumentos):
+    return subprocess.run([sys.executable, *argumentos], cwd=SRC_DIR, capture_output=True,
+                          text=True, check=True)
+
+
+def medir_arranque(repeticiones):
+    """Tiempos (importación, listo) en segundos de `repeticiones` procesos nuevos"""
+    tiempos = []
+    for _ in range(repeticiones):
+        salida = ejecutar(["-c", CODIGO_ARRANQUE]).stdout.split()
+        tiempos.append((float(salida[0]), float(salida[1]), int(salida[2])))
+    return tiempos
+
+
+def arbol_importacion(modulo="Flask_Server", profundidad=2, minimo_us=1000):
+    """
+    Subárbol de `python -X importtime -c 'import <modulo>'` hasta `profundidad`
+    niveles, solo con módulos que tardan al menos `minimo_us` µs acumulados.
+    """
+    salida = ejecutar(["-X", "importtime", "-c", f"import {modulo}"]).stderr
+    filas = []
+    for linea in salida.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        _, acumulado, nombre = linea[len("import time:"):].split("|")
+        nombre = nombre[1:]
+        nivel = (len(nombre) - len(nombre.lstrip())) // 2
+        if nivel == 0 and nombre != modulo:
+            filas = []  # importtime lista los hijos antes que el padre
+            continue
+        filas.append((nivel, int(acumulado), nombre.strip()))
+    # Orden de árbol: el padre antes que sus hijos
+    return [f for f in reversed(filas) if f[0] <= profundidad and f[1] >= minimo_us]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de arranque en frío")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--salida", help="Archivo donde guardar el reporte")
+    args = parser.parse_args()
+
+    tiempos = sorted(medir_arranque(args.repeticiones), key=lambda t: t[1])
+    mediana = tiempos[len(tiempos) // 2]
+
+    lineas = [
+        "Arranque en frío de Flask_Server",
+        f"Python {platform.python_version()} | {platform.machine()} | {os.cpu_count()} CPUs",
+        f"Procesos medidos: {len(tiempos)} (mediana)",
+        "",
+        f"import Flask_Server (puerto listo): {mediana[0] * 1000:8.1f} ms",
+        f"'/' responde 200 (modelo cargado): {mediana[1] * 1000:8.1f} ms",
+        f"'/' antes del calentamiento:        {mediana[2]}",
+        "",
+        "python -X importtime -c 'import Flask_Server' (µs acumulados, ≥ 1 ms, 2 niveles)",
+    ]
+    lineas += [f"{acumulado:10d}  {'  ' * nivel}{nombre}" for nivel, acumulado, nombre in arbol_importacion()]
+    reporte = "\n".join(lineas) + "\n"
+
+    print(reporte)
+    if args.salida:
+        Path(args.salida).write_text(reporte, encoding="utf-8")
+        print(f"💾 Reporte guardado como: {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
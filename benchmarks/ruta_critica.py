@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks de la ruta crítica de predicción.
+
+Mide el tiempo por llamada (ns/op) de:
+  • obtener_riesgo_zona: coordenada del dataset, fuera de CDMX (modelo) y, si existe
+    el raster precalculado, una coordenada de CDMX fuera del dataset
+  • una consulta repetida del modelo con la caché de scores de zona (CacheZonas)
+  • clasificar_riesgo_zona, predecir_alerta y predecir_alerta_con_coordenadas
+  • el handler completo de /ingest a través del cliente de pruebas de Flask
+
+Guarda los resultados en JSON y los compara con una línea base: si algún caso
+es más lento que la línea base por encima del umbral, termina con código 1.
+
+cmd:
+python benchmarks/ruta_critica.py                                   # compara con benchmarks/linea_base.json
+python benchmarks/ruta_critica.py --salida resultados.json
+python benchmarks/ruta_critica.py --guardar-linea-base              # reemplaza la línea base
+python benchmarks/ruta_critica.py --casos predecir_alerta --umbral 0.5
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+sys.path.append(str(BENCHMARKS_DIR.parent / "src"))
+
+LINEA_BASE_PATH = BENCHMARKS_DIR / "linea_base.json"
+
+# Regresión tolerada respecto a la línea base (0.25 = 25 % más lento)
+UMBRAL = 0.25
+
+# Tiempo aproximado de cada ronda de medición (segundos)
+DURACION_RONDA_S = 0.1
+
+# Coordenada del dataset (caso dorado: 39.2 BAJO) y una en CDMX fuera del dataset (raster)
+COORDENADA_DATASET = (19.5061618036, -99.1047492201)
+COORDENADA_RASTER = (19.45, -99.2)
+# Fuera de CDMX no hay raster, así que se evalúa el modelo
+COORDENADA_MODELO = (25.0, -100.0)
+
+
+def preparar_casos(directorio_temporal):
+    """
+    Carga el modelo y arma los casos a medir.
+
+    Returns:
+        dict: nombre → función sin argumentos que ejecuta una operación
+    """
+    import Flask_Server
+    import Realtime
+    from cache_zonas import CacheZonas
+
+    # El caso del modelo usa coordenadas fuera de CDMX: sin esto cada llamada escribiría el aviso
+    logging.getLogger("Realtime").setLevel(logging.ERROR)
+    # Los logs de /ingest se siguen formateando y escribiendo (son parte del costo), pero a /dev/null
+    raiz = logging.getLogger()
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+    devnull = logging.StreamHandler(open(os.devnull, "w"))
+    devnull.setFormatter(logging.Formatter('%(asctime)s %(levelname)s: %(message)s'))
+    raiz.addHandler(devnull)
+    Realtime.calentar()
+
+    # El historial de las lecturas de prueba va a un archivo temporal
+    Flask_Server.app.config["HISTORIAL_PATH"] = Path(directorio_temporal) / "historial.db"
+    cliente = Flask_Server.app.test_client()
+    lectura = {"v": 0.78, "pct": 60.0}
+
+    def ingest():
+        respuesta = cliente.post("/ingest", json=lectura)
+        assert respuesta.status_code == 200, respuesta.status_code
+
+    # Caché propia del caso: no cambia la configuración del resto de los casos
+    cache = CacheZonas()
+    predictor = Realtime.obtener_predictor()
+
+    casos = {
+        "obtener_riesgo_zona_dataset": lambda: Realtime.obtener_riesgo_zona(*COORDENADA_DATASET),
+        "obtener_riesgo_zona_modelo": lambda: Realtime.obtener_riesgo_zona(*COORDENADA_MODELO),
+        "obtener_riesgo_zona_cache": lambda: cache.obtener(*COORDENADA_MODELO, predictor.version,
+                                                           predictor.riesgo_zona),
+        "clasificar_riesgo_zona": lambda: Realtime.clasificar_riesgo_zona(58.6),
+        "predecir_alerta": lambda: Realtime.predecir_alerta(2),
+        "predecir_alerta_con_coordenadas": lambda: Realtime.predecir_alerta_con_coordenadas(*COORDENADA_DATASET, 2),
+        "ingest": ingest,
+    }
+    if Realtime.obtener_predictor().raster is not None:
+        casos["obtener_riesgo_zona_raster"] = lambda: Realtime.obtener_riesgo_zona(*COORDENADA_RASTER)
+    return casos
+
+
+def medir(funcion, rondas=7, duracion_ronda_s=DURACION_RONDA_S):
+    """
+    Tiempo por llamada de `funcion` en `rondas` rondas de igual número de llamadas.
+
+    Returns:
+        dict: ns_op (mediana de las rondas), ns_op_min, ns_op_max, iteraciones por ronda
+    """
+    funcion()  # Calentamiento (cachés, objetos perezosos)
+    # Calibración: iteraciones para que una ronda dure ~duracion_ronda_s
+    iteraciones = 1
+    while True:
+        inicio = time.perf_counter()
+        for _ in range(iteraciones):
+            funcion()
+        transcurrido = time.perf_counter() - inicio
+        if transcurrido >= duracion_ronda_s / 10:
+            break
+        iteraciones *= 10
+    iteraciones = max(1, int(iteraciones * duracion_ronda_s / transcurrido))
+
+    tiempos = []
+    for _ in range(rondas):
+        inicio = time.perf_counter_ns()
+        for _ in range(iteraciones):
+            funcion()
+        tiempos.append((time.perf_counter_ns() - inicio) / iteraciones)
+    tiempos.sort()
+    return {
+        "ns_op": round(tiempos[len(tiempos) // 2], 1),
+        "ns_op_min": round(tiempos[0], 1),
+        "ns_op_max": round(tiempos[-1], 1),
+        "iteraciones": iteraciones,
+    }
+
+
+def comparar(resultados, linea_base, umbral=UMBRAL):
+    """
+    Compara la mediana de cada caso con la línea base.
+
+    Args:
+        resultados (dict): nombre → {'ns_op': ...} de la corrida actual
+        linea_base (dict): nombre → {'ns_op': ...} guardado
+        umbral (float): Fracción de regresión tolerada
+
+    Returns:
+        list: (nombre, ns_op_base, ns_op_actual, cambio, es_regresion) por caso en ambos
+    """
+    comparacion = []
+    for nombre, actual in resultados.items():
+        base = linea_base.get(nombre)
+        if base is None:
+            continue
+        cambio = actual["ns_op"] / base["ns_op"] - 1.0
+        comparacion.append((nombre, base["ns_op"], actual["ns_op"], cambio, cambio > umbral))
+    return comparacion
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de la ruta crítica de predicción")
+    parser.add_argument("--casos", nargs="+", help="Medir solo estos casos")
+    parser.add_argument("--rondas", type=int, default=7)
+    parser.add_argument("--salida", help="Archivo JSON donde guardar los resultados")
+    parser.add_argument("--linea-base", default=str(LINEA_BASE_PATH), help="JSON de referencia")
+    parser.add_argument("--umbral", type=float, default=UMBRAL,
+                        help="Regresión tolerada (0.25 = 25%% más lento)")
+    parser.add_argument("--guardar-linea-base", action="store_true",
+                        help="Guardar esta corrida como la nueva línea base")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio_temporal:
+        casos = preparar_casos(directorio_temporal)
+        if args.casos:
+            desconocidos = set(args.casos) - set(casos)
+            if desconocidos:
+                parser.error(f"Casos desconocidos: {', '.join(sorted(desconocidos))} "
+                             f"(disponibles: {', '.join(casos)})")
+            casos = {nombre: casos[nombre] for nombre in args.casos}
+
+        print(f"⏱️  Python {platform.python_version()} | {platform.machine()} | {os.cpu_count()} CPUs")
+        resultados = {}
+        for nombre, funcion in casos.items():
+            resultados[nombre] = medir(funcion, rondas=args.rondas)
+            print(f"   {nombre:34s} {resultados[nombre]['ns_op'] / 1000:10.2f} µs/op")
+
+        import Flask_Server
+        historial = Flask_Server.obtener_historial()
+        if historial is not None:
+            historial.cerrar()
+
+    reporte = {
+        "python": platform.python_version(),
+        "maquina": platform.machine(),
+        "cpus": os.cpu_count(),
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "casos": resultados,
+    }
+    if args.salida:
+        Path(args.salida).write_text(json.dumps(reporte, indent=2) + "\n", encoding="utf-8")
+        print(f"💾 Resultados guardados como: {args.salida}")
+    if args.guardar_linea_base:
+        Path(args.linea_base).write_text(json.dumps(reporte, indent=2) + "\n", encoding="utf-8")
+        print(f"💾 Línea base guardada como: {args.linea_base}")
+        return 0
+
+    if not Path(args.linea_base).exists():
+        print(f"⚠️ No hay línea base en {args.linea_base}; usa --guardar-linea-base")
+        return 0
+    linea_base = json.loads(Path(args.linea_base).read_text(encoding="utf-8"))["casos"]
+    comparacion = comparar(resultados, linea_base, args.umbral)
+    print(f"\n📊 Comparación con {args.linea_base} (umbral {args.umbral:.0%})")
+    for nombre, base, actual, cambio, es_regresion in comparacion:
+        marca = "❌" if es_regresion else "✅"
+        print(f"   {marca} {nombre:34s} {base / 1000:10.2f} → {actual / 1000:10.2f} µs/op ({cambio:+.1%})")
+    regresiones = [c[0] for c in comparacion if c[4]]
+    if regresiones:
+        print(f"❌ Regresiones: {', '.join(regresiones)}")
+        return 1
+    print("✅ Sin regresiones")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Simulador de una flota de sensores virtuales y generador de carga para Flask_Server.
+
+Cada sensor virtual se comporta como Sensor.ino: manda {"v", "pct"} (más
+"sensor_id" y "ts") a /ingest cada `intervalo` segundos, con una curva de
+nivel según su perfil:
+  • seco:    nivel bajo con ruido
+  • subida:  sube a tasa constante hasta un máximo
+  • crecida: súbita (flash flood) hasta un pico y luego baja exponencialmente
+
+Modos de carga:
+  • abierto: cada sensor envía en sus tiempos programados sin importar si el
+    servidor ya respondió (tasa = sensores / intervalo). La latencia se mide
+    desde el tiempo programado, así incluye la espera si el servidor se atrasa.
+  • cerrado: `concurrencia` clientes envían la siguiente lectura en cuanto
+    reciben la respuesta anterior (mide el throughput máximo).
+
+Reporta throughput, percentiles de latencia, códigos HTTP y tasa de errores.
+
+cmd:
+python src/Flask_Server.py                                               # en otra terminal
+python benchmarks/simulador_flota.py --sensores 5000 --duracion 60
+python benchmarks/simulador_flota.py --sensores 5000 --intervalo 10 --jitter 1 --perfiles seco=0.8 crecida=0.2
+python benchmarks/simulador_flota.py --modo cerrado --concurrencia 32 --duracion 30 --salida carga.json
+python benchmarks/simulador_flota.py --aceleracion 60                   # 1 s real = 1 min de la curva
+"""
+
+import argparse
+import heapq
+import http.client
+import itertools
+import json
+import math
+import queue
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Como Sensor.ino: 4–20 mA sobre un shunt de 150 Ω → 0–100 %
+R_SHUNT = 150.0
+
+# Intervalo entre lecturas de Sensor.ino (segundos)
+INTERVALO_S = 10.0
+
+PERFILES = ('seco', 'subida', 'crecida')
+PROPORCION_PERFILES = {'seco': 0.7, 'subida': 0.2, 'crecida': 0.1}
+
+# Rectángulo de CDMX para las coordenadas de los sensores registrados (ver Realtime.py)
+LAT_MIN, LAT_MAX = 19.35, 19.65
+LON_MIN, LON_MAX = -99.35, -98.95
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def voltaje_desde_pct(pct):
+    """Voltaje en el shunt para un porcentaje (inverso de la conversión de Sensor.ino)"""
+    return (4.0 + pct * 16.0 / 100.0) * R_SHUNT / 1000.0
+
+
+class SensorVirtual:
+    """Sensor con una curva de nivel (%) en función del tiempo simulado"""
+
+    def __init__(self, sensor_id, perfil, rng, intervalo_s=INTERVALO_S, jitter_s=0.0):
+        """
+        Args:
+            sensor_id (str): Identificador que se manda en cada lectura
+            perfil (str): 'seco', 'subida' o 'crecida'
+            rng (random.Random): Generador para los parámetros del sensor
+            intervalo_s (float): Segundos entre lecturas
+            jitter_s (float): Desviación uniforme máxima de cada envío (± segundos)
+        """
+        if perfil not in PERFILES:
+            raise ValueError(f"Perfil desconocido: {perfil} (disponibles: {', '.join(PERFILES)})")
+        self.sensor_id = sensor_id
+        self.perfil = perfil
+        self.intervalo_s = float(intervalo_s)
+        self.jitter_s = float(jitter_s)
+        self.rng = random.Random(rng.random())
+        self.fase_s = rng.uniform(0, self.intervalo_s)
+        self.base = rng.uniform(0.5, 2.0)
+        self.ruido = rng.uniform(0.05, 0.3)
+        if perfil == 'subida':
+            self.tasa_por_min = rng.uniform(0.2, 1.0)
+            self.maximo = rng.uniform(10.0, 40.0)
+        elif perfil == 'crecida':
+            self.inicio_s = rng.uniform(0, 600)
+            self.pico = rng.uniform(30.0, 95.0)
+            self.subida_s = rng.uniform(60, 300)
+            self.tau_bajada_s = rng.uniform(600, 1800)
+
+    def nivel(self, t):
+        """Porcentaje sin ruido en el segundo `t` de la simulación"""
+        if self.perfil == 'seco':
+            return self.base
+        if self.perfil == 'subida':
+            return min(self.maximo, self.base + self.tasa_por_min * t / 60.0)
+        if t < self.inicio_s:
+            return self.base
+        transcurrido = t - self.inicio_s
+        if transcurrido < self.subida_s:
+            return self.base + (self.pico - self.base) * transcurrido / self.subida_s
+        return self.base + (self.pico - self.base) * math.exp(-(transcurrido - self.subida_s) / self.tau_bajada_s)
+
+    def lectura(self, t, ts):
+        """
+        Lectura en el segundo simulado `t`, con timestamp Unix `ts`.
+
+        Returns:
+            dict: {"sensor_id", "v", "pct", "ts"} con v y pct redondeados como Sensor.ino
+        """
+        pct = min(100.0, max(0.0, self.nivel(t) + self.rng.gauss(0.0, self.ruido)))
+        return {"sensor_id": self.sensor_id, "v": round(voltaje_desde_pct(pct), 3),
+                "pct": round(pct, 2), "ts": round(ts, 3)}
+
+    def envio(self, k):
+        """Segundo (desde el inicio) en que se programa la lectura número `k`"""
+        jitter = self.rng.uniform(-self.jitter_s, self.jitter_s) if self.jitter_s else 0.0
+        return max(0.0, self.fase_s + k * self.intervalo_s + jitter)
+
+
+def crear_flota(n, proporciones=None, intervalo_s=INTERVALO_S, jitter_s=0.0, semilla=0):
+    """
+    Crea `n` sensores repartidos entre perfiles según `proporciones`.
+
+    Returns:
+        list: SensorVirtual con ids 'sim-00000', 'sim-00001', ...
+    """
+    proporciones = proporciones or PROPORCION_PERFILES
+    rng = random.Random(semilla)
+    perfiles = rng.choices(list(proporciones), weights=list(proporciones.values()), k=n)
+    return [SensorVirtual(f"sim-{i:05d}", perfil, rng, intervalo_s, jitter_s)
+            for i, perfil in enumerate(perfiles)]
+
+
+def percentil(ordenados, p):
+    """Percentil `p` (0-100) por rango más cercano de una lista ya ordenada"""
+    if not ordenados:
+        return None
+    indice = max(0, math.ceil(p / 100.0 * len(ordenados)) - 1)
+    return ordenados[indice]
+
+
+class ClienteHTTP:
+    """Conexión HTTP persistente (keep-alive) de un hilo, que se rehace tras un error"""
+
+    def __init__(self, url, timeout_s):
+        partes = urlsplit(url)
+        self.host = partes.hostname
+        self.puerto = partes.port or 80
+        self.ruta = partes.path or "/"
+        self.timeout_s = timeout_s
+        self._conexion = None
+
+    def post(self, cuerpo):
+        if self._conexion is None:
+            self._conexion = http.client.HTTPConnection(self.host, self.puerto, timeout=self.timeout_s)
+        try:
+            self._conexion.request("POST", self.ruta, body=json.dumps(cuerpo),
+                                   headers={"Content-Type": "application/json"})
+            respuesta = self._conexion.getresponse()
+            respuesta.read()
+            return respuesta.status
+        except Exception:
+            self.cerrar()
+            raise
+
+    def cerrar(self):
+        if self._conexion is not None:
+            self._conexion.close()
+            self._conexion = None
+
+
+class _Resultados:
+    """Latencias y códigos de un hilo trabajador (se juntan al terminar)"""
+
+    def __init__(self):
+        self.latencias = []
+        self.servicio = []
+        self.codigos = {}
+        self.errores = {}
+
+    def registrar(self, latencia, servicio, codigo=None, error=None):
+        if error is not None:
+            self.errores[error] = self.errores.get(error, 0) + 1
+            return
+        self.latencias.append(latencia)
+        self.servicio.append(servicio)
+        self.codigos[codigo] = self.codigos.get(codigo, 0) + 1
+
+
+class GeneradorCarga:
+    """Envía las lecturas de la flota a /ingest en modo abierto o cerrado"""
+
+    def __init__(self, url, sensores, duracion_s, modo='abierto', concurrencia=64,
+                 aceleracion=1.0, timeout_s=10.0):
+        """
+        Args:
+            url (str): URL de /ingest (p. ej. http://localhost:5000/ingest)
+            sensores (list): SensorVirtual de la flota
+            duracion_s (float): Segundos durante los que se generan lecturas
+            modo (str): 'abierto' (tiempos programados) o 'cerrado' (sin espera)
+            concurrencia (int): Hilos clientes (conexiones simultáneas)
+            aceleracion (float): Segundos de la curva por segundo real (los timestamps
+                "ts" avanzan igual, así el servidor ve la curva acelerada)
+            timeout_s (float): Timeout de cada petición
+        """
+        if modo not in ('abierto', 'cerrado'):
+            raise ValueError(f"Modo desconocido: {modo}")
+        self.url = url
+        self.sensores = sensores
+        self.duracion_s = float(duracion_s)
+        self.modo = modo
+        self.concurrencia = int(concurrencia)
+        self.aceleracion = float(aceleracion)
+        self.timeout_s = float(timeout_s)
+
+    def _lectura(self, sensor, ahora):
+        t = (ahora - self._inicio) * self.aceleracion
+        return sensor.lectura(t, self._inicio_epoch + t)
+
+    def _enviar(self, cliente, resultados, sensor, programado):
+        inicio = time.perf_counter()
+        try:
+            codigo = cliente.post(self._lectura(sensor, inicio))
+        except Exception as e:
+            resultados.registrar(None, None, error=type(e).__name__)
+            return
+        fin = time.perf_counter()
+        resultados.registrar(fin - programado, fin - inicio, codigo)
+
+    def _trabajador_abierto(self, pendientes, resultados):
+        cliente = ClienteHTTP(self.url, self.timeout_s)
+        while True:
+            elemento = pendientes.get()
+            if elemento is None:
+                break
+            programado, sensor = elemento
+            self._enviar(cliente, resultados, sensor, programado)
+        cliente.cerrar()
+
+    def _trabajador_cerrado(self, siguiente, resultados):
+        cliente = ClienteHTTP(self.url, self.timeout_s)
+        fin = self._inicio + self.duracion_s
+        while time.perf_counter() < fin:
+            sensor = self.sensores[next(siguiente) % len(self.sensores)]
+            self._enviar(cliente, resultados, sensor, time.perf_counter())
+        cliente.cerrar()
+
+    def _programar(self, pendientes):
+        """Pone cada lectura en la cola en su tiempo programado (modo abierto)"""
+        agenda = [(sensor.envio(0), i, 0) for i, sensor in enumerate(self.sensores)]
+        heapq.heapify(agenda)
+        while agenda:
+            segundo, i, k = heapq.heappop(agenda)
+            if segundo >= self.duracion_s:
+                break
+            programado = self._inicio + segundo
+            espera = programado - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+            pendientes.put((programado, self.sensores[i]))
+            heapq.heappush(agenda, (self.sensores[i].envio(k + 1), i, k + 1))
+
+    def ejecutar(self):
+        """
+        Genera la carga y espera las respuestas pendientes.
+
+        Returns:
+            dict: Reporte (ver `reporte`)
+        """
+        self._inicio = time.perf_counter()
+        self._inicio_epoch = time.time()
+        resultados = [_Resultados() for _ in range(self.concurrencia)]
+        if self.modo == 'abierto':
+            pendientes = queue.SimpleQueue()
+            hilos = [threading.Thread(target=self._trabajador_abierto, args=(pendientes, r), daemon=True)
+                     for r in resultados]
+            for hilo in hilos:
+                hilo.start()
+            self._programar(pendientes)
+            for _ in hilos:
+                pendientes.put(None)
+        else:
+            siguiente = itertools.count()
+            hilos = [threading.Thread(target=self._trabajador_cerrado, args=(siguiente, r), daemon=True)
+                     for r in resultados]
+            for hilo in hilos:
+                hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        return self.reporte(resultados, time.perf_counter() - self._inicio)
+
+    def reporte(self, resultados, transcurrido_s):
+        latencias = sorted(x for r in resultados for x in r.latencias)
+        servicio = sorted(x for r in resultados for x in r.servicio)
+        codigos, errores = {}, {}
+        for r in resultados:
+            for codigo, n in r.codigos.items():
+                codigos[codigo] = codigos.get(codigo, 0) + n
+            for error, n in r.errores.items():
+                errores[error] = errores.get(error, 0) + n
+        completadas = len(latencias)
+        enviadas = completadas + sum(errores.values())
+        exitosas = sum(n for codigo, n in codigos.items() if 200 <= codigo < 300)
+
+        def resumen_ms(valores):
+            if not valores:
+                return None
+            resumen = {f"p{p:g}": round(percentil(valores, p) * 1000, 3) for p in PERCENTILES}
+            resumen["media"] = round(sum(valores) / len(valores) * 1000, 3)
+            resumen["max"] = round(valores[-1] * 1000, 3)
+            return resumen
+
+        return {
+            "modo": self.modo,
+            "sensores": len(self.sensores),
+            "concurrencia": self.concurrencia,
+            "duracion_s": round(transcurrido_s, 3),
+            "tasa_objetivo_rps": (round(sum(1 / s.intervalo_s for s in self.sensores), 2)
+                                  if self.modo == 'abierto' else None),
+            "enviadas": enviadas,
+            "exitosas": exitosas,
+            "throughput_rps": round(exitosas / transcurrido_s, 2) if transcurrido_s > 0 else 0.0,
+            "tasa_error": round(1 - exitosas / enviadas, 6) if enviadas else 0.0,
+            "codigos": {str(codigo): n for codigo, n in sorted(codigos.items())},
+            "errores": errores,
+            "latencia_ms": resumen_ms(latencias),
+            "servicio_ms": resumen_ms(servicio),
+        }
+
+
+def registrar_flota(url_base, sensores, semilla=0, timeout_s=10.0):
+    """Registra cada sensor en POST /sensores con coordenadas aleatorias dentro de CDMX"""
+    rng = random.Random(semilla)
+    cliente = ClienteHTTP(url_base.rstrip("/") + "/sensores", timeout_s)
+    fallidos = 0
+    for sensor in sensores:
+        codigo = cliente.post({"sensor_id": sensor.sensor_id,
+                               "lat": rng.uniform(LAT_MIN, LAT_MAX), "lon": rng.uniform(LON_MIN, LON_MAX)})
+        fallidos += codigo != 200
+    cliente.cerrar()
+    return fallidos
+
+
+def parsear_proporciones(valores):
+    """['seco=0.8', 'crecida=0.2'] → {'seco': 0.8, 'crecida': 0.2}"""
+    proporciones = {}
+    for valor in valores:
+        perfil, _, peso = valor.partition("=")
+        if perfil not in PERFILES:
+            raise ValueError(f"Perfil desconocido: {perfil} (disponibles: {', '.join(PERFILES)})")
+        proporciones[perfil] = float(peso or 1.0)
+    return proporciones
+
+
+def imprimir_reporte(reporte):
+    print(f"\n📊 Modo {reporte['modo']} | {reporte['sensores']} sensores | "
+          f"{reporte['concurrencia']} conexiones | {reporte['duracion_s']:.1f} s")
+    if reporte["tasa_objetivo_rps"] is not None:
+        print(f"   Tasa objetivo:   {reporte['tasa_objetivo_rps']:10.1f} req/s")
+    print(f"   Throughput:      {reporte['throughput_rps']:10.1f} req/s")
+    print(f"   Enviadas:        {reporte['enviadas']:10d}   exitosas: {reporte['exitosas']}")
+    print(f"   Tasa de error:   {reporte['tasa_error']:10.2%}")
+    print(f"   Códigos HTTP:    {reporte['codigos']}")
+    if reporte["errores"]:
+        print(f"   Errores de red:  {reporte['errores']}")
+    for nombre, clave in (("Latencia", "latencia_ms"), ("Servicio", "servicio_ms")):
+        resumen = reporte[clave]
+        if resumen:
+            print(f"   {nombre} (ms):   " + "  ".join(f"{k}={v:.2f}" for k, v in resumen.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulador de flota de sensores y generador de carga")
+    parser.add_argument("--url", default="http://localhost:5000", help="URL base del servidor")
+    parser.add_argument("--sensores", type=int, default=100)
+    parser.add_argument("--duracion", type=float, default=30.0, help="Segundos de carga")
+    parser.add_argument("--intervalo", type=float, default=INTERVALO_S, help="Segundos entre lecturas por sensor")
+    parser.add_argument("--jitter", type=float, default=0.5, help="± segundos aleatorios en cada envío")
+    parser.add_argument("--perfiles", nargs="+", metavar="PERFIL=PESO",
+                        help="Proporción de perfiles (por defecto seco=0.7 subida=0.2 crecida=0.1)")
+    parser.add_argument("--modo", choices=("abierto", "cerrado"), default="abierto")
+    parser.add_argument("--concurrencia", type=int, default=64, help="Conexiones simultáneas")
+    parser.add_argument("--aceleracion", type=float, default=1.0,
+                        help="Segundos de la curva por segundo real (no cambia la tasa de envío)")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--registrar", action="store_true",
+                        help="Registrar los sensores en /sensores antes de empezar (se guardan en sensores.json)")
+    parser.add_argument("--salida", help="Archivo JSON donde guardar el reporte")
+    args = parser.parse_args()
+
+    try:
+        proporciones = parsear_proporciones(args.perfiles) if args.perfiles else None
+    except ValueError as e:
+        parser.error(str(e))
+    sensores = crear_flota(args.sensores, proporciones, args.intervalo, args.jitter, args.semilla)
+    conteo = {p: sum(s.perfil == p for s in sensores) for p in PERFILES}
+    print(f"🛰️  {len(sensores)} sensores virtuales: " + ", ".join(f"{p}={n}" for p, n in conteo.items()))
+
+    if args.registrar:
+        fallidos = registrar_flota(args.url, sensores, args.semilla, args.timeout)
+        print(f"📍 Sensores registrados ({fallidos} fallidos)")
+
+    generador = GeneradorCarga(args.url.rstrip("/") + "/ingest", sensores, args.duracion, args.modo,
+                               args.concurrencia, args.aceleracion, args.timeout)
+    print(f"🚀 Generando carga durante {args.duracion:.0f} s contra {generador.url}...")
+    reporte = generador.ejecutar()
+    imprimir_reporte(reporte)
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(reporte, f, indent=2)
+        print(f"💾 Reporte guardado como: {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
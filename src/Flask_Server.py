@@ -1,53 +1,692 @@
 from flask import Flask, request
-from Realtime import predecir_alerta
+from Realtime import (predecir_alerta, predecir_alerta_con_coordenadas, predecir_alertas_lote,
+                      obtener_registro_sensores, calentar, configurar_micro_lotes, configurar_sustituto, configurar_cache_zonas,
+                      estadisticas_cache_zonas, escalar_por_tasa, recargar, ultima_recarga, version_activa,
+                      VigilanteModelo, LATITUD_FIJA, LONGITUD_FIJA, SENSOR_FIJO)
+from cola_ingesta import ColaIngesta, MAX_PENDIENTES, N_TRABAJADORES
+from estadisticas_sensor import EstadisticasFlota
+from historial import HistorialLecturas, parsear_resolucion
+from notificaciones import CanalWebhook, DespachadorNotificaciones, UltimasAlertas
+from bitacora import BitacoraJSON
+import metricas
+from pathlib import Path
+import argparse
 import logging
+import math
+import threading
+import time
+import numpy as np
 
 app = Flask(__name__)
 
+# Modo de /ingest: False responde después de predecir (original); True valida,
+# encola la lectura y responde 202 de inmediato (la predicción la hacen los
+# trabajadores de ColaIngesta). Con la cola llena responde 503.
+app.config["INGESTA_ASINCRONA"] = False
+app.config["COLA_MAX_PENDIENTES"] = MAX_PENDIENTES
+app.config["COLA_TRABAJADORES"] = N_TRABAJADORES
+
+# True: la tasa de subida de cada sensor puede subir la alerta un nivel
+# (ver Realtime.escalar_por_tasa). Las estadísticas se calculan siempre.
+app.config["ALERTA_CON_TASA"] = False
+
+# Estadísticas incrementales por sensor (EWMA, min/max móviles, tasa de subida)
+estadisticas_sensores = EstadisticasFlota()
+
+# Historial de lecturas y alertas (SQLite en modo WAL). None = sin historial; se
+# activa con --historial (por defecto en HISTORIAL_DEFAULT)
+HISTORIAL_DEFAULT = Path(__file__).resolve().parent / "historial.db"
+app.config["HISTORIAL_PATH"] = None
+
+# URLs que reciben (POST JSON) los cambios de alerta de cada sensor. Vacío = sin notificaciones.
+app.config["WEBHOOKS"] = []
+
 # Configurar logging para que las salidas se vean claramente en la terminal
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
 app.logger.setLevel(logging.INFO)
 
+# Bitácora estructurada (ver iniciar_bitacora): archivo JSON lines escrito por un hilo
+# aparte, con rotación. None = logs de texto en la terminal.
+app.config["LOG_JSON"] = None
+app.config["LOG_MAX_BYTES"] = 50 * 1024 * 1024
+app.config["LOG_RESPALDOS"] = 5
+# Fracción de lecturas VERDE sin cambio de alerta que se escriben en la bitácora JSON
+app.config["LOG_MUESTREO_VERDE"] = 1.0
+
+# Segundos entre revisiones de los archivos del modelo y los datos; si cambian se
+# recargan en caliente (ver iniciar_vigilancia). None = solo con POST /modelo/recargar
+app.config["RECARGA_INTERVALO_S"] = None
+
+# Umbrales de voltaje (V) que separan los niveles de sensor 0|1|2|3
+UMBRALES_VOLTAJE = np.array([0.683, 0.759, 0.812])
+
+# Máximo de lecturas aceptadas en una sola petición a /ingest/batch
+MAX_LECTURAS_LOTE = 5000
+
+# Estado del calentamiento: el modelo y los datos se cargan en segundo plano al
+# arrancar, así el puerto se abre de inmediato y "/" responde 503 hasta estar listo
+estado_arranque = {"listo": False, "error": None, "version": None, "segundos": None}
+_calentamiento_lock = threading.Lock()
+_calentamiento = None
+
+def _calentar():
+    inicio = time.perf_counter()
+    try:
+        info = calentar()
+    except Exception as e:
+        app.logger.exception("Error al cargar el modelo")
+        estado_arranque["error"] = str(e)
+        return
+    estado_arranque["version"] = info["version"]
+    estado_arranque["segundos"] = round(time.perf_counter() - inicio, 3)
+    estado_arranque["listo"] = True
+    app.logger.info(f"Modelo listo (versión {info['version']}) en {estado_arranque['segundos']} s")
+
+_bitacora = None
+
+def iniciar_bitacora():
+    """
+    Manda todos los logs a la bitácora JSON de app.config["LOG_JSON"]: el hilo de la
+    petición solo encola el registro y un hilo aparte lo formatea y lo escribe.
+    """
+    global _bitacora
+    if _bitacora is None and app.config["LOG_JSON"] is not None:
+        _bitacora = BitacoraJSON(app.config["LOG_JSON"], max_bytes=app.config["LOG_MAX_BYTES"],
+                                 respaldos=app.config["LOG_RESPALDOS"],
+                                 muestreo_verde=app.config["LOG_MUESTREO_VERDE"]).iniciar()
+    return _bitacora
+
+def detener_bitacora():
+    """Escribe los registros pendientes y vuelve a los logs de texto"""
+    global _bitacora
+    if _bitacora is not None:
+        _bitacora.detener()
+        _bitacora = None
+
+_vigilante = None
+
+def iniciar_vigilancia():
+    """Revisa en segundo plano los archivos del modelo cada app.config["RECARGA_INTERVALO_S"] s"""
+    global _vigilante
+    if _vigilante is None and app.config["RECARGA_INTERVALO_S"] is not None:
+        _vigilante = VigilanteModelo(app.config["RECARGA_INTERVALO_S"]).iniciar()
+    return _vigilante
+
+def detener_vigilancia():
+    global _vigilante
+    if _vigilante is not None:
+        _vigilante.detener()
+        _vigilante = None
+
+def iniciar_calentamiento():
+    """Lanza (una sola vez) la carga del modelo y los datos en un hilo en segundo plano"""
+    global _calentamiento
+    with _calentamiento_lock:
+        if _calentamiento is None:
+            _calentamiento = threading.Thread(target=_calentar, name="calentamiento", daemon=True)
+            _calentamiento.start()
+    return _calentamiento
+
+def mapear_voltajes_a_niveles(voltajes):
+    """
+    Mapea voltajes a nivel de sensor (0-3) de forma vectorizada.
+    Equivale a las comparaciones v <= 0.683 → 0, v <= 0.759 → 1, v <= 0.812 → 2, si no 3.
+    
+    Args:
+        voltajes (array-like): Voltajes medidos en el shunt
+    
+    Returns:
+        np.ndarray: Niveles de sensor (int)
+    """
+    return np.digitize(np.asarray(voltajes, dtype=np.float64), UMBRALES_VOLTAJE, right=True)
+
+_historial = None
+_historial_lock = threading.Lock()
+
+def obtener_historial():
+    """Historial de lecturas; se abre la primera vez que se pide (None si está desactivado)"""
+    global _historial
+    with _historial_lock:
+        if _historial is None and app.config["HISTORIAL_PATH"] is not None:
+            _historial = HistorialLecturas(app.config["HISTORIAL_PATH"])
+        return _historial
+
+_notificador = None
+_notificador_lock = threading.Lock()
+
+def obtener_notificador():
+    """Despachador de notificaciones; se crea la primera vez que se pide (None sin webhooks)"""
+    global _notificador
+    with _notificador_lock:
+        if _notificador is None and app.config["WEBHOOKS"]:
+            _notificador = DespachadorNotificaciones([CanalWebhook(url) for url in app.config["WEBHOOKS"]],
+                                                     ultimas_alertas=ultimas_alertas)
+        return _notificador
+
+def numero_finito(x):
+    """Número JSON utilizable en una lectura (no bool, NaN ni infinito)"""
+    return isinstance(x, (int, float)) and not isinstance(x, bool) and math.isfinite(x)
+
+def ts_valido(ts):
+    """El timestamp de una lectura es opcional, pero si viene debe ser un número finito"""
+    return ts is None or numero_finito(ts)
+
+def marca_tiempo(ts, recibido):
+    """Timestamp de la lectura, o el de recepción si no viene o no es válido"""
+    return ts if ts is not None and ts_valido(ts) else recibido
+
+# Lectura sin {v, pct} numéricos (el único caso que /ingest síncrono contesta con 200)
+ERROR_SIN_V_PCT = "Se esperaba {v, pct}"
+
+def error_lectura(data):
+    """
+    Por qué no se puede procesar una lectura de /ingest.
+    
+    Returns:
+        str | None: Mensaje de error, o None si la lectura es válida
+    """
+    if not isinstance(data, dict) or not numero_finito(data.get("v")) or not numero_finito(data.get("pct")):
+        return ERROR_SIN_V_PCT
+    if not isinstance(data.get("sensor_id"), (str, type(None))):
+        return "sensor_id debe ser texto"
+    if not all(numero_finito(data[c]) for c in ("lat", "lon") if c in data):
+        return "lat y lon deben ser números finitos"
+    return None
+
+# Última alerta de cada sensor: el cambio de cada lectura se detecta una sola vez y
+# lo usan tanto la bitácora JSON como el despachador de notificaciones
+ultimas_alertas = UltimasAlertas()
+
+def registrar_lectura_json(sensor_id, v, pct, ts, resultado, anterior):
+    """
+    Un solo registro estructurado por lectura. Las lecturas que cambian la alerta
+    (`anterior` no es None, ver UltimasAlertas.cambiar) llevan el detalle completo
+    (estadísticas y coordenadas); las rutinarias solo los campos básicos, y las
+    VERDE se pueden muestrear (LOG_MUESTREO_VERDE).
+    """
+    datos = {"sensor_id": sensor_id, "v": v, "pct": pct, "ts": ts,
+             "nivel_sensor": resultado['nivel_sensor'], "alerta": resultado['alerta'],
+             "riesgo_zona": resultado['riesgo_zona'], "riesgo_score": resultado['riesgo_score'],
+             "cambio": anterior is not None}
+    if anterior is not None:
+        datos.update(anterior=anterior, estadisticas=resultado.get('estadisticas'),
+                     coordenadas=resultado.get('coordenadas'))
+        app.logger.info("cambio de alerta", extra={"datos": datos})
+    else:
+        app.logger.info("lectura", extra={"datos": datos})
+
+def procesar_lectura(data):
+    """
+    Predicción y alertas de una lectura de /ingest (ya validada).
+    
+    Args:
+        data (dict): {"v", "pct"} y opcionalmente "sensor_id", "ts" y "lat"/"lon"
+    
+    Returns:
+        dict: Resultado de predecir_alerta con las estadísticas del sensor
+    """
+    inicio = time.perf_counter()
+    v, pct = data["v"], data["pct"]
+    ts = marca_tiempo(data.get("ts"), time.time())
+    log_json = _bitacora is not None
+    if not log_json:
+        app.logger.info(f"v={v:.3f} V | pct={pct:.2f} %")
+    t_log = time.perf_counter()
+    
+    # Mapear voltaje a nivel de sensor (0-3) con los umbrales de UMBRALES_VOLTAJE
+    nivel_sensor = int(mapear_voltajes_a_niveles(v))
+    t_mapeo = time.perf_counter()
+    
+    sensor_id = data.get("sensor_id")
+    estadisticas = estadisticas_sensores.actualizar(sensor_id or SENSOR_FIJO, ts, pct)
+    tasa_subida = estadisticas['tasa_subida'] if app.config["ALERTA_CON_TASA"] else None
+    t_estadisticas = time.perf_counter()
+    
+    if "lat" in data or "lon" in data:
+        # Coordenadas explícitas (p. ej. una unidad móvil): score de zona en el momento.
+        # Con micro-lotes, las lecturas concurrentes que caen al modelo comparten una llamada
+        resultado = predecir_alerta_con_coordenadas(data.get("lat", LATITUD_FIJA), data.get("lon", LONGITUD_FIJA),
+                                                    nivel_sensor)
+        if tasa_subida is not None:
+            resultado['alerta'] = escalar_por_tasa(resultado['alerta'], tasa_subida)
+            resultado['tasa_subida'] = tasa_subida
+    else:
+        # Resolver la alerta precalculada del sensor (sin sensor_id o sin registrar:
+        # coordenadas hardcoded definidas en Realtime.py)
+        if sensor_id is not None and sensor_id not in obtener_registro_sensores():
+            app.logger.warning(f"Sensor '{sensor_id}' no registrado → usando coordenadas fijas")
+        resultado = predecir_alerta(nivel_sensor, sensor_id, tasa_subida)
+    resultado['estadisticas'] = estadisticas
+    anterior = ultimas_alertas.cambiar(sensor_id or SENSOR_FIJO, resultado['alerta'])
+    t_alerta = time.perf_counter()
+    
+    if log_json:
+        registrar_lectura_json(sensor_id or SENSOR_FIJO, v, pct, ts, resultado, anterior)
+    else:
+        app.logger.info(f"🚨 Nivel sensor: {nivel_sensor} → Alerta: {resultado['alerta']}")
+        app.logger.info(f"Detalles de la predicción: {resultado}")
+    t_log2 = time.perf_counter()
+    
+    historial = obtener_historial()
+    if historial is not None:
+        historial.registrar(sensor_id or SENSOR_FIJO, ts, v, pct,
+                            nivel_sensor, resultado['riesgo_score'], resultado['alerta'])
+    t_historial = time.perf_counter()
+    
+    notificador = obtener_notificador()
+    if notificador is not None:
+        notificador.notificar_cambio(sensor_id or SENSOR_FIJO, resultado['alerta'], anterior, ts=ts, v=v, pct=pct,
+                                     nivel_sensor=nivel_sensor, riesgo_zona=resultado['riesgo_zona'],
+                                     riesgo_score=resultado['riesgo_score'])
+    fin = time.perf_counter()
+    
+    observar = metricas.ETAPA_SEGUNDOS.observar
+    observar(t_mapeo - t_log, etapa="mapeo_voltaje")
+    observar(t_estadisticas - t_mapeo, etapa="estadisticas")
+    observar(t_alerta - t_estadisticas, etapa="alerta")
+    observar((t_log - inicio) + (t_log2 - t_alerta), etapa="logging")
+    observar(t_historial - t_log2, etapa="historial")
+    observar(fin - t_historial, etapa="notificaciones")
+    observar(fin - inicio, etapa="procesar_lectura")
+    metricas.ALERTAS.inc(alerta=resultado['alerta'])
+    metricas.RIESGO_ZONA.inc(riesgo_zona=resultado['riesgo_zona'])
+    return resultado
+
+# Estado de la cola, el historial y las notificaciones (se leen al exportar /metrics)
+COLA_PROFUNDIDAD = metricas.REGISTRO.medidor("tt2_cola_profundidad", "Lecturas esperando en la cola de ingesta")
+COLA_RECHAZADAS = metricas.REGISTRO.medidor("tt2_cola_rechazadas", "Lecturas rechazadas con 503 (cola llena)")
+HISTORIAL_PENDIENTES = metricas.REGISTRO.medidor("tt2_historial_pendientes", "Lecturas sin escribir al historial")
+HISTORIAL_DESCARTADAS = metricas.REGISTRO.medidor("tt2_historial_descartadas", "Lecturas descartadas del historial")
+HISTORIAL_RECHAZADAS = metricas.REGISTRO.medidor("tt2_historial_rechazadas", "Lecturas que SQLite rechazó al guardar")
+NOTIFICACIONES = metricas.REGISTRO.medidor("tt2_notificaciones", "Eventos y envíos de notificaciones", ("resultado",))
+BITACORA = metricas.REGISTRO.medidor("tt2_bitacora", "Registros de la bitácora JSON en cola, descartados u omitidos",
+                                     ("estado",))
+CACHE_ZONAS = metricas.REGISTRO.medidor("tt2_cache_zonas", "Entradas, aciertos, fallos, desalojos, vencidas "
+                                        "e invalidaciones de la caché de scores de zona", ("estadistica",))
+
+_cola_ingesta = None
+_cola_lock = threading.Lock()
+
+def obtener_cola_ingesta():
+    """Cola de ingesta asíncrona; se crea y arranca la primera vez que se pide"""
+    global _cola_ingesta
+    with _cola_lock:
+        if _cola_ingesta is None:
+            _cola_ingesta = ColaIngesta(procesar_lectura,
+                                        max_pendientes=app.config["COLA_MAX_PENDIENTES"],
+                                        n_trabajadores=app.config["COLA_TRABAJADORES"]).iniciar()
+        return _cola_ingesta
+
 @app.route("/ingest", methods=["POST"])
 def ingest():
+    inicio = time.perf_counter()
     data = request.get_json(force=True, silent=True) or {}
-    v = data.get("v")
-    pct = data.get("pct")
+    metricas.ETAPA_SEGUNDOS.observar(time.perf_counter() - inicio, etapa="parseo_json")
     
-    if isinstance(v, (int, float)) and isinstance(pct, (int, float)):
-        app.logger.info(f"v={v:.3f} V | pct={pct:.2f} %")
-        
-        # Mapear voltaje a nivel de sensor (0-3)
-        # Asumiendo rangos: 0-0.75V=0, 0.75-1.5V=1, 1.5-2.25V=2, 2.25-3V=3
-        if v <= 0.683:
-            nivel_sensor = 0
-        elif v <= 0.759:
-            nivel_sensor = 1
-        elif v <= 0.812:
-            nivel_sensor = 2
+    error = error_lectura(data)
+    if not app.config["INGESTA_ASINCRONA"]:
+        if error is None:
+            resultado = procesar_lectura(data)
+            metricas.LECTURAS.inc(endpoint="ingest", resultado="procesada")
+            respuesta = {"ok": True, "estadisticas": resultado['estadisticas']}
+        else:
+            app.logger.info(f"Datos recibidos inválidos o vacíos: {data}")
+            metricas.LECTURAS.inc(endpoint="ingest", resultado="invalida")
+            # Sin {v, pct} se sigue contestando 200 (así lo espera el firmware de los sensores)
+            respuesta = {"ok": True} if error == ERROR_SIN_V_PCT else ({"ok": False, "error": error}, 400)
+        metricas.ETAPA_SEGUNDOS.observar(time.perf_counter() - inicio, etapa="ingest")
+        return respuesta
+    
+    # Modo asíncrono: solo validar y encolar
+    if error is not None:
+        app.logger.info(f"Datos recibidos inválidos o vacíos: {data}")
+        metricas.LECTURAS.inc(endpoint="ingest", resultado="invalida")
+        return {"ok": False, "error": error}, 400
+    # La hora de la lectura es la de llegada, no la del trabajador que la procese
+    data["ts"] = marca_tiempo(data.get("ts"), time.time())
+    cola = obtener_cola_ingesta()
+    if not cola.encolar(data):
+        app.logger.warning(f"Cola de ingesta llena ({cola.max_pendientes}) → 503")
+        metricas.LECTURAS.inc(endpoint="ingest", resultado="rechazada")
+        return {"ok": False, "error": "Cola de ingesta llena"}, 503, {"Retry-After": "1"}
+    metricas.LECTURAS.inc(endpoint="ingest", resultado="encolada")
+    metricas.ETAPA_SEGUNDOS.observar(time.perf_counter() - inicio, etapa="ingest")
+    return {"ok": True, "encolado": True}, 202
+
+
+@app.route("/ingest/cola", methods=["GET"])
+def estado_cola():
+    """Profundidad de la cola de ingesta asíncrona y tiempos de espera"""
+    if _cola_ingesta is None:
+        return {"ok": True, "asincrona": app.config["INGESTA_ASINCRONA"], "cola": None}
+    return {"ok": True, "asincrona": app.config["INGESTA_ASINCRONA"], "cola": _cola_ingesta.estadisticas()}
+
+
+@app.route("/ingest/batch", methods=["POST"])
+def ingest_batch():
+    """
+    Recibe muchas lecturas en una sola petición (p. ej. desde un gateway).
+    
+    Body: lista de lecturas o {"lecturas": [...]}, cada una con
+    {"sensor_id", "ts", "v", "pct"} y opcionalmente "lat"/"lon".
+    Devuelve una alerta por lectura, en el mismo orden.
+    """
+    inicio = time.perf_counter()
+    data = request.get_json(force=True, silent=True)
+    metricas.ETAPA_SEGUNDOS.observar(time.perf_counter() - inicio, etapa="parseo_json")
+    lecturas = data.get("lecturas") if isinstance(data, dict) else data
+    
+    if not isinstance(lecturas, list):
+        app.logger.info(f"Lote inválido o vacío: {data}")
+        return {"ok": False, "error": "Se esperaba una lista de lecturas"}, 400
+    if len(lecturas) > MAX_LECTURAS_LOTE:
+        return {"ok": False, "error": f"Máximo {MAX_LECTURAS_LOTE} lecturas por lote"}, 413
+    
+    # Separar lecturas válidas de inválidas conservando la posición original;
+    # sin "ts" (o null) se usa el momento de recepción
+    recibido = time.time()
+    resultados = [None] * len(lecturas)
+    validas, voltajes, marcas = [], [], []
+    for i, lectura in enumerate(lecturas):
+        # Mismas reglas que /ingest (v, pct, lat y lon finitos; sensor_id texto): una
+        # lectura mala solo falla ella, no todo el lote
+        error = error_lectura(lectura)
+        if error is not None:
+            resultados[i] = {"ok": False, "status": 400, "error": error}
+        elif not ts_valido(lectura.get("ts")):
+            resultados[i] = {"ok": False, "status": 400, "error": "ts debe ser un timestamp Unix numérico"}
         else:
-            nivel_sensor = 3
+            validas.append(i)
+            voltajes.append(lectura["v"])
+            marcas.append(marca_tiempo(lectura.get("ts"), recibido))
+    
+    if validas:
+        # Un solo mapeo de voltaje para todo el lote
+        niveles = mapear_voltajes_a_niveles(voltajes)
+        alertas = [None] * len(validas)
         
-        # Hacer predicción con coordenadas hardcoded (se definen en Realtime.py)
-        resultado = predecir_alerta(nivel_sensor)
+        # Estadísticas por sensor en el orden de llegada (O(1) por lectura)
+        estadisticas = [
+            estadisticas_sensores.actualizar(lecturas[i].get("sensor_id") or SENSOR_FIJO, marcas[k], lecturas[i]["pct"])
+            for k, i in enumerate(validas)
+        ]
+        usar_tasa = app.config["ALERTA_CON_TASA"]
         
-        app.logger.info(f"🚨 Nivel sensor: {nivel_sensor} → Alerta: {resultado['alerta']}")
-        app.logger.info(f"Detalles de la predicción: {resultado}")
+        # Sensores registrados sin coordenadas explícitas: fila precalculada en O(1)
+        pendientes = []
+        for k, i in enumerate(validas):
+            lectura = lecturas[i]
+            if "lat" not in lectura and "lon" not in lectura:
+                fila = obtener_registro_sensores().alerta(lectura.get("sensor_id"), int(niveles[k]))
+                if fila is not None:
+                    alerta = fila['alerta']
+                    if usar_tasa:
+                        alerta = escalar_por_tasa(alerta, estadisticas[k]['tasa_subida'])
+                    alertas[k] = (alerta, fila['riesgo_zona'], fila['riesgo_score'])
+                    continue
+            pendientes.append(k)
+        
+        # Resto: una sola pasada de score de zona para todas sus coordenadas
+        if pendientes:
+            prediccion = predecir_alertas_lote(
+                [lecturas[validas[k]].get("lat", LATITUD_FIJA) for k in pendientes],
+                [lecturas[validas[k]].get("lon", LONGITUD_FIJA) for k in pendientes],
+                niveles[pendientes],
+                [estadisticas[k]['tasa_subida'] for k in pendientes] if usar_tasa else None,
+            )
+            for j, k in enumerate(pendientes):
+                alertas[k] = (str(prediccion['alerta'][j]), str(prediccion['riesgo_zona'][j]),
+                              round(float(prediccion['riesgo_score'][j]), 1))
+        
+        conteos, conteos_zona = {}, {}
+        for k, i in enumerate(validas):
+            lectura = lecturas[i]
+            alerta, riesgo_zona, riesgo_score = alertas[k]
+            conteos[alerta] = conteos.get(alerta, 0) + 1
+            conteos_zona[riesgo_zona] = conteos_zona.get(riesgo_zona, 0) + 1
+            resultados[i] = {
+                "ok": True,
+                "sensor_id": lectura.get("sensor_id"),
+                "ts": marcas[k],
+                "nivel_sensor": int(niveles[k]),
+                "alerta": alerta,
+                "riesgo_zona": riesgo_zona,
+                "riesgo_score": riesgo_score,
+                "estadisticas": estadisticas[k],
+            }
+        
+        # Cambios de alerta del lote, en orden de llegada (los usan notificaciones y bitácora)
+        anteriores = {i: ultimas_alertas.cambiar(resultados[i]["sensor_id"] or SENSOR_FIJO, resultados[i]["alerta"])
+                      for i in validas}
+        
+        historial = obtener_historial()
+        if historial is not None:
+            historial.registrar_lote([
+                (resultados[i]["sensor_id"] or SENSOR_FIJO, resultados[i]["ts"], lecturas[i]["v"],
+                 lecturas[i]["pct"], resultados[i]["nivel_sensor"], resultados[i]["riesgo_score"],
+                 resultados[i]["alerta"])
+                for i in validas
+            ])
+        
+        notificador = obtener_notificador()
+        if notificador is not None:
+            for i in validas:
+                r = resultados[i]
+                notificador.notificar_cambio(r["sensor_id"] or SENSOR_FIJO, r["alerta"], anteriores[i], ts=r["ts"],
+                                             v=lecturas[i]["v"], pct=lecturas[i]["pct"], nivel_sensor=r["nivel_sensor"],
+                                             riesgo_zona=r["riesgo_zona"], riesgo_score=r["riesgo_score"])
+        
+        if _bitacora is not None:
+            # Bitácora JSON: un registro por lote y el detalle solo de los cambios de alerta
+            for i in validas:
+                r = resultados[i]
+                sensor_id = r["sensor_id"] or SENSOR_FIJO
+                anterior = anteriores[i]
+                if anterior is not None:
+                    datos = dict(r, sensor_id=sensor_id, v=lecturas[i]["v"], pct=lecturas[i]["pct"],
+                                 cambio=True, anterior=anterior)
+                    del datos["ok"]
+                    app.logger.info("cambio de alerta", extra={"datos": datos})
+            app.logger.info("lote", extra={"datos": {"lecturas": len(lecturas), "validas": len(validas),
+                                                     "alertas": conteos}})
+        else:
+            resumen = ", ".join(f"{c}={n}" for c, n in sorted(conteos.items()))
+            app.logger.info(f"Lote de {len(lecturas)} lecturas ({len(validas)} válidas) → {resumen}")
+        
+        for alerta, n in conteos.items():
+            metricas.ALERTAS.inc(n, alerta=alerta)
+        for riesgo_zona, n in conteos_zona.items():
+            metricas.RIESGO_ZONA.inc(n, riesgo_zona=riesgo_zona)
+    
+    metricas.LECTURAS.inc(len(validas), endpoint="ingest_batch", resultado="procesada")
+    metricas.LECTURAS.inc(len(lecturas) - len(validas), endpoint="ingest_batch", resultado="invalida")
+    metricas.ETAPA_SEGUNDOS.observar(time.perf_counter() - inicio, etapa="ingest_batch")
+    return {"ok": True, "resultados": resultados}
 
-    else:
-        app.logger.info(f"Datos recibidos inválidos o vacíos: {data}")
+
+@app.route("/historial/<sensor_id>", methods=["GET"])
+def consultar_historial(sensor_id):
+    """
+    Historial de un sensor.
+    Query: desde, hasta (timestamps Unix) y
+      • resolucion ("1m", "15m", "1h", o segundos): serie agregada por cubetas
+        (min/max/media de v y pct, alerta máxima, número de lecturas)
+      • sin resolucion: lecturas crudas; limite (default 1000, las más recientes)
+    """
+    historial = obtener_historial()
+    if historial is None:
+        return {"ok": False, "error": "Historial desactivado"}, 404
+    desde = request.args.get("desde", type=float)
+    hasta = request.args.get("hasta", type=float)
+    
+    if "resolucion" in request.args:
+        try:
+            resolucion = parsear_resolucion(request.args["resolucion"])
+        except ValueError as e:
+            return {"ok": False, "error": str(e)}, 400
+        fuente, serie = historial.consultar_agregado(sensor_id, resolucion, desde, hasta)
+        return {"ok": True, "sensor_id": sensor_id, "resolucion": resolucion, "fuente": fuente, "serie": serie}
     
+    limite = min(max(request.args.get("limite", 1000, type=int), 1), 100000)
+    lecturas = historial.consultar(sensor_id, desde, hasta, limite)
+    return {"ok": True, "sensor_id": sensor_id, "lecturas": lecturas}
+
+
+@app.route("/sensores", methods=["GET"])
+def listar_sensores():
+    """Sensores registrados con su score y clase de zona precalculados"""
+    return {"ok": True, "sensores": obtener_registro_sensores().listar()}
+
+
+@app.route("/sensores", methods=["POST"])
+def registrar_sensor():
+    """
+    Registra (o mueve) un sensor fijo.
+    Body: {"sensor_id": str, "lat": float, "lon": float}
+    """
+    data = request.get_json(force=True, silent=True) or {}
+    sensor_id, lat, lon = data.get("sensor_id"), data.get("lat"), data.get("lon")
+    
+    if not isinstance(sensor_id, str) or not sensor_id or not all(isinstance(x, (int, float)) for x in (lat, lon)):
+        return {"ok": False, "error": "Se esperaba {sensor_id, lat, lon}"}, 400
+    if sensor_id == SENSOR_FIJO:
+        return {"ok": False, "error": f"'{SENSOR_FIJO}' está reservado para las coordenadas fijas"}, 400
+    
+    fila = obtener_registro_sensores().registrar(sensor_id, lat, lon)
+    app.logger.info(f"Sensor '{sensor_id}' registrado en ({lat}, {lon}) → zona {fila['riesgo_zona']}")
+    return {"ok": True, "sensor_id": sensor_id, "riesgo_zona": fila['riesgo_zona'],
+            "riesgo_score": fila['riesgo_score']}
+
+
+@app.route("/sensores/<sensor_id>", methods=["DELETE"])
+def eliminar_sensor(sensor_id):
+    if sensor_id == SENSOR_FIJO:
+        return {"ok": False, "error": f"'{SENSOR_FIJO}' está reservado para las coordenadas fijas"}, 400
+    if not obtener_registro_sensores().eliminar(sensor_id):
+        return {"ok": False, "error": "Sensor no registrado"}, 404
+    ultimas_alertas.olvidar(sensor_id)
     return {"ok": True}
 
 
+@app.route("/metrics", methods=["GET"])
+def exportar_metricas():
+    """Métricas en formato de texto de Prometheus"""
+    if _cola_ingesta is not None:
+        cola = _cola_ingesta.estadisticas()
+        COLA_PROFUNDIDAD.set(cola['profundidad'])
+        COLA_RECHAZADAS.set(cola['rechazadas'])
+    if _historial is not None:
+        historial = _historial.estadisticas()
+        HISTORIAL_PENDIENTES.set(historial['pendientes'])
+        HISTORIAL_DESCARTADAS.set(historial['descartadas'])
+        HISTORIAL_RECHAZADAS.set(historial['rechazadas'])
+    if _notificador is not None:
+        for contador, valor in _notificador.estadisticas().items():
+            if contador != 'pendientes':
+                NOTIFICACIONES.set(valor, resultado=contador)
+    if _bitacora is not None:
+        for estado, valor in _bitacora.estadisticas().items():
+            BITACORA.set(valor, estado=estado)
+    cache = estadisticas_cache_zonas()
+    if cache is not None:
+        for estadistica, valor in cache.items():
+            CACHE_ZONAS.set(valor, estadistica=estadistica)
+    return metricas.REGISTRO.exportar(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+
+@app.route("/modelo/recargar", methods=["POST"])
+def recargar_modelo():
+    """
+    Carga la versión del modelo y los datos que haya en disco sin detener el servidor.
+    Si no pasa la revisión (casos dorados), sigue la versión anterior y responde 409.
+    """
+    resultado = recargar()
+    if resultado["ok"]:
+        estado_arranque.update(listo=True, error=None, version=resultado["version"])
+    return resultado, (200 if resultado["ok"] else 409)
+
+
 @app.route("/", methods=["GET"])
 def health():
-    """Endpoint simple para comprobar que el servidor está arriba"""
+    """
+    Comprueba que el servidor está arriba y el modelo cargado.
+    Responde 503 mientras el modelo se está cargando (o si falló la carga).
+    """
     app.logger.info("Health check recibido")
-    return {"ok": True, "status": "running"}
+    iniciar_calentamiento()
+    if estado_arranque["error"] is not None:
+        return {"ok": False, "status": "error", "error": estado_arranque["error"]}, 503
+    if not estado_arranque["listo"]:
+        return {"ok": False, "status": "warming"}, 503
+    return {"ok": True, "status": "running", "version": version_activa() or estado_arranque["version"],
+            "ultima_recarga": ultima_recarga()}
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API de alertas de inundación")
+    parser.add_argument("--asincrono", action="store_true",
+                        help="/ingest encola la lectura y responde 202 sin esperar la predicción")
+    parser.add_argument("--cola-max", type=int, default=MAX_PENDIENTES,
+                        help=f"Lecturas en cola antes de responder 503 (default: {MAX_PENDIENTES})")
+    parser.add_argument("--trabajadores", type=int, default=N_TRABAJADORES,
+                        help=f"Hilos que procesan la cola (default: {N_TRABAJADORES})")
+    parser.add_argument("--alerta-con-tasa", action="store_true",
+                        help="Sube la alerta un nivel cuando el agua sube rápido (tasa de subida)")
+    parser.add_argument("--webhook", action="append", default=[],
+                        help="URL que recibe los cambios de alerta (se puede repetir)")
+    parser.add_argument("--micro-lotes-ms", type=float, default=None,
+                        help="Agrupa las predicciones concurrentes del modelo en ventanas de N ms (ej. 2)")
+    parser.add_argument("--max-lote", type=int, default=256,
+                        help="Predicciones máximas por micro-lote (default: 256)")
+    parser.add_argument("--historial", nargs="?", const=str(HISTORIAL_DEFAULT), default=None, metavar="RUTA",
+                        help=f"Guarda las lecturas y alertas en SQLite (default: {HISTORIAL_DEFAULT.name})")
+    parser.add_argument("--log-json", default=None,
+                        help="Escribe los logs como JSON lines en este archivo desde un hilo aparte")
+    parser.add_argument("--log-max-mb", type=float, default=50,
+                        help="Tamaño (MB) al que se rota la bitácora JSON (default: 50)")
+    parser.add_argument("--log-respaldos", type=int, default=5,
+                        help="Archivos rotados que se conservan (default: 5)")
+    parser.add_argument("--log-muestreo-verde", type=float, default=1.0,
+                        help="Fracción de lecturas VERDE sin cambio que se escriben (ej. 0.01)")
+    parser.add_argument("--vigilar-modelo", type=float, default=None, metavar="SEGUNDOS",
+                        help="Recarga en caliente el modelo/dataset si cambian en disco (revisa cada N s)")
+    parser.add_argument("--sustituto", type=float, default=None, metavar="CONCORDANCIA",
+                        help="Servir el árbol destilado si coincide con el bosque en al menos "
+                             "esta fracción de clases (ej. 0.99)")
+    parser.add_argument("--cache-zonas", type=int, default=None, metavar="ENTRADAS",
+                        help="Caché LRU de scores de zona por coordenadas (ej. 10000 celdas)")
+    parser.add_argument("--cache-precision", type=int, default=5,
+                        help="Decimales de las coordenadas en la clave de la caché (default: 5 ≈ 1.1 m)")
+    parser.add_argument("--cache-ttl", type=float, default=None, metavar="SEGUNDOS",
+                        help="Vencimiento de los scores en caché (default: hasta que cambie el modelo)")
+    args = parser.parse_args()
+    if args.cache_zonas is not None:
+        configurar_cache_zonas(args.cache_zonas, args.cache_precision, args.cache_ttl)
+    if args.micro_lotes_ms is not None:
+        configurar_micro_lotes(args.micro_lotes_ms / 1000, args.max_lote)
+    if args.sustituto is not None:
+        configurar_sustituto(args.sustituto)
+    app.config["INGESTA_ASINCRONA"] = args.asincrono
+    app.config["ALERTA_CON_TASA"] = args.alerta_con_tasa
+    app.config["WEBHOOKS"] = args.webhook
+    app.config["COLA_MAX_PENDIENTES"] = args.cola_max
+    app.config["COLA_TRABAJADORES"] = args.trabajadores
+    app.config["HISTORIAL_PATH"] = args.historial
+    app.config["LOG_JSON"] = args.log_json
+    app.config["LOG_MAX_BYTES"] = int(args.log_max_mb * 1024 * 1024)
+    app.config["LOG_RESPALDOS"] = args.log_respaldos
+    app.config["LOG_MUESTREO_VERDE"] = args.log_muestreo_verde
+    app.config["RECARGA_INTERVALO_S"] = args.vigilar_modelo
+    if args.log_json:
+        app.logger.info(f"Logs en formato JSON en {args.log_json}")
+        iniciar_bitacora()
+    
     app.logger.info("Iniciando servidor Flask (reloader desactivado para evitar cargas duplicadas)...")
-    app.run(host="0.0.0.0", port=5000, debug=True, use_reloader=False)
+    iniciar_calentamiento()
+    iniciar_vigilancia()
+    try:
+        app.run(host="0.0.0.0", port=5000, debug=True, use_reloader=False)
+    finally:
+        detener_vigilancia()
+        detener_bitacora()
     
 
@@ -1,89 +1,524 @@
+import argparse
+import math
+import time
+
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
+from sklearn.tree import DecisionTreeRegressor
 from sklearn.metrics import mean_squared_error, r2_score
-from joblib import dump
-import matplotlib.pyplot as plt
+from joblib import dump, load
 from pathlib import Path
 import numpy as np
+from bosque_compilado import BosqueCompilado, guardar_artefacto, hash_arreglos, metadatos_modelo
+from dataset_columnar import leer_dataframe
+from raster_riesgo import reconstruir as reconstruir_raster
 
-# 1) Cargar el dataset procesado con coordenadas y valores numéricos
-print("🔄 Cargando dataset procesado...")
-df = pd.read_csv("dataset_procesado.csv")
-
-print("📊 Primeras filas del dataset:")
-print(df.head())
-print(f"\n📈 Dataset: {len(df)} ubicaciones únicas")
-print(f"📍 Rango de coordenadas:")
-print(f"   • Latitud: {df['latitud'].min():.6f} a {df['latitud'].max():.6f}")
-print(f"   • Longitud: {df['longitud'].min():.6f} a {df['longitud'].max():.6f}")
-print(f"⚡ Rango de riesgo: {df['riesgo_zona_score'].min():.1f} a {df['riesgo_zona_score'].max():.1f}")
-
-print(f"\n🎯 Distribución por nivel de riesgo de zona:")
-print(df['nivel_riesgo_zona'].value_counts())
-
-# 2) Definir características (X) y etiqueta objetivo (y)
-# ENTRADA: [latitud, longitud] -> SALIDA: riesgo_zona_score
-X = df[["latitud", "longitud"]]
-y = df["riesgo_zona_score"]
-
-print(f"\n🧠 Configuración del modelo:")
-print(f"   • Entradas: {list(X.columns)}")
-print(f"   • Salida: riesgo_zona_score (continuo)")
-print(f"   • Algoritmo: Random Forest Regressor")
-
-# 3) Dividir en conjunto de entrenamiento y prueba
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42
-)
-
-# 4) Crear y entrenar el modelo Random Forest Regressor
-print(f"\n🚀 Entrenando modelo...")
-modelo = RandomForestRegressor(
-    n_estimators=100,
-    random_state=42,
-    max_depth=10
-)
-modelo.fit(X_train, y_train)
-
-# 5) Evaluar el modelo
-y_pred = modelo.predict(X_test)
-
-print(f"\n📊 Evaluación del modelo:")
-mse = mean_squared_error(y_test, y_pred)
-r2 = r2_score(y_test, y_pred)
-print(f"   • Error cuadrático medio: {mse:.2f}")
-print(f"   • R² Score: {r2:.3f}")
-print(f"   • Error promedio: ±{np.sqrt(mse):.2f} puntos de riesgo")
-
-# 6) Mostrar importancia de características
-feature_importance = modelo.feature_importances_
-print(f"\n🎯 Importancia de características:")
-for i, feature in enumerate(X.columns):
-    print(f"   • {feature}: {feature_importance[i]:.3f}")
-
-# 7) Visualizar predicciones vs reales
-plt.figure(figsize=(10, 6))
-plt.scatter(y_test, y_pred, alpha=0.6)
-plt.plot([y_test.min(), y_test.max()], [y_test.min(), y_test.max()], 'r--', lw=2)
-plt.xlabel('Riesgo Real')
-plt.ylabel('Riesgo Predicho')
-plt.title('Predicciones vs Valores Reales - Riesgo de Zona')
-plt.grid(True, alpha=0.3)
-plt.show()
-
-# 8) Guardar el modelo entrenado
 try:
     # Si estamos ejecutando el archivo directamente
     script_dir = Path(__file__).resolve().parent
-    model_path = script_dir / "modelo_predictivo.pkl"
 except NameError:
     # Si estamos ejecutando desde un snippet (sin __file__)
-    model_path = Path("modelo_predictivo.pkl")
+    script_dir = Path(".")
+dataset_path = script_dir / "dataset_procesado.csv"
+model_path = script_dir / "modelo_predictivo.pkl"
+grafica_path = script_dir / "graficas" / "predicciones_vs_reales.png"
+
+# Hiperparámetros del Random Forest
+N_ARBOLES = 100
+PROFUNDIDAD_MAXIMA = 10
+SEMILLA = 42
+
+# Procesos de joblib al entrenar (-1 = todos los núcleos; el modelo guardado queda con n_jobs=None)
+N_JOBS = -1
+
+# Entrenamiento incremental: árboles que se reemplazan como mínimo y fracción de filas
+# cambiadas a partir de la cual se reentrena completo (reemplazaría casi todo el bosque)
+MIN_ARBOLES_INCREMENTAL = 5
+MAX_FRACCION_CAMBIOS = 0.5
+
+# Una fila del dataset para el modo incremental (cambia si cambia cualquiera de estas)
+CLAVES_FILA = ['latitud', 'longitud', 'riesgo_zona_score']
+
+# Modelo sustituto: un solo árbol de decisión destilado de las predicciones del bosque
+# (ver destilar, solo con --sustituto). Con profundidad 12 y hasta 1024 hojas tiene
+# 2047 nodos (~58 KB, 1/5 del bosque), coincide en ~99.6 % de las clases y un punto
+# cuesta ~1.5 µs en vez de ~55 µs. Sin límite de hojas a profundidad 14 llega a
+# ~99.8 %, pero con ~10 mil nodos ya ocupa lo mismo que el bosque (ver README)
+PROFUNDIDAD_SUSTITUTO = 12
+HOJAS_SUSTITUTO = 1024
+MUESTRAS_SUSTITUTO = 150_000
+DISPERSION_SUSTITUTO = 0.003  # grados (≈ 300 m) alrededor de las ubicaciones del dataset
+
+
+def cargar_dataset(ruta=dataset_path):
+    """
+    Carga el dataset procesado con coordenadas y valores numéricos
+    (del .npz columnar si existe, si no del CSV) y muestra un resumen.
+
+    Returns:
+        pd.DataFrame: Dataset procesado
+    """
+    print("🔄 Cargando dataset procesado...")
+    df, origen_dataset = leer_dataframe(ruta)
+    print(f"📂 Leído de: {origen_dataset}")
+
+    print("📊 Primeras filas del dataset:")
+    print(df.head())
+    print(f"\n📈 Dataset: {len(df)} ubicaciones únicas")
+    print(f"📍 Rango de coordenadas:")
+    print(f"   • Latitud: {df['latitud'].min():.6f} a {df['latitud'].max():.6f}")
+    print(f"   • Longitud: {df['longitud'].min():.6f} a {df['longitud'].max():.6f}")
+    print(f"⚡ Rango de riesgo: {df['riesgo_zona_score'].min():.1f} a {df['riesgo_zona_score'].max():.1f}")
+
+    print(f"\n🎯 Distribución por nivel de riesgo de zona:")
+    print(df['nivel_riesgo_zona'].value_counts())
+    return df
+
+
+def dividir(df):
+    """
+    Características (X) y etiqueta (y) separadas en entrenamiento y prueba.
+    ENTRADA: [latitud, longitud] -> SALIDA: riesgo_zona_score
+
+    Returns:
+        tuple: X_train, X_test, y_train, y_test
+    """
+    X = df[["latitud", "longitud"]]
+    y = df["riesgo_zona_score"]
+    return train_test_split(X, y, test_size=0.2, random_state=SEMILLA)
+
+
+def crear_modelo(n_estimators=N_ARBOLES, max_depth=PROFUNDIDAD_MAXIMA, **parametros):
+    return RandomForestRegressor(
+        n_estimators=n_estimators,
+        random_state=SEMILLA,
+        max_depth=max_depth,
+        **parametros
+    )
+
+
+def ajustar(modelo, X, y, n_jobs=N_JOBS):
+    """Entrena con `n_jobs` procesos y deja el modelo con n_jobs=None (el resultado no cambia)"""
+    modelo.set_params(n_jobs=n_jobs)
+    modelo.fit(X, y)
+    modelo.set_params(n_jobs=None)
+    return modelo
+
+
+def evaluar(modelo, X, y):
+    """
+    Returns:
+        dict: mse, rmse y r2 del modelo sobre (X, y)
+    """
+    y_pred = modelo.predict(X)
+    mse = mean_squared_error(y, y_pred)
+    return {'mse': mse, 'rmse': float(np.sqrt(mse)), 'r2': r2_score(y, y_pred) if len(y) > 1 else float('nan')}
+
+
+def ruta_filas_entrenadas(ruta_modelo=model_path):
+    """modelo_predictivo.pkl → modelo_predictivo_filas.npz (filas con las que se entrenó)"""
+    ruta_modelo = Path(ruta_modelo)
+    return ruta_modelo.with_name(f"{ruta_modelo.stem}_filas.npz")
+
+
+def guardar_filas_entrenadas(df, ruta, refrescos=0, vistas=None):
+    """
+    Guarda las filas (latitud, longitud, score) del dataset con el que se entrenó
+    el modelo, para que el modo incremental sepa qué cambió después, y cuáles
+    vio algún árbol (para evaluar solo con filas que ningún árbol conoce).
+
+    Args:
+        df (pd.DataFrame): Dataset de entrenamiento
+        ruta (str | Path): Archivo .npz
+        refrescos (int): Entrenamientos incrementales desde el último completo
+        vistas (np.ndarray, opcional): Filas de `df` que vieron los árboles que se
+            conservan de entrenamientos anteriores
+    """
+    entrenada = df.index.isin(dividir(df)[0].index)
+    if vistas is not None:
+        entrenada |= vistas
+    np.savez(Path(ruta),
+             latitud=df['latitud'].to_numpy(np.float64),
+             longitud=df['longitud'].to_numpy(np.float64),
+             riesgo_zona_score=df['riesgo_zona_score'].to_numpy(np.float64),
+             entrenada=entrenada,
+             refrescos=np.int64(refrescos))
+
+
+def filas_cambiadas(df, ruta_filas):
+    """
+    Compara el dataset actual con las filas con que se entrenó el modelo.
+
+    Returns:
+        tuple: (máscara de filas de `df` nuevas o con score distinto, número de
+            coordenadas que ya no están, máscara de filas de `df` que ya vio algún
+            árbol, refrescos incrementales previos)
+    """
+    with np.load(Path(ruta_filas)) as datos:
+        anteriores = pd.DataFrame({c: datos[c] for c in CLAVES_FILA})
+        entrenada = datos['entrenada']
+        refrescos = int(datos['refrescos'])
+    actuales = df[CLAVES_FILA]
+    nuevas = ~_filas_en(actuales, anteriores)
+    eliminadas = int((~_filas_en(anteriores[['latitud', 'longitud']], actuales[['latitud', 'longitud']])).sum())
+    vistas = _filas_en(actuales, anteriores[entrenada])
+    return nuevas, eliminadas, vistas, refrescos
+
+
+def _filas_en(a, b):
+    """Máscara de las filas de `a` que también están en `b`"""
+    cruce = a.merge(b.drop_duplicates(), on=list(a.columns), how='left', indicator=True)
+    return (cruce['_merge'] == 'both').to_numpy()
+
+
+def arboles_a_reemplazar(n_cambios, n_filas, n_arboles=N_ARBOLES):
+    """
+    Árboles que se reentrenan en un refresco incremental: proporcional a la
+    fracción de filas cambiadas, con un mínimo de MIN_ARBOLES_INCREMENTAL.
+    """
+    if n_cambios == 0:
+        return 0
+    return min(n_arboles, max(MIN_ARBOLES_INCREMENTAL, math.ceil(n_arboles * n_cambios / max(n_filas, 1))))
+
+
+def entrenar_incremental(modelo, X_train, y_train, n_nuevos, semilla):
+    """
+    Crece `n_nuevos` árboles con warm_start sobre los datos actuales y descarta
+    los `n_nuevos` más antiguos: el bosque conserva su tamaño y el costo es
+    proporcional a los árboles reemplazados, no al bosque completo.
+
+    Args:
+        modelo (RandomForestRegressor): Modelo entrenado (se modifica)
+        X_train, y_train: Datos de entrenamiento actuales
+        n_nuevos (int): Árboles a reemplazar
+        semilla (int): Semilla de los árboles nuevos (distinta en cada refresco)
+
+    Returns:
+        RandomForestRegressor: El mismo modelo actualizado
+    """
+    n_arboles = len(modelo.estimators_)
+    modelo.set_params(warm_start=True, n_estimators=n_arboles + n_nuevos, random_state=semilla)
+    ajustar(modelo, X_train, y_train)
+    modelo.estimators_ = modelo.estimators_[n_nuevos:]
+    modelo.set_params(warm_start=False, n_estimators=n_arboles)
+    return modelo
+
+
+def ruta_raster(ruta_modelo=model_path):
+    """modelo_predictivo.pkl → raster_riesgo.npz en la misma carpeta (lo genera raster_riesgo.py)"""
+    return Path(ruta_modelo).with_name("raster_riesgo.npz")
+
+
+def guardar_modelo(modelo, df, ruta_modelo=model_path, ruta_dataset=dataset_path, refrescos=0, vistas=None):
+    """
+    Guarda el .pkl, el artefacto binario y las filas de entrenamiento (ver
+    guardar_filas_entrenadas). Si ya hay un raster junto al modelo, lo vuelve a
+    construir con el modelo nuevo (Realtime.py ignora uno de otro modelo).
+    """
+    dump(modelo, ruta_modelo)
+    print(f"\n💾 Modelo guardado como: '{Path(ruta_modelo).name}'")
+
+    # Guardar también el artefacto binario mapeable en memoria (lo prefiere Realtime.py:
+    # los workers del servidor comparten una sola copia y arrancan sin deserializar)
+    artefacto_path = Path(ruta_modelo).with_suffix(".bin")
+    bosque = BosqueCompilado.desde_modelo(modelo, listas=False)
+    guardar_artefacto(bosque, artefacto_path, metadatos_modelo(modelo, ruta_dataset, ruta_modelo=ruta_modelo))
+    print(f"💾 Artefacto binario guardado como: '{artefacto_path.name}'")
+
+    raster_path = ruta_raster(ruta_modelo)
+    if raster_path.exists():
+        t0 = time.perf_counter()
+        raster = reconstruir_raster(
+            raster_path, lambda lat, lon: modelo.predict(pd.DataFrame({'latitud': lat, 'longitud': lon})),
+            hash_arreglos(bosque))
+        print(f"🗺️ Raster reconstruido con el modelo nuevo: '{raster_path.name}' "
+              f"({raster.valores.shape[0]} × {raster.valores.shape[1]} nodos, {time.perf_counter() - t0:.1f} s)")
+
+    guardar_filas_entrenadas(df, ruta_filas_entrenadas(ruta_modelo), refrescos, vistas)
+
+
+def ruta_sustituto(ruta_modelo=model_path):
+    """modelo_predictivo.pkl → modelo_predictivo_sustituto.bin (árbol destilado)"""
+    ruta_modelo = Path(ruta_modelo)
+    return ruta_modelo.with_name(f"{ruta_modelo.stem}_sustituto.bin")
+
+
+def muestras_destilacion(df, n, semilla, ubicaciones=True):
+    """
+    Coordenadas donde se consulta el bosque para destilarlo: `n` uniformes en la
+    caja de CDMX (unida al rango del dataset), `n` cerca de ubicaciones del
+    dataset, donde el bosque tiene más detalle, y opcionalmente las ubicaciones.
+
+    Returns:
+        pd.DataFrame: Columnas latitud y longitud
+    """
+    from Realtime import LAT_MIN, LAT_MAX, LON_MIN, LON_MAX
+
+    rng = np.random.default_rng(semilla)
+    latitudes, longitudes = df['latitud'].to_numpy(), df['longitud'].to_numpy()
+    uniformes = np.column_stack([
+        rng.uniform(min(LAT_MIN, latitudes.min()), max(LAT_MAX, latitudes.max()), n),
+        rng.uniform(min(LON_MIN, longitudes.min()), max(LON_MAX, longitudes.max()), n),
+    ])
+    cercanas = np.column_stack([latitudes, longitudes])[rng.integers(0, len(df), n)]
+    cercanas += rng.normal(0, DISPERSION_SUSTITUTO, cercanas.shape)
+    partes = [uniformes, cercanas] + ([np.column_stack([latitudes, longitudes])] if ubicaciones else [])
+    return pd.DataFrame(np.vstack(partes), columns=['latitud', 'longitud'])
+
+
+def concordancia_clases(scores_bosque, scores_sustituto):
+    """
+    Qué tanto coinciden las clases BAJO/MEDIO/ALTO (clasificar_riesgo_zona) del
+    sustituto con las del bosque.
+
+    Returns:
+        dict: total (fracción de puntos con la misma clase), por_clase (fracción
+            por clase del bosque), mae y error_max del score
+    """
+    from Realtime import NIVELES_RIESGO, clasificar_riesgo_zona_lote
+
+    clases_bosque = clasificar_riesgo_zona_lote(scores_bosque)
+    iguales = clases_bosque == clasificar_riesgo_zona_lote(scores_sustituto)
+    diferencia = np.abs(np.asarray(scores_bosque) - np.asarray(scores_sustituto))
+    return {
+        'total': float(iguales.mean()),
+        'por_clase': {str(nivel): float(iguales[clases_bosque == i].mean())
+                      for i, nivel in enumerate(NIVELES_RIESGO) if (clases_bosque == i).any()},
+        'mae': float(diferencia.mean()),
+        'error_max': float(diferencia.max()),
+    }
+
+
+def destilar(modelo, df, profundidad=PROFUNDIDAD_SUSTITUTO, muestras=MUESTRAS_SUSTITUTO,
+             hojas=HOJAS_SUSTITUTO):
+    """
+    Entrena un árbol de decisión que imita al bosque: se ajusta a las
+    predicciones del bosque sobre muestras densas (muestras_destilacion) y se
+    evalúa con otras muestras que no vio.
+
+    Args:
+        modelo (RandomForestRegressor): Bosque entrenado
+        df (pd.DataFrame): Dataset procesado
+        profundidad (int): Profundidad máxima del árbol
+        muestras (int): Puntos uniformes (y otros tantos cercanos al dataset) para entrenar
+        hojas (int, opcional): Hojas máximas del árbol (None = sin límite)
+
+    Returns:
+        tuple: (DecisionTreeRegressor, concordancia_clases sobre las muestras de evaluación)
+    """
+    X = muestras_destilacion(df, muestras, SEMILLA)
+    arbol = DecisionTreeRegressor(max_depth=profundidad, max_leaf_nodes=hojas,
+                                  random_state=SEMILLA).fit(X, modelo.predict(X))
+    X_eval = muestras_destilacion(df, max(muestras // 3, 1), SEMILLA + 1, ubicaciones=False)
+    return arbol, concordancia_clases(modelo.predict(X_eval), arbol.predict(X_eval))
+
+
+def guardar_sustituto(modelo, df, ruta_modelo=model_path, ruta_dataset=dataset_path):
+    """
+    Destila el modelo, reporta la concordancia de clases y guarda el árbol como
+    artefacto binario. Los metadatos llevan la concordancia y el hash de los
+    arreglos del bosque del que se destiló (hash_arreglos): Realtime.py solo lo
+    usa con ese mismo bosque, no con otro entrenado sobre el mismo dataset.
+
+    Returns:
+        dict: concordancia_clases del sustituto
+    """
+    print(f"\n🧪 Destilando modelo sustituto (árbol de profundidad {PROFUNDIDAD_SUSTITUTO}, "
+          f"hasta {HOJAS_SUSTITUTO} hojas)...")
+    inicio = time.perf_counter()
+    arbol, concordancia = destilar(modelo, df)
+    bosque = BosqueCompilado.desde_modelo(modelo, listas=False)
+    print(f"   • {arbol.tree_.node_count} nodos (el bosque tiene {len(bosque.umbral)}) "
+          f"en {time.perf_counter() - inicio:.1f} s")
+    print(f"   • Misma clase que el bosque: {concordancia['total']:.2%} "
+          f"({', '.join(f'{nivel} {valor:.2%}' for nivel, valor in concordancia['por_clase'].items())})")
+    print(f"   • Diferencia de score: media {concordancia['mae']:.3f} | máx {concordancia['error_max']:.2f}")
+
+    metadatos = metadatos_modelo(arbol, ruta_dataset)
+    metadatos['destilado_de'] = hash_arreglos(bosque)
+    metadatos['concordancia'] = concordancia
+    ruta = ruta_sustituto(ruta_modelo)
+    guardar_artefacto(BosqueCompilado.desde_modelo(arbol, listas=False), ruta, metadatos)
+    print(f"💾 Sustituto guardado como: '{ruta.name}' ({ruta.stat().st_size:,} bytes)")
+    return concordancia
+
+
+def entrenar_completo(df, grafica=grafica_path, mostrar_grafica=False):
+    """
+    Entrena el Random Forest desde cero y lo evalúa.
+
+    Args:
+        df (pd.DataFrame): Dataset procesado
+        grafica (str | Path | None): PNG donde guardar predicciones vs reales (None = no se grafica)
+        mostrar_grafica (bool): Además abrir la ventana de la gráfica (requiere pantalla)
+
+    Returns:
+        tuple: (modelo, métricas de prueba)
+    """
+    X_train, X_test, y_train, y_test = dividir(df)
+
+    print(f"\n🧠 Configuración del modelo:")
+    print(f"   • Entradas: {list(X_train.columns)}")
+    print(f"   • Salida: riesgo_zona_score (continuo)")
+    print(f"   • Algoritmo: Random Forest Regressor")
+
+    print(f"\n🚀 Entrenando modelo...")
+    modelo = ajustar(crear_modelo(), X_train, y_train)
+
+    metricas = evaluar(modelo, X_test, y_test)
+    print(f"\n📊 Evaluación del modelo:")
+    print(f"   • Error cuadrático medio: {metricas['mse']:.2f}")
+    print(f"   • R² Score: {metricas['r2']:.3f}")
+    print(f"   • Error promedio: ±{metricas['rmse']:.2f} puntos de riesgo")
+
+    # Importancia de características
+    print(f"\n🎯 Importancia de características:")
+    for feature, importancia in zip(X_train.columns, modelo.feature_importances_):
+        print(f"   • {feature}: {importancia:.3f}")
+
+    if grafica is not None or mostrar_grafica:
+        graficar_predicciones(y_test, modelo.predict(X_test), grafica, mostrar_grafica)
+    return modelo, metricas
+
+
+def graficar_predicciones(y_test, y_pred, ruta=grafica_path, mostrar=False):
+    """Visualizar predicciones vs reales: se guarda como PNG (sin pantalla, backend Agg)"""
+    import matplotlib
+    if not mostrar:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10, 6))
+    plt.scatter(y_test, y_pred, alpha=0.6)
+    plt.plot([y_test.min(), y_test.max()], [y_test.min(), y_test.max()], 'r--', lw=2)
+    plt.xlabel('Riesgo Real')
+    plt.ylabel('Riesgo Predicho')
+    plt.title('Predicciones vs Valores Reales - Riesgo de Zona')
+    plt.grid(True, alpha=0.3)
+    if ruta is not None:
+        Path(ruta).parent.mkdir(parents=True, exist_ok=True)
+        plt.savefig(ruta, dpi=120, bbox_inches='tight')
+        print(f"🖼️  Gráfica guardada como: {ruta}")
+    if mostrar:
+        plt.show()
+    plt.close()
+
+
+def refrescar(df, ruta_modelo=model_path, n_arboles=None, comparar=True):
+    """
+    Entrenamiento incremental tras un levantamiento: detecta las filas nuevas o
+    cambiadas respecto al último entrenamiento y reemplaza solo una parte de
+    los árboles (ver entrenar_incremental).
+
+    La evaluación usa las filas de prueba que ningún árbol del modelo vio (al
+    agregar o quitar filas la partición cambia y los árboles viejos conocen
+    parte de la prueba nueva); con `comparar` se reentrena desde cero para
+    reportar la diferencia sobre esas mismas filas.
+
+    Args:
+        df (pd.DataFrame): Dataset actual
+        ruta_modelo (str | Path): Modelo entrenado (.pkl)
+        n_arboles (int, opcional): Árboles a reemplazar (por defecto según los cambios)
+        comparar (bool): Entrenar también desde cero para reportar la diferencia
+
+    Returns:
+        dict | None: modelo, cambios, árboles reemplazados, tiempos y métricas;
+            None si hace falta un entrenamiento completo
+    """
+    ruta_filas = ruta_filas_entrenadas(ruta_modelo)
+    if not Path(ruta_modelo).exists() or not ruta_filas.exists():
+        print(f"⚠️ No hay modelo o no se sabe con qué filas se entrenó ({ruta_filas.name}); "
+              f"se entrena completo")
+        return None
+
+    nuevas, eliminadas, vistas, refrescos = filas_cambiadas(df, ruta_filas)
+    cambios = int(nuevas.sum()) + eliminadas
+    print(f"\n🔍 Cambios desde el último entrenamiento: {int(nuevas.sum())} filas nuevas o cambiadas, "
+          f"{eliminadas} eliminadas")
+    if n_arboles is None and cambios > MAX_FRACCION_CAMBIOS * len(df):
+        print(f"⚠️ Cambió más del {MAX_FRACCION_CAMBIOS:.0%} del dataset; se entrena completo")
+        return None
+
+    modelo = load(ruta_modelo)
+    n_nuevos = n_arboles if n_arboles is not None else arboles_a_reemplazar(cambios, len(df), len(modelo.estimators_))
+    resultado = {'modelo': modelo, 'nuevas': int(nuevas.sum()), 'eliminadas': eliminadas,
+                 'arboles_reemplazados': n_nuevos, 'refrescos': refrescos, 'vistas': vistas}
+    if n_nuevos == 0:
+        print("✅ Sin cambios: el modelo ya está al día")
+        return resultado
+
+    X_train, X_test, y_train, y_test = dividir(df)
+    print(f"🌲 Reemplazando {n_nuevos} de {len(modelo.estimators_)} árboles...")
+    inicio = time.perf_counter()
+    entrenar_incremental(modelo, X_train, y_train, n_nuevos, SEMILLA + refrescos + 1)
+    resultado['segundos'] = time.perf_counter() - inicio
+    resultado['refrescos'] = refrescos + 1
+
+    no_vistas = ~pd.Series(vistas, index=df.index).loc[X_test.index].to_numpy()
+    evaluacion = {'prueba': (X_test[no_vistas], y_test[no_vistas]),
+                  'nuevas': (df.loc[nuevas, ['latitud', 'longitud']], df.loc[nuevas, 'riesgo_zona_score'])}
+    evaluacion = {nombre: datos for nombre, datos in evaluacion.items() if len(datos[1])}
+    resultado['metricas'] = {nombre: evaluar(modelo, *datos) for nombre, datos in evaluacion.items()}
+
+    print(f"\n📊 Modelo incremental: {resultado['segundos']:.2f} s")
+    if comparar:
+        inicio = time.perf_counter()
+        completo = ajustar(crear_modelo(), X_train, y_train)
+        resultado['segundos_completo'] = time.perf_counter() - inicio
+        resultado['metricas_completo'] = {nombre: evaluar(completo, *datos) for nombre, datos in evaluacion.items()}
+        print(f"⚖️  Reentrenar completo: {resultado['segundos_completo']:.2f} s "
+              f"(×{resultado['segundos_completo'] / max(resultado['segundos'], 1e-9):.1f})")
+    for nombre, (_, y) in evaluacion.items():
+        incremental = resultado['metricas'][nombre]
+        linea = f"   • {'Prueba no vista' if nombre == 'prueba' else 'Filas nuevas'} ({len(y)} filas): " \
+                f"incremental ±{incremental['rmse']:.2f}"
+        if comparar:
+            completo = resultado['metricas_completo'][nombre]
+            linea += f" | completo ±{completo['rmse']:.2f} (Δ {incremental['rmse'] - completo['rmse']:+.2f})"
+        print(linea)
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entrena el modelo de riesgo de zona")
+    parser.add_argument("--dataset", default=str(dataset_path))
+    parser.add_argument("--modelo", default=str(model_path), help="Modelo .pkl de salida")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Solo reentrenar los árboles necesarios según las filas nuevas o cambiadas")
+    parser.add_argument("--arboles", type=int,
+                        help="Con --incremental: árboles a reemplazar (por defecto según los cambios)")
+    parser.add_argument("--sin-comparar", action="store_true",
+                        help="Con --incremental: no entrenar desde cero para reportar la diferencia")
+    parser.add_argument("--grafica", default=str(grafica_path), help="PNG de predicciones vs reales")
+    parser.add_argument("--sin-grafica", action="store_true", help="No generar la gráfica de predicciones")
+    parser.add_argument("--mostrar-grafica", action="store_true",
+                        help="Además abrir la ventana de la gráfica (requiere pantalla)")
+    parser.add_argument("--sustituto", action="store_true",
+                        help="Además destilar el modelo sustituto (árbol único para Realtime.py)")
+    args = parser.parse_args()
+
+    df = cargar_dataset(args.dataset)
+
+    resultado = None
+    if args.incremental:
+        resultado = refrescar(df, args.modelo, args.arboles, comparar=not args.sin_comparar)
+        if resultado is not None and resultado['arboles_reemplazados'] == 0:
+            return
+    if resultado is None:
+        modelo, _ = entrenar_completo(df, None if args.sin_grafica else args.grafica,
+                                      mostrar_grafica=args.mostrar_grafica)
+        guardar_modelo(modelo, df, args.modelo, args.dataset)
+    else:
+        modelo = resultado['modelo']
+        guardar_modelo(modelo, df, args.modelo, args.dataset, resultado['refrescos'], resultado['vistas'])
+    if args.sustituto:
+        guardar_sustituto(modelo, df, args.modelo, args.dataset)
+
+    print(f"\n✅ Modelo entrenado y guardado exitosamente!")
+    print(f"🔄 Para usar el modelo, ejecuta: python3 Realtime.py")
+    print(f"🌐 Para el servidor web, ejecuta: python3 Flask_Server.py")
 
-dump(modelo, model_path)
-print(f"\n💾 Modelo guardado como: 'modelo_predictivo.pkl'")
 
-print(f"\n✅ Modelo entrenado y guardado exitosamente!")
-print(f"🔄 Para usar el modelo, ejecuta: python3 Realtime.py")
-print(f"🌐 Para el servidor web, ejecuta: python3 Flask_Server.py")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
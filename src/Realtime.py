@@ -1,18 +1,380 @@
-from joblib import load
-import pandas as pd
+import hashlib
+import logging
+import threading
+import time
 from pathlib import Path
 
-# 1) Cargar el modelo ya entrenado
+import numpy as np
+
+import metricas
+from bosque_compilado import BosqueCompilado, cargar_artefacto, hash_archivo, hash_arreglos
+from cache_zonas import MAX_ENTRADAS, PRECISION, CacheZonas
+from dataset_columnar import leer_columnas
+from indice_espacial import IndiceEspacial
+from micro_lotes import MAX_LOTE, PlanificadorMicroLotes
+from raster_riesgo import RasterRiesgo
+from registro_sensores import RegistroSensores
+
+logger = logging.getLogger(__name__)
+
+# Archivos del modelo y los datos. Importar este módulo no carga nada: el modelo,
+# el dataset y el raster se cargan la primera vez que se necesitan (obtener_predictor)
+# o al llamar calentar() durante el arranque del servidor.
 script_dir = Path(__file__).resolve().parent
 model_path = script_dir / "modelo_predictivo.pkl"
+artefacto_path = script_dir / "modelo_predictivo.bin"
+# Si existe dataset_procesado.npz (columnar, lo genera procesar_dataset.py) se lee ese
+dataset_path = script_dir / "dataset_procesado.csv"
+# Raster precalculado del modelo sobre la caja de CDMX (opcional).
+# Se genera con: python3 raster_riesgo.py --paso 0.0005
+raster_path = script_dir / "raster_riesgo.npz"
+# Modelo sustituto: un árbol destilado del bosque (lo genera Modelo.py --sustituto)
+sustituto_path = script_dir / "modelo_predictivo_sustituto.bin"
+
+# Rangos aproximados de CDMX basados en el dataset
+LAT_MIN, LAT_MAX = 19.35, 19.65
+LON_MIN, LON_MAX = -99.35, -98.95
+
+INTERPOLAR_RASTER = False  # True: interpolación bilineal, False: nodo más cercano
+
+# A partir de este tamaño de lote conviene el recorrido en C de sklearn
+LOTE_MINIMO_SKLEARN = 1024
+
+# Micro-lotes: con muchos hilos concurrentes, las predicciones de un punto que
+# caen al modelo se agrupan en una sola llamada (ver configurar_micro_lotes).
+# None = desactivado; si no, {'ventana_s': float, 'max_lote': int}
+MICRO_LOTES = None
+
+# El sustituto reemplaza al bosque si su concordancia de clases BAJO/MEDIO/ALTO con
+# el bosque (medida por Modelo.py) es al menos este umbral, p. ej. 0.99.
+# None = siempre el bosque (ver configurar_sustituto)
+SUSTITUTO_MIN_CONCORDANCIA = None
+
+# Caché LRU de obtener_riesgo_zona por coordenadas cuantizadas (ver configurar_cache_zonas).
+# None = desactivada
+_cache_zonas = None
+
+
+def _huella_archivo(ruta):
+    ruta = Path(ruta)
+    if not ruta.exists():
+        return "-"
+    estado = ruta.stat()
+    return f"{ruta.name}:{estado.st_size}:{estado.st_mtime_ns}"
+
+def huella_en_disco(artefacto=artefacto_path, modelo=model_path, dataset=dataset_path, raster=raster_path,
+                    sustituto=sustituto_path):
+    """Huella (tamaño y fecha) de todos los archivos de los que puede cargarse un predictor"""
+    rutas = (artefacto, modelo, dataset, Path(dataset).with_suffix(".npz"), raster, sustituto)
+    return "|".join(_huella_archivo(r) for r in rutas)
+
+def cargar_sustituto(ruta, bosque, min_concordancia):
+    """
+    Carga el árbol sustituto si fue destilado de `bosque` (mismo hash_arreglos:
+    mismos árboles, no solo mismo dataset) y su concordancia de clases alcanza
+    `min_concordancia`.
+    
+    Returns:
+        BosqueCompilado | None: Sustituto (en listas, es pequeño) o None si no aplica
+    """
+    ruta = Path(ruta)
+    if min_concordancia is None or not ruta.exists():
+        return None
+    sustituto = cargar_artefacto(ruta, listas=True)
+    origen = sustituto.metadatos.get('destilado_de')
+    concordancia = sustituto.metadatos.get('concordancia', {}).get('total', 0.0)
+    if origen is None or origen != hash_arreglos(bosque):
+        logger.warning(f"⚠️ {ruta.name} no se destiló de este modelo; se usa el bosque "
+                       f"(vuelve a ejecutar: python3 Modelo.py --sustituto)")
+        return None
+    if concordancia < min_concordancia:
+        logger.warning(f"⚠️ El sustituto coincide en {concordancia:.2%} de las clases "
+                       f"(< {min_concordancia:.2%}); se usa el bosque")
+        return None
+    return sustituto
+
+
+def cargar_raster(ruta, bosque):
+    """
+    Carga el raster si se construyó con `bosque` (mismo hash_arreglos); uno de
+    otro modelo daría scores distintos a los del modelo cargado.
+    
+    Returns:
+        RasterRiesgo | None: Raster o None si no existe o no aplica
+    """
+    ruta = Path(ruta)
+    if not ruta.exists():
+        return None
+    raster = RasterRiesgo.cargar(ruta)
+    if raster.modelo is None or raster.modelo != hash_arreglos(bosque):
+        logger.warning(f"⚠️ {ruta.name} no se construyó con este modelo; se usa el modelo "
+                       f"(vuelve a generarlo: python3 raster_riesgo.py)")
+        return None
+    return raster
+
+
+class PredictorRiesgo:
+    """
+    Modelo, dataset indexado y raster de una misma versión, cargados juntos.
+    
+    Todas las fuentes del score de zona (dataset → raster → modelo) viven en
+    este objeto, así que cambiar de versión es reemplazar una sola referencia.
+    Con sustituto, el paso "modelo" lo calcula el árbol destilado en vez del bosque.
+    """
+    
+    def __init__(self, bosque, indice_dataset, raster=None, version="", ruta_modelo_sklearn=None,
+                 sustituto=None):
+        """
+        Args:
+            bosque (BosqueCompilado): Modelo de riesgo de zona
+            indice_dataset (IndiceEspacial): Coincidencias exactas del dataset procesado
+            raster (RasterRiesgo, opcional): Raster precalculado sobre CDMX
+            version (str): Identificador de la versión de modelo + datos
+            ruta_modelo_sklearn (Path, opcional): .pkl para lotes muy grandes
+            sustituto (BosqueCompilado, opcional): Árbol destilado que reemplaza al bosque
+        """
+        self.bosque = bosque
+        self.sustituto = sustituto
+        self.modelo_zona = sustituto if sustituto is not None else bosque
+        self.fuente_modelo = "sustituto" if sustituto is not None else "modelo"
+        self.indice_dataset = indice_dataset
+        self.raster = raster
+        self.version = version
+        self.ruta_modelo_sklearn = ruta_modelo_sklearn
+        self.tiempo_carga_s = None
+        self.huella_archivos = None
+        self.planificador = None
+        self._modelo_sklearn = None
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def cargar(cls, artefacto=artefacto_path, modelo=model_path, dataset=dataset_path, raster=raster_path,
+               sustituto=sustituto_path):
+        """
+        Carga el modelo (se prefiere el artefacto binario que genera Modelo.py:
+        np.memmap de solo lectura, sin deserializar), el dataset, el raster y,
+        si SUSTITUTO_MIN_CONCORDANCIA lo permite, el sustituto (cargar_sustituto).
+        
+        El artefacto solo se usa si se exportó del .pkl que está junto a él
+        (mismo hash_pkl); si no, se compila el .pkl, que es el que usan los
+        lotes grandes (riesgo_zona_lote), para que ambos caminos den lo mismo.
+        
+        Raises:
+            FileNotFoundError: Si no existe ni el artefacto ni el .pkl
+        """
+        t0 = time.perf_counter()
+        artefacto, modelo = Path(artefacto), Path(modelo)
+        # Antes de leer: si un archivo cambia durante la carga, la vigilancia lo vuelve a cargar
+        huella_archivos = huella_en_disco(artefacto, modelo, dataset, raster, sustituto)
+        
+        bosque = None
+        hash_pkl = hash_archivo(modelo) if modelo.exists() else None
+        if artefacto.exists():
+            bosque = cargar_artefacto(artefacto)
+            origen = artefacto
+            if hash_pkl is None:
+                hash_pkl = bosque.metadatos.get('hash_pkl')
+            elif bosque.metadatos.get('hash_pkl') != hash_pkl:
+                logger.warning(f"⚠️ {artefacto.name} no se exportó de {modelo.name}; se usa el .pkl "
+                               f"(vuelve a exportar: python3 bosque_compilado.py exportar)")
+                bosque = None
+        if bosque is None and modelo.exists():
+            from joblib import load
+            bosque = BosqueCompilado.desde_modelo(load(modelo))
+            origen = modelo
+        if bosque is None:
+            raise FileNotFoundError(
+                f"No se encontró '{modelo.name}' ni '{artefacto.name}'. Ejecuta primero: python3 Modelo.py")
+        
+        # Dataset procesado en un índice espacial en memoria (una sola lectura, del .npz si existe)
+        columnas, origen_dataset = leer_columnas(dataset, ['latitud', 'longitud', 'riesgo_zona_score'])
+        indice_dataset = IndiceEspacial(columnas['latitud'], columnas['longitud'], columnas['riesgo_zona_score'])
+        raster_zona = cargar_raster(raster, bosque)
+        sustituto_zona = cargar_sustituto(sustituto, bosque, SUSTITUTO_MIN_CONCORDANCIA)
+        
+        fuentes = ((origen, origen_dataset) + ((raster,) if raster_zona is not None else ())
+                   + ((sustituto,) if sustituto_zona is not None else ()))
+        huella = "|".join([_huella_archivo(r) for r in fuentes] + [hash_pkl or "-"])
+        version = hashlib.sha1(huella.encode("utf-8")).hexdigest()[:12]
+        
+        predictor = cls(bosque, indice_dataset, raster_zona, version, modelo if modelo.exists() else None,
+                        sustituto_zona)
+        predictor.huella_archivos = huella_archivos
+        if MICRO_LOTES is not None:
+            predictor.activar_micro_lotes(**MICRO_LOTES)
+        predictor.tiempo_carga_s = time.perf_counter() - t0
+        logger.info(f"Modelo cargado ({origen.name}{' + sustituto' if sustituto_zona is not None else ''}, "
+                    f"versión {version}) en {predictor.tiempo_carga_s * 1000:.0f} ms")
+        return predictor
+    
+    def activar_micro_lotes(self, ventana_s, max_lote):
+        """Agrupa en lotes las predicciones de un punto que llegan de hilos concurrentes"""
+        planificador, self.planificador = self.planificador, PlanificadorMicroLotes(
+            self.modelo_zona.predecir, ventana_s=ventana_s, max_lote=max_lote)
+        if planificador is not None:
+            planificador.detener()
+    
+    def desactivar_micro_lotes(self):
+        planificador, self.planificador = self.planificador, None
+        if planificador is not None:
+            planificador.detener()
+    
+    def modelo_sklearn(self):
+        """RandomForestRegressor de sklearn, cargado del .pkl solo la primera vez que se pide"""
+        if self._modelo_sklearn is None:
+            with self._lock:
+                if self._modelo_sklearn is None:
+                    if self.ruta_modelo_sklearn is None:
+                        raise FileNotFoundError("No hay modelo .pkl de sklearn para esta versión")
+                    from joblib import load
+                    self._modelo_sklearn = load(self.ruta_modelo_sklearn)
+        return self._modelo_sklearn
+    
+    def riesgo_zona(self, latitud, longitud):
+        """Score de zona de una coordenada (ver obtener_riesgo_zona)"""
+        # MEJORA: Primero buscar en el dataset si existe esta coordenada exacta
+        # Tolerancia de ±0.0001 grados (≈ 10 metros)
+        riesgo_score = self.indice_dataset.buscar(latitud, longitud)
+        
+        if riesgo_score is not None:
+            # Si encontramos la coordenada en el dataset, usar su valor real
+            logger.debug(f"🎯 Coordenada encontrada en dataset → Score: {riesgo_score:.1f}")
+            metricas.FUENTE_SCORE.inc(fuente="dataset")
+            return riesgo_score
+        
+        # Si no está en el dataset pero sí dentro del raster, usar el valor precalculado
+        if self.raster is not None:
+            riesgo_score = self.raster.consultar(latitud, longitud, interpolar=INTERPOLAR_RASTER)
+            if riesgo_score is not None:
+                logger.debug("🗺️ Coordenada no en dataset → Usando raster precalculado")
+                metricas.FUENTE_SCORE.inc(fuente="raster")
+                return riesgo_score
+        
+        # Si no está en el dataset ni en el raster, usar el modelo de predicción
+        logger.debug("🔮 Coordenada no en dataset → Usando modelo de predicción")
+        metricas.FUENTE_SCORE.inc(fuente=self.fuente_modelo)
+        with metricas.ETAPA_SEGUNDOS.medir(etapa="modelo"):
+            planificador = self.planificador
+            if planificador is not None:
+                return planificador.calcular(latitud, longitud)
+            return self.modelo_zona.predecir_punto(latitud, longitud)
+    
+    def riesgo_zona_lote(self, latitudes, longitudes):
+        """Scores de zona de muchas coordenadas (ver obtener_riesgo_zona_lote)"""
+        # 1) Coincidencias exactas en el dataset
+        riesgo_score = self.indice_dataset.buscar_lote(latitudes, longitudes)
+        
+        # 2) Raster precalculado para las que no están en el dataset
+        pendientes = np.isnan(riesgo_score)
+        n_dataset = len(riesgo_score) - int(pendientes.sum())
+        if self.raster is not None and pendientes.any():
+            riesgo_score[pendientes] = self.raster.consultar_lote(
+                latitudes[pendientes], longitudes[pendientes], interpolar=INTERPOLAR_RASTER)
+            pendientes = np.isnan(riesgo_score)
+        
+        # 3) Una sola llamada al modelo para el resto
+        n_pendientes = int(pendientes.sum())
+        metricas.FUENTE_SCORE.inc(n_dataset, fuente="dataset")
+        metricas.FUENTE_SCORE.inc(len(riesgo_score) - n_dataset - n_pendientes, fuente="raster")
+        metricas.FUENTE_SCORE.inc(n_pendientes, fuente=self.fuente_modelo)
+        inicio = time.perf_counter()
+        if n_pendientes >= LOTE_MINIMO_SKLEARN and self.ruta_modelo_sklearn is not None and self.sustituto is None:
+            import pandas as pd
+            input_data = pd.DataFrame({'latitud': latitudes[pendientes], 'longitud': longitudes[pendientes]})
+            riesgo_score[pendientes] = self.modelo_sklearn().predict(input_data)
+        elif n_pendientes:
+            riesgo_score[pendientes] = self.modelo_zona.predecir(
+                np.column_stack([latitudes[pendientes], longitudes[pendientes]]))
+        if n_pendientes:
+            metricas.ETAPA_SEGUNDOS.observar(time.perf_counter() - inicio, etapa="modelo_lote")
+        
+        return riesgo_score
+
+
+_predictor = None
+_predictor_lock = threading.Lock()
+
+def obtener_predictor():
+    """
+    Predictor activo; se carga la primera vez que se pide (thread-safe).
+    
+    Returns:
+        PredictorRiesgo: Predictor con el modelo y los datos cargados
+    """
+    global _predictor
+    predictor = _predictor
+    if predictor is None:
+        with _predictor_lock:
+            if _predictor is None:
+                _predictor = PredictorRiesgo.cargar()
+                _publicar(_predictor)
+            predictor = _predictor
+    return predictor
+
+def _publicar(predictor):
+    """Métricas del predictor que acaba de quedar activo"""
+    metricas.MODELO_CARGA_SEGUNDOS.set(round(predictor.tiempo_carga_s, 6))
+    metricas.MODELO_INFO.limpiar()
+    metricas.MODELO_INFO.set(1, version=predictor.version)
+
+def version_activa():
+    """Versión del predictor activo, o None si todavía no se carga"""
+    predictor = _predictor
+    return None if predictor is None else predictor.version
+
+def configurar_micro_lotes(ventana_s=None, max_lote=None):
+    """
+    Activa (o desactiva, con ventana_s=None) el planificador de micro-lotes
+    para el predictor activo y los que se carguen después.
+    
+    Args:
+        ventana_s (float | None): Espera máxima para juntar un lote (segundos)
+        max_lote (int | None): Filas máximas por llamada al modelo
+    """
+    global MICRO_LOTES
+    MICRO_LOTES = None if ventana_s is None else {'ventana_s': ventana_s, 'max_lote': max_lote or MAX_LOTE}
+    if _predictor is not None:
+        if MICRO_LOTES is None:
+            _predictor.desactivar_micro_lotes()
+        else:
+            _predictor.activar_micro_lotes(**MICRO_LOTES)
+
+def configurar_sustituto(min_concordancia=None):
+    """
+    Sirve el sustituto destilado en lugar del bosque si su concordancia de
+    clases es al menos `min_concordancia` (None = siempre el bosque). Si ya
+    hay un predictor activo se recarga para aplicar el cambio.
+    
+    Returns:
+        dict | None: Resultado de recargar() si había predictor activo
+    """
+    global SUSTITUTO_MIN_CONCORDANCIA
+    SUSTITUTO_MIN_CONCORDANCIA = min_concordancia
+    if _predictor is not None:
+        return recargar()
+    return None
+
+def configurar_cache_zonas(max_entradas=MAX_ENTRADAS, precision=PRECISION, ttl_s=None):
+    """
+    Activa (o desactiva, con max_entradas=None) la caché de obtener_riesgo_zona.
+    Se vacía sola cuando cambia la versión del predictor activo (recargar).
+    
+    Args:
+        max_entradas (int | None): Celdas máximas en caché (LRU)
+        precision (int): Decimales de las coordenadas en la clave (5 ≈ 1.1 m)
+        ttl_s (float, opcional): Segundos que vale un score (None = hasta que cambie la versión)
+    """
+    global _cache_zonas
+    _cache_zonas = None if max_entradas is None else CacheZonas(precision, max_entradas, ttl_s)
+
+def estadisticas_cache_zonas():
+    """Aciertos, fallos, etc. de la caché de obtener_riesgo_zona, o None si está desactivada"""
+    cache = _cache_zonas
+    return None if cache is None else cache.estadisticas()
 
-try:
-    modelo = load(model_path)
-    print("✅ Modelo cargado exitosamente")
-except FileNotFoundError:
-    print("❌ Error: No se encontró 'modelo_predictivo.pkl'")
-    print("🔄 Ejecuta primero: python3 Modelo.py")
-    exit(1)
+def obtener_modelo_sklearn():
+    """RandomForestRegressor de sklearn del predictor activo (carga diferida del .pkl)"""
+    return obtener_predictor().modelo_sklearn()
 
 def validar_coordenadas_cdmx(latitud, longitud):
     """
@@ -25,17 +387,15 @@ def validar_coordenadas_cdmx(latitud, longitud):
     Returns:
         bool: True si está dentro de CDMX, False si no
     """
-    # Rangos aproximados de CDMX basados en el dataset
-    LAT_MIN, LAT_MAX = 19.35, 19.65
-    LON_MIN, LON_MAX = -99.35, -98.95
-    
     return (LAT_MIN <= latitud <= LAT_MAX and LON_MIN <= longitud <= LON_MAX)
 
 def obtener_riesgo_zona(latitud, longitud):
     """
     Predice el riesgo de zona basado en coordenadas geográficas.
     Primero busca en el dataset si la coordenada exacta existe (con tolerancia).
-    Si no, usa el modelo de predicción.
+    Si no, usa el raster precalculado (si existe y la coordenada está en CDMX)
+    y como último recurso el modelo de predicción. Con la caché activa
+    (configurar_cache_zonas), una coordenada repetida se responde de la caché.
     
     Args:
         latitud (float): Latitud de la ubicación
@@ -46,29 +406,15 @@ def obtener_riesgo_zona(latitud, longitud):
     """
     # Validar si las coordenadas están dentro de CDMX
     if not validar_coordenadas_cdmx(latitud, longitud):
-        print(f"⚠️ ADVERTENCIA: Las coordenadas ({latitud}, {longitud}) están fuera del rango de CDMX")
-        print(f"📍 Rango válido: Lat 19.35-19.65, Lon -99.35 a -98.95")
-        print(f"🤖 La predicción puede no ser confiable para ubicaciones fuera de CDMX")
-    
-    # MEJORA: Primero buscar en el dataset si existe esta coordenada exacta
-    # Tolerancia de ±0.0001 grados (≈ 10 metros)
-    dataset = pd.read_csv(script_dir / "dataset_procesado.csv")
-    coincidencia = dataset[
-        (abs(dataset['latitud'] - latitud) < 0.0001) & 
-        (abs(dataset['longitud'] - longitud) < 0.0001)
-    ]
+        logger.warning(f"⚠️ Las coordenadas ({latitud}, {longitud}) están fuera del rango de CDMX "
+                       f"(Lat {LAT_MIN}-{LAT_MAX}, Lon {LON_MIN} a {LON_MAX}); "
+                       f"la predicción puede no ser confiable")
     
-    if not coincidencia.empty:
-        # Si encontramos la coordenada en el dataset, usar su valor real
-        riesgo_score = coincidencia['riesgo_zona_score'].iloc[0]
-        print(f"🎯 Coordenada encontrada en dataset → Score: {riesgo_score:.1f}")
-        return riesgo_score
-    
-    # Si no está en el dataset, usar el modelo de predicción
-    print(f"🔮 Coordenada no en dataset → Usando modelo de predicción")
-    input_data = pd.DataFrame([[latitud, longitud]], columns=['latitud', 'longitud'])
-    riesgo_score = modelo.predict(input_data)[0]
-    return riesgo_score
+    predictor = obtener_predictor()
+    cache = _cache_zonas
+    if cache is not None:
+        return cache.obtener(latitud, longitud, predictor.version, predictor.riesgo_zona)
+    return predictor.riesgo_zona(latitud, longitud)
 
 def clasificar_riesgo_zona(riesgo_score):
     """
@@ -87,43 +433,37 @@ def clasificar_riesgo_zona(riesgo_score):
     else:
         return 'ALTO'
 
-# Coordenadas hardcoded BAJA
-#LATITUD_FIJA = 19.5061618036
-#LONGITUD_FIJA = -99.1047492201
-# Coordenadas hardcoded ALTA 19.5228166649,-99.1678551529
-#LATITUD_FIJA = 19.5228166649
-#LONGITUD_FIJA = -99.1678551529
-# Coordenadas UPIITA 19.5113119,-99.1251155
-#LATITUD_FIJA = 19.5113119
-#LONGITUD_FIJA = -99.1251155
-#Coordenada hardcoded MEDIA 19.5041017692,-99.0986932319
-LATITUD_FIJA = 19.5041017692
-LONGITUD_FIJA = -99.0986932319
+# Tasa de subida (%/min) a partir de la cual la alerta sube un nivel
+TASA_SUBIDA_RAPIDA = 2.0
 
+def escalar_por_tasa(alerta, tasa_subida):
+    """
+    Sube la alerta un nivel (VERDE→AMARILLO→ROJO) si el nivel del agua sube rápido.
+    
+    Args:
+        alerta (str): Color de alerta según zona y nivel del sensor
+        tasa_subida (float | None): Tasa de subida en %/min (None = no se considera)
+    
+    Returns:
+        str: Color de alerta ajustado
+    """
+    if tasa_subida is None or tasa_subida < TASA_SUBIDA_RAPIDA or alerta == 'ROJO':
+        return alerta
+    return 'ROJO' if alerta == 'AMARILLO' else 'AMARILLO'
 
-def predecir_alerta(nivel_sensor):
+def determinar_alerta(nivel_riesgo, nivel_sensor, tasa_subida=None):
     """
-    Función principal que predice el color de alerta basado en:
-    - Ubicación geográfica (coordenadas hardcoded)
-    - Nivel del sensor (0-3)
+    Reglas de negocio: combina el nivel de riesgo de la zona con el nivel del sensor.
     
     Args:
+        nivel_riesgo (str): Nivel de riesgo de zona ('BAJO', 'MEDIO', 'ALTO')
         nivel_sensor (int): Nivel del sensor (0=seco, 1=bajo, 2=medio, 3=alto)
+        tasa_subida (float, opcional): Tasa de subida en %/min; si es mayor o igual a
+            TASA_SUBIDA_RAPIDA la alerta sube un nivel
     
     Returns:
-        dict: {
-            'alerta': str ('VERDE', 'AMARILLO', 'ROJO'),
-            'riesgo_zona': str ('BAJO', 'MEDIO', 'ALTO'),
-            'riesgo_score': float,
-            'nivel_sensor': int,
-            'coordenadas': dict
-        }
+        str: Color de alerta ('VERDE', 'AMARILLO', 'ROJO')
     """
-    # Paso 1: Obtener riesgo de la zona usando coordenadas hardcoded
-    riesgo_score = obtener_riesgo_zona(LATITUD_FIJA, LONGITUD_FIJA)
-    nivel_riesgo = clasificar_riesgo_zona(riesgo_score)
-    
-    # Paso 2: Aplicar reglas de negocio combinando riesgo de zona + nivel sensor
     if nivel_riesgo == 'BAJO':
         # Zona de BAJO riesgo: 0-2→Verde, 3→Amarillo
         if nivel_sensor <= 2:
@@ -149,40 +489,71 @@ def predecir_alerta(nivel_sensor):
         else:
             alerta = 'ROJO'
     
-    return {
-        'alerta': alerta,
-        'riesgo_zona': nivel_riesgo,
-        'riesgo_score': round(riesgo_score, 1),
-        'nivel_sensor': nivel_sensor,
-        'coordenadas': {'latitud': LATITUD_FIJA, 'longitud': LONGITUD_FIJA}
-    }
+    return escalar_por_tasa(alerta, tasa_subida)
+
+# Coordenadas hardcoded BAJA
+#LATITUD_FIJA = 19.5061618036
+#LONGITUD_FIJA = -99.1047492201
+# Coordenadas hardcoded ALTA 19.5228166649,-99.1678551529
+#LATITUD_FIJA = 19.5228166649
+#LONGITUD_FIJA = -99.1678551529
+# Coordenadas UPIITA 19.5113119,-99.1251155
+#LATITUD_FIJA = 19.5113119
+#LONGITUD_FIJA = -99.1251155
+#Coordenada hardcoded MEDIA 19.5041017692,-99.0986932319
+LATITUD_FIJA = 19.5041017692
+LONGITUD_FIJA = -99.0986932319
+
+
+def predecir_alerta(nivel_sensor, sensor_id=None, tasa_subida=None):
+    """
+    Función principal que predice el color de alerta basado en:
+    - Ubicación geográfica (sensor registrado o coordenadas hardcoded)
+    - Nivel del sensor (0-3)
+    
+    La zona de cada sensor se precalcula al registrarlo, así que aquí solo se
+    resuelve la fila de alerta en O(1) (ver RegistroSensores).
+    
+    Args:
+        nivel_sensor (int): Nivel del sensor (0=seco, 1=bajo, 2=medio, 3=alto)
+        sensor_id (str, opcional): Sensor registrado; si no se indica o no está
+            registrado se usan las coordenadas hardcoded
+        tasa_subida (float, opcional): Tasa de subida en %/min (ver escalar_por_tasa)
+    
+    Returns:
+        dict: {
+            'alerta': str ('VERDE', 'AMARILLO', 'ROJO'),
+            'riesgo_zona': str ('BAJO', 'MEDIO', 'ALTO'),
+            'riesgo_score': float,
+            'nivel_sensor': int,
+            'coordenadas': dict
+        }
+    """
+    registro = obtener_registro_sensores()
+    resultado = None
+    if sensor_id is not None:
+        resultado = registro.alerta(sensor_id, nivel_sensor)
+    if resultado is None:
+        resultado = registro.alerta(SENSOR_FIJO, nivel_sensor)
+    if tasa_subida is not None:
+        resultado['alerta'] = escalar_por_tasa(resultado['alerta'], tasa_subida)
+        resultado['tasa_subida'] = tasa_subida
+    return resultado
 
 def predecir_alerta_con_coordenadas(latitud, longitud, nivel_sensor):
     """
     Función auxiliar para pruebas con coordenadas personalizadas
     """
-    riesgo_score = obtener_riesgo_zona(latitud, longitud)
+    return _alerta_con_coordenadas(None, latitud, longitud, nivel_sensor)
+
+def _alerta_con_coordenadas(predictor, latitud, longitud, nivel_sensor):
+    """predecir_alerta_con_coordenadas con un predictor dado (None = el activo)"""
+    if predictor is None:
+        riesgo_score = obtener_riesgo_zona(latitud, longitud)
+    else:
+        riesgo_score = predictor.riesgo_zona(latitud, longitud)
     nivel_riesgo = clasificar_riesgo_zona(riesgo_score)
-    
-    if nivel_riesgo == 'BAJO':
-        if nivel_sensor <= 2:
-            alerta = 'VERDE'
-        else:
-            alerta = 'AMARILLO'
-    elif nivel_riesgo == 'MEDIO':
-        if nivel_sensor <= 1:
-            alerta = 'VERDE'
-        elif nivel_sensor == 2:
-            alerta = 'AMARILLO'
-        else:
-            alerta = 'ROJO'
-    else:  # ALTO riesgo
-        if nivel_sensor == 0:
-            alerta = 'VERDE'
-        elif nivel_sensor == 1:
-            alerta = 'AMARILLO'
-        else:
-            alerta = 'ROJO'
+    alerta = determinar_alerta(nivel_riesgo, nivel_sensor)
     
     return {
         'alerta': alerta,
@@ -193,6 +564,356 @@ def predecir_alerta_con_coordenadas(latitud, longitud, nivel_sensor):
     }
 
 
+# Registro de sensores (sensor_id → coordenadas) con alertas precalculadas.
+# Las coordenadas hardcoded se registran como el sensor SENSOR_FIJO (no se persiste).
+sensores_path = script_dir / "sensores.json"
+SENSOR_FIJO = "fijo"
+_registro_sensores = None
+_registro_lock = threading.Lock()
+
+def obtener_registro_sensores():
+    """
+    Registro de sensores; se crea (y precalcula sus alertas) la primera vez que se pide.
+    
+    Returns:
+        RegistroSensores: Registro con el sensor SENSOR_FIJO ya registrado
+    """
+    global _registro_sensores
+    registro = _registro_sensores
+    if registro is None:
+        with _registro_lock:
+            if _registro_sensores is None:
+                registro = RegistroSensores(sensores_path, predecir_alerta_con_coordenadas)
+                registro.registrar(SENSOR_FIJO, LATITUD_FIJA, LONGITUD_FIJA, persistir=False)
+                _registro_sensores = registro
+            registro = _registro_sensores
+    return registro
+
+def calentar():
+    """
+    Carga el predictor y el registro de sensores y ejecuta algunas predicciones
+    (coincidencia en dataset, raster/modelo, lote) para que la primera lectura
+    real no pague ninguna carga diferida.
+    
+    Returns:
+        dict: {'version': str, 'carga_modelo_s': float, 'segundos': float}
+    """
+    t0 = time.perf_counter()
+    predictor = obtener_predictor()
+    for nivel in range(4):
+        predecir_alerta(nivel)
+    _calentar_predictor(predictor)
+    return {
+        'version': predictor.version,
+        'carga_modelo_s': predictor.tiempo_carga_s,
+        'segundos': time.perf_counter() - t0,
+    }
+
+def _calentar_predictor(predictor):
+    predictor.riesgo_zona(19.5061618036, -99.1047492201)  # Coordenada del dataset
+    predictor.riesgo_zona(19.45, -99.2)                    # Raster o modelo
+    predictor.riesgo_zona_lote(np.array([19.45, 19.55]), np.array([-99.2, -99.0]))
+
+
+# Recarga en caliente: un predictor nuevo solo se activa si da estos resultados.
+# (latitud, longitud) → (score redondeado a 1 decimal, clase de zona)
+CASOS_DORADOS = {
+    (19.5061618036, -99.1047492201): (39.2, 'BAJO'),    # Coordenada de test_fix.py
+    (LATITUD_FIJA, LONGITUD_FIJA): (58.6, 'MEDIO'),      # Coordenadas hardcoded
+}
+
+# Los casos anteriores son filas del dataset (los responde el índice); estos están fuera
+# del dataset. El .pkl candidato debe darles esta clase, y el camino de servicio (raster,
+# artefacto .bin o sustituto, en un punto y en un lote de LOTE_MINIMO_SKLEARN) el mismo
+# score que el .pkl. (latitud, longitud) → clase de zona
+CASOS_DORADOS_MODELO = {
+    (19.5650, -99.0577): 'BAJO',     # 42.6 con el modelo actual
+    (19.5224, -99.0712): 'MEDIO',    # 55.9
+    (19.4879, -99.1333): 'ALTO',     # 74.2
+}
+# Diferencia máxima entre el camino de servicio y el .pkl en esos puntos (el artefacto es
+# idéntico; el raster por nodo más cercano y el sustituto los mueven menos de 0.3)
+TOLERANCIA_DORADA_MODELO = 2.0
+
+# Rango válido del score de zona para la revisión del modelo
+SCORE_MIN, SCORE_MAX = 0.0, 100.0
+
+# Segundos que el predictor anterior mantiene sus micro-lotes tras una recarga
+# (las peticiones que ya lo tomaron terminan con él)
+GRACIA_RECARGA_S = 5.0
+
+_recarga_lock = threading.Lock()
+_ultima_recarga = None
+
+def validar_predictor(predictor, casos=None, casos_modelo=None):
+    """
+    Revisión de un predictor antes de activarlo: casos dorados del dataset,
+    casos dorados del modelo (clase esperada según el .pkl candidato, y
+    riesgo_zona / riesgo_zona_lote a TOLERANCIA_DORADA_MODELO del .pkl) y que
+    el modelo dé scores finitos dentro de [SCORE_MIN, SCORE_MAX] sobre la caja
+    de CDMX.
+    
+    Args:
+        predictor (PredictorRiesgo): Predictor candidato
+        casos (dict, opcional): Casos dorados (por defecto CASOS_DORADOS)
+        casos_modelo (dict, opcional): Casos del modelo (por defecto CASOS_DORADOS_MODELO)
+    
+    Returns:
+        list: Descripción de cada problema (vacía si todo está bien)
+    """
+    errores = []
+    for (latitud, longitud), (score, nivel) in (CASOS_DORADOS if casos is None else casos).items():
+        obtenido = predictor.riesgo_zona(latitud, longitud)
+        if round(obtenido, 1) != score or clasificar_riesgo_zona(obtenido) != nivel:
+            errores.append(f"({latitud}, {longitud}): se esperaba {score} {nivel}, "
+                           f"se obtuvo {obtenido:.1f} {clasificar_riesgo_zona(obtenido)}")
+    casos_modelo = CASOS_DORADOS_MODELO if casos_modelo is None else casos_modelo
+    if casos_modelo:
+        coordenadas = np.array(list(casos_modelo), dtype=np.float64)
+        esperados = _scores_referencia(predictor, coordenadas)
+        # Lote con al menos LOTE_MINIMO_SKLEARN coordenadas: el camino de predecir_alertas_lote
+        n = len(coordenadas)
+        repeticiones = -(-LOTE_MINIMO_SKLEARN // n)
+        lote = predictor.riesgo_zona_lote(np.tile(coordenadas[:, 0], repeticiones),
+                                          np.tile(coordenadas[:, 1], repeticiones))
+        for i, ((latitud, longitud), nivel) in enumerate(casos_modelo.items()):
+            esperado = esperados[i]
+            if clasificar_riesgo_zona(esperado) != nivel:
+                errores.append(f"Modelo en ({latitud}, {longitud}): se esperaba {nivel}, el .pkl da "
+                               f"{esperado:.1f} {clasificar_riesgo_zona(esperado)}")
+                continue
+            for camino, obtenidos in (("riesgo_zona", [predictor.riesgo_zona(latitud, longitud)]),
+                                      ("riesgo_zona_lote", lote[i::n])):
+                obtenido = max(obtenidos, key=lambda x: abs(x - esperado))
+                if abs(obtenido - esperado) > TOLERANCIA_DORADA_MODELO:
+                    errores.append(f"Modelo en ({latitud}, {longitud}) con {camino}: el .pkl da "
+                                   f"{esperado:.1f} {nivel}, se obtuvo {obtenido:.1f} "
+                                   f"{clasificar_riesgo_zona(obtenido)}")
+    latitudes, longitudes = np.meshgrid(np.linspace(LAT_MIN, LAT_MAX, 7), np.linspace(LON_MIN, LON_MAX, 7))
+    scores = predictor.modelo_zona.predecir(np.column_stack([latitudes.ravel(), longitudes.ravel()]))
+    if not np.all(np.isfinite(scores)) or scores.min() < SCORE_MIN or scores.max() > SCORE_MAX:
+        errores.append(f"El modelo da scores fuera de [{SCORE_MIN}, {SCORE_MAX}] "
+                       f"({np.nanmin(scores):.1f} a {np.nanmax(scores):.1f})")
+    return errores
+
+def _scores_referencia(predictor, coordenadas):
+    """Scores del .pkl candidato (o del bosque, si la versión no trae .pkl)"""
+    if predictor.ruta_modelo_sklearn is None:
+        return predictor.bosque.predecir(coordenadas)
+    import pandas as pd
+    return predictor.modelo_sklearn().predict(pd.DataFrame(coordenadas, columns=['latitud', 'longitud']))
+
+def recargar(casos=None, casos_modelo=None, **rutas):
+    """
+    Carga una versión nueva del modelo y los datos sin detener el servidor.
+    
+    El predictor nuevo se carga, se revisa (validar_predictor) y se calienta
+    aparte; el registro de sensores se recalcula con él y al final se
+    reemplaza la referencia del predictor activo. Las peticiones en curso
+    terminan con el predictor que ya tenían. Si algo falla, sigue el anterior.
+    
+    Args:
+        casos (dict, opcional): Casos dorados (por defecto CASOS_DORADOS)
+        casos_modelo (dict, opcional): Casos del modelo (por defecto CASOS_DORADOS_MODELO)
+        **rutas: artefacto, modelo, dataset, raster, sustituto (ver PredictorRiesgo.cargar)
+    
+    Returns:
+        dict: {'ok': bool, 'version': str, 'anterior': str, 'errores': list, 'segundos': float}
+    """
+    global _predictor, _ultima_recarga
+    with _recarga_lock:
+        t0 = time.perf_counter()
+        anterior = version_activa()
+        resultado = {'ok': False, 'version': None, 'anterior': anterior, 'errores': []}
+        try:
+            nuevo = PredictorRiesgo.cargar(**rutas)
+            resultado['version'] = nuevo.version
+            resultado['errores'] = validar_predictor(nuevo, casos, casos_modelo)
+        except Exception as e:
+            logger.exception("Error al cargar la versión nueva del modelo")
+            resultado['errores'] = [f"{type(e).__name__}: {e}"]
+            nuevo = None
+        
+        if resultado['errores']:
+            if nuevo is not None:
+                nuevo.desactivar_micro_lotes()
+            metricas.RECARGAS.inc(resultado=("rechazada" if nuevo is not None else "error"))
+            logger.error(f"❌ Recarga rechazada, sigue la versión {anterior}: {'; '.join(resultado['errores'])}")
+        else:
+            _calentar_predictor(nuevo)
+            registro = _registro_sensores
+            if registro is not None:
+                registro.recalcular(lambda lat, lon, nivel: _alerta_con_coordenadas(nuevo, lat, lon, nivel))
+            with _predictor_lock:
+                viejo, _predictor = _predictor, nuevo
+            _publicar(nuevo)
+            if viejo is not None and viejo.planificador is not None:
+                retiro = threading.Timer(GRACIA_RECARGA_S, viejo.desactivar_micro_lotes)
+                retiro.daemon = True
+                retiro.start()
+            resultado['ok'] = True
+            metricas.RECARGAS.inc(resultado="ok")
+            logger.info(f"🔄 Modelo recargado: versión {anterior} → {nuevo.version}")
+        
+        resultado['segundos'] = round(time.perf_counter() - t0, 3)
+        _ultima_recarga = dict(resultado, ts=time.time())
+        return resultado
+
+def ultima_recarga():
+    """Resultado de la última recarga (ver recargar) con su marca de tiempo, o None"""
+    return _ultima_recarga
+
+
+class VigilanteModelo:
+    """
+    Hilo que revisa cada `intervalo_s` si cambiaron los archivos del modelo o
+    de los datos y, cuando la huella lleva dos revisiones sin cambiar (el
+    archivo terminó de escribirse), llama a recargar(). Una versión rechazada
+    no se vuelve a intentar hasta que los archivos cambien otra vez.
+    """
+    
+    def __init__(self, intervalo_s, **rutas):
+        """
+        Args:
+            intervalo_s (float): Segundos entre revisiones
+            **rutas: artefacto, modelo, dataset, raster, sustituto (ver PredictorRiesgo.cargar)
+        """
+        self.intervalo_s = intervalo_s
+        self.rutas = rutas
+        self._detener = threading.Event()
+        self._hilo = None
+        self._vista = None
+        self._rechazada = None
+    
+    def revisar(self):
+        """
+        Una revisión de los archivos.
+        
+        Returns:
+            dict | None: Resultado de recargar() si se intentó una recarga
+        """
+        huella = huella_en_disco(**self.rutas)
+        activo = _predictor
+        estable, self._vista = huella == self._vista, huella
+        if activo is None or huella == activo.huella_archivos or huella == self._rechazada or not estable:
+            return None
+        resultado = recargar(**self.rutas)
+        if not resultado['ok']:
+            self._rechazada = huella
+        return resultado
+    
+    def _vigilar(self):
+        while not self._detener.wait(self.intervalo_s):
+            try:
+                self.revisar()
+            except Exception:
+                logger.exception("Error al revisar los archivos del modelo")
+    
+    def iniciar(self):
+        if self._hilo is None:
+            self._hilo = threading.Thread(target=self._vigilar, name="vigilante-modelo", daemon=True)
+            self._hilo.start()
+        return self
+    
+    def detener(self):
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join()
+            self._hilo = None
+
+# Etiquetas para la versión vectorizada (índice 0, 1, 2)
+NIVELES_RIESGO = np.array(['BAJO', 'MEDIO', 'ALTO'])
+ALERTAS = np.array(['VERDE', 'AMARILLO', 'ROJO'])
+
+def obtener_riesgo_zona_lote(latitudes, longitudes):
+    """
+    Versión vectorizada de obtener_riesgo_zona para muchas coordenadas.
+    Mismo orden de fuentes (dataset → raster → modelo), pero con una sola
+    llamada al modelo para todas las coordenadas que lo necesiten.
+    
+    Args:
+        latitudes (array-like): Latitudes de las ubicaciones
+        longitudes (array-like): Longitudes de las ubicaciones
+    
+    Returns:
+        np.ndarray: Scores de riesgo de zona (float64)
+    """
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    
+    fuera_cdmx = ~((latitudes >= LAT_MIN) & (latitudes <= LAT_MAX) &
+                   (longitudes >= LON_MIN) & (longitudes <= LON_MAX))
+    if fuera_cdmx.any():
+        logger.warning(f"⚠️ {int(fuera_cdmx.sum())} coordenadas están fuera del rango de CDMX")
+    
+    return obtener_predictor().riesgo_zona_lote(latitudes, longitudes)
+
+def clasificar_riesgo_zona_lote(riesgo_score):
+    """
+    Versión vectorizada de clasificar_riesgo_zona.
+    
+    Returns:
+        np.ndarray: Índices de nivel de riesgo (0=BAJO, 1=MEDIO, 2=ALTO)
+    """
+    riesgo_score = np.asarray(riesgo_score)
+    return np.select([riesgo_score <= 45, riesgo_score <= 65], [0, 1], 2)
+
+def determinar_alerta_lote(indice_riesgo, nivel_sensor, tasa_subida=None):
+    """
+    Versión vectorizada de determinar_alerta (mismas reglas de negocio).
+    
+    Args:
+        indice_riesgo (np.ndarray): 0=BAJO, 1=MEDIO, 2=ALTO
+        nivel_sensor (np.ndarray): Niveles del sensor (0-3)
+        tasa_subida (np.ndarray, opcional): Tasas de subida en %/min (NaN = no se considera)
+    
+    Returns:
+        np.ndarray: Índices de alerta (0=VERDE, 1=AMARILLO, 2=ROJO)
+    """
+    indice_riesgo = np.asarray(indice_riesgo)
+    nivel_sensor = np.asarray(nivel_sensor)
+    
+    alerta_bajo = np.where(nivel_sensor <= 2, 0, 1)
+    alerta_medio = np.select([nivel_sensor <= 1, nivel_sensor == 2], [0, 1], 2)
+    alerta_alto = np.select([nivel_sensor == 0, nivel_sensor == 1], [0, 1], 2)
+    alerta = np.select([indice_riesgo == 0, indice_riesgo == 1], [alerta_bajo, alerta_medio], alerta_alto)
+    if tasa_subida is not None:
+        # NaN >= umbral es False: sin tasa no se escala
+        alerta = np.minimum(alerta + (np.asarray(tasa_subida, dtype=np.float64) >= TASA_SUBIDA_RAPIDA), 2)
+    return alerta
+
+def predecir_alertas_lote(latitudes, longitudes, niveles_sensor, tasas_subida=None):
+    """
+    Predicción por lotes para muchas tripletas (lat, lon, nivel_sensor).
+    Equivale a llamar predecir_alerta_con_coordenadas en un ciclo, pero con una
+    sola llamada al modelo y reglas de negocio vectorizadas.
+    
+    Args:
+        latitudes (array-like): Latitudes de las ubicaciones
+        longitudes (array-like): Longitudes de las ubicaciones
+        niveles_sensor (array-like): Niveles del sensor (0-3)
+        tasas_subida (array-like, opcional): Tasas de subida en %/min (NaN = no se considera)
+    
+    Returns:
+        dict: {
+            'alerta': np.ndarray de str ('VERDE', 'AMARILLO', 'ROJO'),
+            'riesgo_zona': np.ndarray de str ('BAJO', 'MEDIO', 'ALTO'),
+            'riesgo_score': np.ndarray de float (sin redondear),
+            'nivel_sensor': np.ndarray de int
+        }
+    """
+    niveles_sensor = np.asarray(niveles_sensor)
+    riesgo_score = obtener_riesgo_zona_lote(latitudes, longitudes)
+    indice_riesgo = clasificar_riesgo_zona_lote(riesgo_score)
+    indice_alerta = determinar_alerta_lote(indice_riesgo, niveles_sensor, tasas_subida)
+    
+    return {
+        'alerta': ALERTAS[indice_alerta],
+        'riesgo_zona': NIVELES_RIESGO[indice_riesgo],
+        'riesgo_score': riesgo_score,
+        'nivel_sensor': niveles_sensor
+    }
+
 
 
 def test_coordenadas_especificas():
@@ -299,11 +1020,18 @@ def main_original():
     except ValueError:
         print("❌ Error: El nivel del sensor debe ser un número entero entre 0 y 3.")
         exit(1)
+    except FileNotFoundError as e:
+        print(f"❌ Error: {e}")
+        exit(1)
 
 # Agregar opción para ejecutar las pruebas
 if __name__ == "__main__":
     import sys
     
+    # En consola se muestra de qué fuente sale cada score (dataset, raster o modelo)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logger.setLevel(logging.DEBUG)
+    
     if len(sys.argv) > 1 and sys.argv[1] == "test":
         test_coordenadas_especificas()
     else:
@@ -0,0 +1,154 @@
+import itertools
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+
+# Registros que se pueden acumular antes de descartar (si el disco no da abasto)
+MAX_PENDIENTES = 10000
+
+# Rotación del archivo: tamaño máximo y número de archivos anteriores que se conservan
+MAX_BYTES = 50 * 1024 * 1024
+RESPALDOS = 5
+
+# Fracción de lecturas VERDE sin cambio de alerta que se escriben (1.0 = todas)
+MUESTREO_VERDE = 1.0
+
+
+class FormatoJSON(logging.Formatter):
+    """
+    Un registro por línea como JSON compacto: ts, nivel, logger, msg y los
+    campos de `extra={"datos": {...}}`.
+    """
+
+    def format(self, record):
+        entrada = {
+            "ts": round(record.created, 3),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        datos = getattr(record, "datos", None)
+        if datos:
+            entrada.update(datos)
+        if record.exc_info:
+            entrada["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entrada, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class MuestreoVerde(logging.Filter):
+    """
+    Deja pasar solo una de cada 1/`fraccion` lecturas rutinarias: registros con
+    datos de alerta VERDE y sin cambio de alerta. Todo lo demás pasa completo.
+    """
+
+    def __init__(self, fraccion=MUESTREO_VERDE):
+        super().__init__()
+        self.cada = round(1 / fraccion) if fraccion > 0 else 0
+        self._vistas = itertools.count(1)  # next() es atómico: el filtro corre en los hilos de las peticiones
+        self._lock = threading.Lock()
+        self.omitidas = 0
+
+    def filter(self, record):
+        datos = getattr(record, "datos", None)
+        if not datos or datos.get("alerta") != "VERDE" or datos.get("cambio"):
+            return True
+        if self.cada and next(self._vistas) % self.cada == 1 % self.cada:
+            return True
+        with self._lock:
+            self.omitidas += 1
+        return False
+
+
+class _ManejadorCola(logging.handlers.QueueHandler):
+    """QueueHandler que no formatea en el hilo de la petición y descarta si la cola está llena"""
+
+    def __init__(self, cola):
+        super().__init__(cola)
+        self._lock = threading.Lock()
+        self.descartados = 0
+
+    def prepare(self, record):
+        # El formato (getMessage + JSON) se hace en el hilo de la bitácora
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.descartados += 1
+
+
+class BitacoraJSON:
+    """
+    Bitácora en JSON lines fuera del hilo de la petición.
+
+    Los registros se ponen en una cola acotada y un hilo (QueueListener) los
+    formatea y los escribe en un archivo con rotación por tamaño. Así la
+    petición solo paga el filtro de muestreo y un `put_nowait`.
+    """
+
+    def __init__(self, ruta, max_bytes=MAX_BYTES, respaldos=RESPALDOS,
+                 muestreo_verde=MUESTREO_VERDE, max_pendientes=MAX_PENDIENTES):
+        """
+        Args:
+            ruta (str | Path): Archivo .jsonl (los anteriores quedan como .1, .2, ...)
+            max_bytes (int): Tamaño al que se rota el archivo
+            respaldos (int): Archivos rotados que se conservan
+            muestreo_verde (float): Fracción de lecturas VERDE rutinarias que se escriben
+            max_pendientes (int): Registros en cola antes de descartar
+        """
+        self.ruta = ruta
+        self._archivo = logging.handlers.RotatingFileHandler(ruta, maxBytes=max_bytes,
+                                                             backupCount=respaldos, encoding="utf-8")
+        self._archivo.setFormatter(FormatoJSON())
+        self.muestreo = MuestreoVerde(muestreo_verde)
+        self._manejador = _ManejadorCola(queue.Queue(maxsize=max_pendientes))
+        self._manejador.addFilter(self.muestreo)
+        self._listener = logging.handlers.QueueListener(self._manejador.queue, self._archivo)
+        self._logger = None
+        self._anteriores = []
+        self._lock = threading.Lock()
+
+    def iniciar(self, logger=None):
+        """
+        Reemplaza los handlers de `logger` (por defecto el raíz) por la cola.
+
+        Returns:
+            BitacoraJSON: self
+        """
+        with self._lock:
+            if self._logger is not None:
+                return self
+            self._logger = logger or logging.getLogger()
+            self._anteriores = list(self._logger.handlers)
+            for handler in self._anteriores:
+                self._logger.removeHandler(handler)
+            self._logger.addHandler(self._manejador)
+            self._listener.start()
+        return self
+
+    def detener(self):
+        """Escribe lo pendiente, cierra el archivo y devuelve los handlers anteriores"""
+        with self._lock:
+            if self._logger is None:
+                return
+            self._logger.removeHandler(self._manejador)
+            for handler in self._anteriores:
+                self._logger.addHandler(handler)
+            self._logger = None
+            self._listener.stop()
+            self._archivo.close()
+
+    def estadisticas(self):
+        """
+        Returns:
+            dict: Registros en cola, descartados (cola llena) y omitidos por muestreo
+        """
+        return {
+            "pendientes": self._manejador.queue.qsize(),
+            "descartados": self._manejador.descartados,
+            "omitidos_muestreo": self.muestreo.omitidas,
+        }
@@ -0,0 +1,491 @@
+import argparse
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+# Artefacto binario del bosque (ver guardar_artefacto / cargar_artefacto)
+MAGIA_ARTEFACTO = b"TT2BOSQ\0"
+VERSION_ARTEFACTO = 1
+ALINEACION = 64
+
+# Orden y tipos de los arreglos de nodos dentro del artefacto
+ARREGLOS_ARTEFACTO = (
+    ('caracteristica', '<i4'),
+    ('umbral', '<f8'),
+    ('izquierdo', '<i4'),
+    ('derecho', '<i4'),
+    ('valor', '<f8'),
+    ('raices', '<i4'),
+)
+
+
+class BosqueCompilado:
+    """
+    Evaluador ligero de un RandomForestRegressor exportado a arreglos planos.
+
+    Todos los árboles se concatenan en arreglos de nodos (característica,
+    umbral, hijo izquierdo, hijo derecho, valor) con índices globales; las
+    hojas apuntan a sí mismas. La evaluación replica exactamente a sklearn: la
+    entrada se convierte a float32, cada nodo compara
+    `x[característica] <= umbral` y las predicciones de los árboles se suman en
+    orden y se dividen entre el número de árboles, por lo que el resultado es
+    idéntico bit a bit a `RandomForestRegressor.predict`, sin validación de
+    entrada, revisión de nombres de columnas ni despacho de joblib.
+
+    Los arreglos se usan tal cual (sin copiar), así que pueden venir de un
+    `np.memmap` compartido entre procesos (ver `cargar_artefacto`).
+    """
+
+    def __init__(self, caracteristica, umbral, izquierdo, derecho, valor, raices,
+                 profundidad, caracteristicas=None, metadatos=None, listas=True):
+        """
+        Args:
+            caracteristica, umbral, izquierdo, derecho, valor, raices: Arreglos de nodos
+            profundidad (int): Profundidad máxima de los árboles
+            caracteristicas (list, opcional): Nombres de las columnas en orden de entrenamiento
+            metadatos (dict, opcional): Metadatos del artefacto de origen
+            listas (bool): True copia los nodos a listas de Python para el modo
+                de un punto más rápido; False evalúa directo sobre los arreglos
+                (sin copias, p. ej. con memmap compartido)
+        """
+        self.caracteristica = np.asarray(caracteristica, dtype=np.int32)
+        self.umbral = np.asarray(umbral, dtype=np.float64)
+        self.izquierdo = np.asarray(izquierdo, dtype=np.int32)
+        self.derecho = np.asarray(derecho, dtype=np.int32)
+        self.valor = np.asarray(valor, dtype=np.float64)
+        self.raices = np.asarray(raices, dtype=np.int32)
+        self.profundidad = int(profundidad)
+        self.caracteristicas = list(caracteristicas) if caracteristicas is not None else None
+        self.metadatos = metadatos or {}
+        self.n_arboles = len(self.raices)
+
+        self._listas = None
+        if listas:
+            # Modo de un punto con listas de Python (evita escalares de numpy)
+            self._listas = (self.caracteristica.tolist(), self.umbral.tolist(), self.izquierdo.tolist(),
+                            self.derecho.tolist(), self.valor.tolist(), self.raices.tolist())
+
+    @classmethod
+    def desde_modelo(cls, modelo, listas=True):
+        """
+        Exporta un RandomForestRegressor (o un DecisionTreeRegressor) entrenado.
+
+        Args:
+            modelo: Estimador de sklearn con una sola salida
+            listas (bool): Ver __init__
+
+        Returns:
+            BosqueCompilado: Evaluador equivalente
+        """
+        arboles = getattr(modelo, 'estimators_', [modelo])
+        partes = {'caracteristica': [], 'umbral': [], 'izquierdo': [], 'derecho': [], 'valor': []}
+        raices = []
+        desplazamiento = 0
+
+        for arbol in arboles:
+            t = arbol.tree_
+            if t.n_outputs != 1:
+                raise ValueError("Solo se soportan modelos de una salida")
+            indices = np.arange(t.node_count) + desplazamiento
+            es_hoja = t.children_left == -1
+
+            raices.append(desplazamiento)
+            partes['caracteristica'].append(np.where(es_hoja, 0, t.feature))
+            partes['umbral'].append(t.threshold)
+            partes['izquierdo'].append(np.where(es_hoja, indices, t.children_left + desplazamiento))
+            partes['derecho'].append(np.where(es_hoja, indices, t.children_right + desplazamiento))
+            partes['valor'].append(t.value[:, 0, 0])
+            desplazamiento += t.node_count
+
+        nombres = getattr(modelo, 'feature_names_in_', None)
+        return cls(
+            np.concatenate(partes['caracteristica']),
+            np.concatenate(partes['umbral']),
+            np.concatenate(partes['izquierdo']),
+            np.concatenate(partes['derecho']),
+            np.concatenate(partes['valor']),
+            raices,
+            max(arbol.tree_.max_depth for arbol in arboles),
+            caracteristicas=list(nombres) if nombres is not None else None,
+            listas=listas,
+        )
+
+    @property
+    def es_hoja(self):
+        return self.izquierdo == np.arange(len(self.izquierdo))
+
+    def predecir_punto(self, *x):
+        """
+        Predice un solo punto, p. ej. predecir_punto(latitud, longitud).
+
+        Returns:
+            float: Igual a modelo.predict([[*x]])[0]
+        """
+        # sklearn compara en float32: se redondea la entrada igual que él
+        x = np.asarray(x, dtype=np.float32)
+
+        if self._listas is None:
+            # Sin copias: todos los árboles avanzan juntos un nivel por paso
+            nodos = self.raices
+            for _ in range(self.profundidad):
+                nodos = np.where(x[self.caracteristica[nodos]] <= self.umbral[nodos],
+                                 self.izquierdo[nodos], self.derecho[nodos])
+            valores = self.valor[nodos].tolist()
+        else:
+            x = x.tolist()
+            car, umb, izq, der, val, raices = self._listas
+            valores = []
+            for nodo in raices:
+                while izq[nodo] != nodo:
+                    nodo = izq[nodo] if x[car[nodo]] <= umb[nodo] else der[nodo]
+                valores.append(val[nodo])
+
+        # Suma secuencial árbol por árbol (mismo orden de redondeo que sklearn)
+        total = 0.0
+        for valor in valores:
+            total += valor
+        return total / self.n_arboles
+
+    def predecir(self, X, tam_bloque=512):
+        """
+        Predice muchos puntos a la vez (todos los árboles en paralelo por bloque).
+
+        Conviene para lotes pequeños y medianos (hasta cientos de puntos), donde
+        el costo fijo de sklearn domina; para lotes muy grandes el recorrido en
+        C de sklearn es más rápido. Ambos dan el mismo resultado.
+
+        Args:
+            X (array-like): Matriz (n_puntos, n_caracteristicas) en el orden de entrenamiento
+            tam_bloque (int): Puntos por bloque (limita la memoria a árboles × bloque)
+
+        Returns:
+            np.ndarray: Igual a modelo.predict(X)
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n_caracteristicas = X.shape[1]
+        resultado = np.empty(X.shape[0], dtype=np.float64)
+
+        for inicio in range(0, X.shape[0], tam_bloque):
+            bloque = X[inicio:inicio + tam_bloque]
+            n = bloque.shape[0]
+            plano = bloque.ravel()
+            # Posición de cada punto dentro del bloque aplanado (fila-mayor)
+            base = (np.arange(n, dtype=np.int64) * n_caracteristicas)[None, :]
+            nodos = np.repeat(self.raices[:, None], n, axis=1)
+            for _ in range(self.profundidad):
+                x = np.take(plano, np.take(self.caracteristica, nodos) + base)
+                va_izq = x <= np.take(self.umbral, nodos)
+                nodos = np.where(va_izq, np.take(self.izquierdo, nodos), np.take(self.derecho, nodos))
+
+            # Suma secuencial árbol por árbol (mismo orden de redondeo que sklearn)
+            acumulado = np.zeros(n, dtype=np.float64)
+            for fila in np.take(self.valor, nodos):
+                acumulado += fila
+            acumulado /= self.n_arboles
+            resultado[inicio:inicio + n] = acumulado
+
+        return resultado
+
+
+def hash_entrenamiento(ruta_dataset, parametros=None):
+    """
+    Huella del entrenamiento: SHA-256 del dataset usado y de los hiperparámetros.
+
+    Args:
+        ruta_dataset (str | Path): Dataset con el que se entrenó el modelo
+        parametros (dict, opcional): Hiperparámetros del modelo
+
+    Returns:
+        str: Hash hexadecimal
+    """
+    h = _sha256_archivo(ruta_dataset)
+    if parametros:
+        h.update(json.dumps(parametros, sort_keys=True, default=str).encode('utf-8'))
+    return h.hexdigest()
+
+
+def hash_archivo(ruta):
+    """
+    SHA-256 del contenido de un archivo (p. ej. el .pkl del que se exportó un artefacto).
+
+    Args:
+        ruta (str | Path): Archivo a leer
+
+    Returns:
+        str: Hash hexadecimal
+    """
+    return _sha256_archivo(ruta).hexdigest()
+
+
+def _sha256_archivo(ruta):
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloque)
+    return h
+
+
+def hash_arreglos(bosque):
+    """
+    Huella del bosque compilado: SHA-256 de sus arreglos de nodos tal como se
+    escriben en el artefacto. Cambia si cambia cualquier árbol, aunque el
+    dataset y los hiperparámetros sean los mismos (p. ej. un refresco incremental).
+
+    Args:
+        bosque (BosqueCompilado): Bosque (de un artefacto o de desde_modelo)
+
+    Returns:
+        str: Hash hexadecimal
+    """
+    h = hashlib.sha256()
+    for nombre, dtype in ARREGLOS_ARTEFACTO:
+        h.update(np.ascontiguousarray(getattr(bosque, nombre), dtype=dtype).tobytes())
+    return h.hexdigest()
+
+
+def _alinear(n):
+    return (n + ALINEACION - 1) // ALINEACION * ALINEACION
+
+
+def guardar_artefacto(bosque, ruta, metadatos=None):
+    """
+    Escribe el bosque como artefacto binario versionado y mapeable en memoria.
+
+    Formato:
+        MAGIA_ARTEFACTO (8 bytes) | versión (uint32 LE) | largo del encabezado (uint32 LE)
+        | encabezado JSON (utf-8) | relleno | arreglos de nodos alineados a 64 bytes
+
+    El encabezado describe cada arreglo (dtype, offset, forma) y los
+    metadatos: orden de características, profundidad, hash de entrenamiento,
+    umbrales de clasificación, etc.
+
+    Args:
+        bosque (BosqueCompilado): Bosque a guardar
+        ruta (str | Path): Archivo de salida (se escribe de forma atómica)
+        metadatos (dict, opcional): Metadatos adicionales para el encabezado
+    """
+    ruta = Path(ruta)
+    arreglos = {nombre: np.ascontiguousarray(getattr(bosque, nombre), dtype=dtype)
+                for nombre, dtype in ARREGLOS_ARTEFACTO}
+
+    encabezado = {
+        'version': VERSION_ARTEFACTO,
+        'caracteristicas': bosque.caracteristicas,
+        'n_arboles': bosque.n_arboles,
+        'n_nodos': int(len(bosque.caracteristica)),
+        'profundidad': bosque.profundidad,
+        'creado': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'metadatos': metadatos or {},
+        'arreglos': {},
+    }
+
+    # Los offsets van dentro del encabezado y dependen de su largo: se
+    # recalculan hasta que el largo del encabezado deja de cambiar
+    inicio_datos = 0
+    while True:
+        offset = inicio_datos
+        for nombre, arreglo in arreglos.items():
+            encabezado['arreglos'][nombre] = {
+                'dtype': arreglo.dtype.str, 'offset': offset, 'forma': list(arreglo.shape)}
+            offset = _alinear(offset + arreglo.nbytes)
+        texto = json.dumps(encabezado, ensure_ascii=False).encode('utf-8')
+        necesario = _alinear(len(MAGIA_ARTEFACTO) + 8 + len(texto))
+        if necesario == inicio_datos:
+            break
+        inicio_datos = necesario
+
+    temporal = ruta.with_suffix(ruta.suffix + '.tmp')
+    with open(temporal, 'wb') as f:
+        f.write(MAGIA_ARTEFACTO)
+        f.write(np.array([VERSION_ARTEFACTO, len(texto)], dtype='<u4').tobytes())
+        f.write(texto)
+        for nombre, arreglo in arreglos.items():
+            f.write(b'\0' * (encabezado['arreglos'][nombre]['offset'] - f.tell()))
+            f.write(arreglo.tobytes())
+    temporal.replace(ruta)
+
+
+def leer_encabezado(ruta):
+    """
+    Lee y valida el encabezado JSON de un artefacto sin cargar los arreglos.
+
+    Returns:
+        dict: Encabezado del artefacto
+
+    Raises:
+        ValueError: Si el archivo no es un artefacto válido o la versión no es soportada
+    """
+    with open(ruta, 'rb') as f:
+        magia = f.read(len(MAGIA_ARTEFACTO))
+        if magia != MAGIA_ARTEFACTO:
+            raise ValueError(f"{ruta} no es un artefacto de modelo válido")
+        version, largo = np.frombuffer(f.read(8), dtype='<u4')
+        if version != VERSION_ARTEFACTO:
+            raise ValueError(f"Versión de artefacto no soportada: {version}")
+        return json.loads(f.read(int(largo)).decode('utf-8'))
+
+
+def cargar_artefacto(ruta, listas=False):
+    """
+    Mapea en memoria (solo lectura) un artefacto escrito con guardar_artefacto.
+
+    Los arreglos de nodos son `np.memmap` sobre el mismo archivo, así que N
+    procesos comparten una sola copia física (la caché de páginas del sistema
+    operativo) y la carga no deserializa nada.
+
+    Args:
+        ruta (str | Path): Archivo del artefacto
+        listas (bool): True copia los nodos a listas (más rápido por punto, pero
+            cada proceso tiene su propia copia)
+
+    Returns:
+        BosqueCompilado: Bosque listo para predecir
+    """
+    encabezado = leer_encabezado(ruta)
+    arreglos = {
+        nombre: np.memmap(ruta, dtype=np.dtype(d['dtype']), mode='r', offset=d['offset'], shape=tuple(d['forma']))
+        for nombre, d in encabezado['arreglos'].items()
+    }
+    metadatos = dict(encabezado['metadatos'], creado=encabezado['creado'])
+    return BosqueCompilado(
+        caracteristicas=encabezado['caracteristicas'],
+        profundidad=encabezado['profundidad'],
+        metadatos=metadatos,
+        listas=listas,
+        **arreglos,
+    )
+
+
+def benchmark(modelo, n_llamadas=2000, n_lote=100000, semilla=0):
+    """
+    Compara latencia y resultados del bosque compilado contra sklearn.
+
+    Returns:
+        dict: Latencias (µs por llamada; en lote de 100k, µs por punto) y si los
+        resultados son idénticos
+    """
+    import pandas as pd
+
+    bosque = BosqueCompilado.desde_modelo(modelo)
+    rng = np.random.default_rng(semilla)
+    lats = rng.uniform(19.35, 19.65, n_lote)
+    lons = rng.uniform(-99.35, -98.95, n_lote)
+    columnas = bosque.caracteristicas or ['latitud', 'longitud']
+
+    # Un punto por llamada (camino de obtener_riesgo_zona)
+    n_sklearn = max(n_llamadas // 20, 1)
+    t0 = time.perf_counter()
+    for i in range(n_sklearn):
+        modelo.predict(pd.DataFrame([[lats[i], lons[i]]], columns=columnas))[0]
+    sklearn_punto = (time.perf_counter() - t0) / n_sklearn * 1e6
+
+    t0 = time.perf_counter()
+    for i in range(n_llamadas):
+        bosque.predecir_punto(lats[i], lons[i])
+    compilado_punto = (time.perf_counter() - t0) / n_llamadas * 1e6
+
+    # Lote completo
+    X = np.column_stack([lats, lons])
+    t0 = time.perf_counter()
+    esperado = modelo.predict(pd.DataFrame(X, columns=columnas))
+    sklearn_lote = (time.perf_counter() - t0) / n_lote * 1e6
+
+    t0 = time.perf_counter()
+    obtenido = bosque.predecir(X)
+    compilado_lote = (time.perf_counter() - t0) / n_lote * 1e6
+
+    # Lote pequeño (p. ej. un micro-lote de peticiones concurrentes)
+    pequeno = X[:64]
+    n_rep = max(n_llamadas // 20, 1)
+    t0 = time.perf_counter()
+    for _ in range(n_rep):
+        modelo.predict(pd.DataFrame(pequeno, columns=columnas))
+    sklearn_lote64 = (time.perf_counter() - t0) / n_rep * 1e6
+    t0 = time.perf_counter()
+    for _ in range(n_rep):
+        bosque.predecir(pequeno)
+    compilado_lote64 = (time.perf_counter() - t0) / n_rep * 1e6
+
+    puntos = [bosque.predecir_punto(lats[i], lons[i]) for i in range(n_llamadas)]
+    return {
+        'sklearn_lote64_us': sklearn_lote64,
+        'compilado_lote64_us': compilado_lote64,
+        'sklearn_punto_us': sklearn_punto,
+        'compilado_punto_us': compilado_punto,
+        'sklearn_lote_us': sklearn_lote,
+        'compilado_lote_us': compilado_lote,
+        'identico_lote': bool(np.array_equal(obtenido, esperado)),
+        'identico_punto': puntos == esperado[:n_llamadas].tolist(),
+    }
+
+
+def metadatos_modelo(modelo, ruta_dataset, umbrales_riesgo=(45, 65), ruta_modelo=None):
+    """
+    Metadatos estándar del artefacto para un modelo entrenado.
+
+    Args:
+        modelo: RandomForestRegressor entrenado
+        ruta_dataset (str | Path): Dataset con el que se entrenó
+        umbrales_riesgo (tuple): Límites superiores de BAJO y MEDIO
+        ruta_modelo (str | Path, opcional): .pkl ya guardado del que se exporta el
+            artefacto; su hash permite detectar un artefacto viejo junto a un .pkl nuevo
+
+    Returns:
+        dict: Metadatos para guardar_artefacto
+    """
+    parametros = {k: v for k, v in modelo.get_params().items() if isinstance(v, (int, float, str, bool, type(None)))}
+    metadatos = {
+        'algoritmo': type(modelo).__name__,
+        'parametros': parametros,
+        'hash_entrenamiento': hash_entrenamiento(ruta_dataset, parametros),
+        'dataset': Path(ruta_dataset).name,
+        'umbrales_riesgo': {'BAJO': umbrales_riesgo[0], 'MEDIO': umbrales_riesgo[1]},
+    }
+    if ruta_modelo is not None:
+        metadatos['hash_pkl'] = hash_archivo(ruta_modelo)
+    return metadatos
+
+
+def main():
+    """CLI: benchmark contra sklearn o exportación del .pkl existente a artefacto binario"""
+    from joblib import load
+
+    script_dir = Path(__file__).resolve().parent
+    parser = argparse.ArgumentParser(description="Bosque compilado: benchmark y exportación")
+    parser.add_argument("accion", choices=["benchmark", "exportar"], nargs="?", default="benchmark")
+    parser.add_argument("--modelo", default=str(script_dir / "modelo_predictivo.pkl"))
+    parser.add_argument("--salida", default=str(script_dir / "modelo_predictivo.bin"))
+    parser.add_argument("--dataset", default=str(script_dir / "dataset_procesado.csv"),
+                        help="Dataset de entrenamiento (para el hash del artefacto)")
+    args = parser.parse_args()
+
+    modelo = load(args.modelo)
+
+    if args.accion == "exportar":
+        bosque = BosqueCompilado.desde_modelo(modelo, listas=False)
+        guardar_artefacto(bosque, args.salida, metadatos_modelo(modelo, args.dataset, ruta_modelo=args.modelo))
+        print(f"💾 Artefacto guardado como: {args.salida} "
+              f"({bosque.n_arboles} árboles, {len(bosque.caracteristica)} nodos)")
+        return
+
+    resultado = benchmark(modelo)
+    print("⏱️ Benchmark bosque compilado vs RandomForestRegressor.predict")
+    print(f"   • Un punto  : sklearn {resultado['sklearn_punto_us']:.1f} µs | "
+          f"compilado {resultado['compilado_punto_us']:.1f} µs "
+          f"(×{resultado['sklearn_punto_us'] / resultado['compilado_punto_us']:.0f})")
+    print(f"   • Lote de 64: sklearn {resultado['sklearn_lote64_us']:.0f} µs | "
+          f"compilado {resultado['compilado_lote64_us']:.0f} µs")
+    print(f"   • Lote 100k : sklearn {resultado['sklearn_lote_us']:.2f} µs/punto | "
+          f"compilado {resultado['compilado_lote_us']:.2f} µs/punto")
+    print(f"   • Resultados idénticos: lote {'✅' if resultado['identico_lote'] else '❌'} | "
+          f"punto {'✅' if resultado['identico_punto'] else '❌'}")
+
+
+if __name__ == "__main__":
+    main()
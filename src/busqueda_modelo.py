@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Búsqueda de hiperparámetros del modelo de riesgo de zona, sin interfaz gráfica.
+
+Evalúa con validación cruzada (k pliegues sobre la partición de entrenamiento
+de Modelo.py) cada combinación de la rejilla, repartiendo las (combinación,
+pliegue) entre procesos. Los pliegues se guardan en caché por hash del
+dataset, así que dos búsquedas sobre el mismo dataset se comparan con los
+mismos pliegues. Después mide la latencia de un punto de cada combinación con
+el bosque compilado (lo que usa el servidor) y elige con un objetivo explícito:
+la combinación más rápida cuyo error de validación está dentro de
+`tolerancia` del mejor.
+
+Las gráficas (error vs latencia y predicciones vs reales) se guardan como PNG.
+
+cmd:
+python busqueda_modelo.py                                  # todos los núcleos, rejilla por defecto
+python busqueda_modelo.py --arboles 25 50 100 --profundidades 8 10 --tolerancia 0.02
+python busqueda_modelo.py --guardar                        # entrena y guarda el modelo elegido
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import KFold
+
+from bosque_compilado import BosqueCompilado, hash_entrenamiento
+
+script_dir = Path(__file__).resolve().parent
+
+# Rejilla por defecto
+ARBOLES = (10, 25, 50, 100, 200)
+PROFUNDIDADES = (6, 8, 10, 12)
+HOJA_MINIMA = (1, 2)
+
+PLIEGUES = 5
+
+# Error de validación (RMSE) aceptado respecto a la mejor combinación a cambio de
+# menor latencia (0.02 = hasta 2 % peor)
+TOLERANCIA = 0.02
+
+# Puntos de CDMX con los que se mide la latencia de un punto
+PUNTOS_LATENCIA = 300
+
+# Caché de los pliegues (un archivo por dataset, número de pliegues y semilla)
+CACHE_DIR = script_dir / ".cache_busqueda"
+
+
+def rejilla(arboles=ARBOLES, profundidades=PROFUNDIDADES, hoja_minima=HOJA_MINIMA):
+    """Combinaciones de hiperparámetros a evaluar (lista de dicts)"""
+    return [{'n_estimators': n, 'max_depth': p, 'min_samples_leaf': h}
+            for n, p, h in itertools.product(arboles, profundidades, hoja_minima)]
+
+
+def pliegues(n_filas, ruta_dataset, k=PLIEGUES, semilla=42, cache_dir=CACHE_DIR):
+    """
+    Índices (entrenamiento, validación) de k pliegues sobre `n_filas` filas,
+    leídos de la caché si ya se calcularon para este dataset.
+
+    Returns:
+        list: [(np.ndarray, np.ndarray), ...]
+    """
+    clave = hash_entrenamiento(ruta_dataset)[:16]
+    ruta = Path(cache_dir) / f"pliegues_{clave}_n{n_filas}_k{k}_s{semilla}.npz"
+    if ruta.exists():
+        with np.load(ruta) as datos:
+            return [(datos[f'entrenamiento_{i}'], datos[f'validacion_{i}']) for i in range(k)]
+    resultado = list(KFold(n_splits=k, shuffle=True, random_state=semilla).split(np.arange(n_filas)))
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    arreglos = {}
+    for i, (entrenamiento, validacion) in enumerate(resultado):
+        arreglos[f'entrenamiento_{i}'], arreglos[f'validacion_{i}'] = entrenamiento, validacion
+    np.savez(ruta, **arreglos)
+    return resultado
+
+
+# Datos de entrenamiento de cada proceso (se envían una sola vez al crearlo)
+_datos = None
+
+
+def _iniciar_trabajador(X, y):
+    global _datos
+    _datos = (X, y)
+
+
+def _evaluar(tarea):
+    """
+    Entrena una combinación en un pliegue.
+
+    Returns:
+        dict: combinación, pliegue, error cuadrático, segundos y (solo en el
+            pliegue 0) el bosque compilado para medir la latencia después
+    """
+    indice, parametros, pliegue, entrenamiento, validacion, semilla = tarea
+    X, y = _datos
+    inicio = time.perf_counter()
+    modelo = RandomForestRegressor(random_state=semilla, n_jobs=1, **parametros)
+    modelo.fit(X[entrenamiento], y[entrenamiento])
+    segundos = time.perf_counter() - inicio
+    error = modelo.predict(X[validacion]) - y[validacion]
+    return {
+        'indice': indice,
+        'pliegue': pliegue,
+        'sse': float(np.dot(error, error)),
+        'n': len(validacion),
+        'segundos': segundos,
+        'bosque': BosqueCompilado.desde_modelo(modelo, listas=False) if pliegue == 0 else None,
+    }
+
+
+def medir_latencia(bosque, puntos, rondas=3):
+    """Mediana (µs) de predecir_punto sobre `puntos`, igual que en el servidor"""
+    tiempos = []
+    for _ in range(rondas):
+        inicio = time.perf_counter()
+        for latitud, longitud in puntos:
+            bosque.predecir_punto(latitud, longitud)
+        tiempos.append((time.perf_counter() - inicio) / len(puntos) * 1e6)
+    return float(np.median(tiempos))
+
+
+def buscar(X, y, combinaciones, particiones, procesos=None, semilla=42):
+    """
+    Validación cruzada de todas las combinaciones y latencia de cada una.
+
+    Args:
+        X (np.ndarray): (n, 2) latitud, longitud
+        y (np.ndarray): Scores de zona
+        combinaciones (list): Ver rejilla()
+        particiones (list): Ver pliegues()
+        procesos (int, opcional): Procesos (por defecto todos los núcleos; 1 = en este proceso)
+        semilla (int): random_state de los bosques
+
+    Returns:
+        list: Un dict por combinación con parametros, rmse, rmse_pliegues,
+            latencia_us y segundos_entrenamiento
+    """
+    procesos = procesos or os.cpu_count() or 1
+    tareas = [(i, parametros, j, entrenamiento, validacion, semilla)
+              for i, parametros in enumerate(combinaciones)
+              for j, (entrenamiento, validacion) in enumerate(particiones)]
+
+    if procesos == 1:
+        _iniciar_trabajador(X, y)
+        evaluaciones = list(map(_evaluar, tareas))
+    else:
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_trabajador,
+                                 initargs=(X, y)) as ejecutor:
+            evaluaciones = list(ejecutor.map(_evaluar, tareas, chunksize=max(1, len(tareas) // (procesos * 4))))
+
+    # Latencia en este proceso y sin otros trabajos corriendo, para que sea comparable
+    rng = np.random.default_rng(semilla)
+    puntos = np.column_stack([rng.uniform(X[:, 0].min(), X[:, 0].max(), PUNTOS_LATENCIA),
+                              rng.uniform(X[:, 1].min(), X[:, 1].max(), PUNTOS_LATENCIA)]).tolist()
+    resultados = []
+    for i, parametros in enumerate(combinaciones):
+        propias = [e for e in evaluaciones if e['indice'] == i]
+        bosque = next(e['bosque'] for e in propias if e['bosque'] is not None)
+        resultados.append({
+            'parametros': parametros,
+            'rmse': float(np.sqrt(sum(e['sse'] for e in propias) / sum(e['n'] for e in propias))),
+            'rmse_pliegues': [float(np.sqrt(e['sse'] / e['n'])) for e in sorted(propias, key=lambda e: e['pliegue'])],
+            'latencia_us': medir_latencia(bosque, puntos),
+            'nodos': int(len(bosque.caracteristica)),
+            'segundos_entrenamiento': float(np.mean([e['segundos'] for e in propias])),
+        })
+    return resultados
+
+
+def elegir(resultados, tolerancia=TOLERANCIA):
+    """
+    Objetivo precisión vs latencia: entre las combinaciones con RMSE a lo más
+    (1 + tolerancia) veces el mejor, la de menor latencia (empate: menor RMSE).
+
+    Returns:
+        dict: Resultado elegido
+    """
+    mejor_rmse = min(r['rmse'] for r in resultados)
+    aceptables = [r for r in resultados if r['rmse'] <= mejor_rmse * (1 + tolerancia)]
+    return min(aceptables, key=lambda r: (r['latencia_us'], r['rmse']))
+
+
+def frontera_pareto(resultados):
+    """Combinaciones que ninguna otra supera a la vez en RMSE y latencia, de la más rápida a la más lenta"""
+    frontera = []
+    for r in sorted(resultados, key=lambda r: (r['latencia_us'], r['rmse'])):
+        if not frontera or r['rmse'] < frontera[-1]['rmse']:
+            frontera.append(r)
+    return frontera
+
+
+def graficar(resultados, elegido, y_prueba, y_pred, directorio):
+    """
+    Guarda error vs latencia y predicciones vs reales como PNG (backend Agg).
+
+    Returns:
+        list: Rutas de las gráficas
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    directorio = Path(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    rutas = []
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.scatter([r['latencia_us'] for r in resultados], [r['rmse'] for r in resultados], alpha=0.5, label='Combinaciones')
+    frontera = frontera_pareto(resultados)
+    ax.plot([r['latencia_us'] for r in frontera], [r['rmse'] for r in frontera], 'g-', lw=1, label='Frontera de Pareto')
+    ax.scatter([elegido['latencia_us']], [elegido['rmse']], color='red', s=80, zorder=3, label='Elegida')
+    ax.set_xscale('log')
+    ax.set_xlabel('Latencia de un punto (µs, bosque compilado)')
+    ax.set_ylabel('RMSE de validación cruzada')
+    ax.set_title('Precisión vs latencia')
+    ax.grid(True, alpha=0.3)
+    ax.legend()
+    rutas.append(directorio / "busqueda_error_vs_latencia.png")
+    fig.savefig(rutas[-1], dpi=120, bbox_inches='tight')
+    plt.close(fig)
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.scatter(y_prueba, y_pred, alpha=0.6)
+    ax.plot([y_prueba.min(), y_prueba.max()], [y_prueba.min(), y_prueba.max()], 'r--', lw=2)
+    ax.set_xlabel('Riesgo Real')
+    ax.set_ylabel('Riesgo Predicho')
+    ax.set_title('Predicciones vs Valores Reales - Riesgo de Zona (modelo elegido)')
+    ax.grid(True, alpha=0.3)
+    rutas.append(directorio / "busqueda_predicciones_vs_reales.png")
+    fig.savefig(rutas[-1], dpi=120, bbox_inches='tight')
+    plt.close(fig)
+    return rutas
+
+
+def _describir(parametros):
+    return (f"{parametros['n_estimators']:4d} árboles, profundidad {str(parametros['max_depth']):>4s}, "
+            f"hoja mínima {parametros['min_samples_leaf']}")
+
+
+def main():
+    import Modelo
+
+    parser = argparse.ArgumentParser(description="Búsqueda de hiperparámetros (validación cruzada en paralelo)")
+    parser.add_argument("--dataset", default=str(Modelo.dataset_path))
+    parser.add_argument("--arboles", type=int, nargs="+", default=list(ARBOLES))
+    parser.add_argument("--profundidades", type=int, nargs="+", default=list(PROFUNDIDADES))
+    parser.add_argument("--hoja-minima", type=int, nargs="+", default=list(HOJA_MINIMA))
+    parser.add_argument("--pliegues", type=int, default=PLIEGUES)
+    parser.add_argument("--procesos", type=int, default=None, help="Por defecto todos los núcleos")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA,
+                        help="RMSE extra aceptado a cambio de menor latencia (0.02 = 2%%)")
+    parser.add_argument("--salida", default=str(script_dir / "busqueda_resultados.json"),
+                        help="JSON con los resultados de todas las combinaciones")
+    parser.add_argument("--graficas", default=str(script_dir / "graficas"), help="Directorio de las gráficas")
+    parser.add_argument("--guardar", action="store_true",
+                        help="Entrenar la combinación elegida y guardarla como el modelo activo")
+    args = parser.parse_args()
+
+    df = Modelo.cargar_dataset(args.dataset)
+    X_train, X_test, y_train, y_test = Modelo.dividir(df)
+    X, y = X_train.to_numpy(np.float64), y_train.to_numpy(np.float64)
+
+    combinaciones = rejilla(args.arboles, args.profundidades, args.hoja_minima)
+    particiones = pliegues(len(X), args.dataset, args.pliegues, Modelo.SEMILLA)
+    procesos = args.procesos or os.cpu_count() or 1
+    print(f"\n🔎 {len(combinaciones)} combinaciones × {len(particiones)} pliegues "
+          f"= {len(combinaciones) * len(particiones)} entrenamientos en {procesos} procesos...")
+    inicio = time.perf_counter()
+    resultados = buscar(X, y, combinaciones, particiones, procesos, Modelo.SEMILLA)
+    print(f"⏱️  Búsqueda completa en {time.perf_counter() - inicio:.1f} s")
+
+    elegido = elegir(resultados, args.tolerancia)
+    mejor = min(resultados, key=lambda r: r['rmse'])
+    print(f"\n📈 Frontera precisión vs latencia:")
+    for r in frontera_pareto(resultados):
+        marca = "👉" if r is elegido else "  "
+        print(f"   {marca} {_describir(r['parametros'])} | RMSE ±{r['rmse']:.2f} | {r['latencia_us']:8.1f} µs/punto")
+    print(f"\n🏆 Más precisa: {_describir(mejor['parametros'])} (RMSE ±{mejor['rmse']:.2f}, "
+          f"{mejor['latencia_us']:.1f} µs)")
+    print(f"✅ Elegida (tolerancia {args.tolerancia:.0%}): {_describir(elegido['parametros'])} "
+          f"(RMSE ±{elegido['rmse']:.2f}, {elegido['latencia_us']:.1f} µs, "
+          f"×{mejor['latencia_us'] / elegido['latencia_us']:.1f} más rápida)")
+
+    # Evaluación final en la partición de prueba (nunca se usó en la búsqueda)
+    modelo = Modelo.ajustar(Modelo.crear_modelo(**elegido['parametros']), X_train, y_train)
+    metricas = Modelo.evaluar(modelo, X_test, y_test)
+    print(f"📊 Prueba: R² {metricas['r2']:.3f} | Error promedio ±{metricas['rmse']:.2f} puntos de riesgo")
+
+    for ruta in graficar(resultados, elegido, y_test.to_numpy(), modelo.predict(X_test), args.graficas):
+        print(f"🖼️  Gráfica guardada como: {ruta}")
+    reporte = {
+        'dataset': Path(args.dataset).name,
+        'pliegues': len(particiones),
+        'tolerancia': args.tolerancia,
+        'elegido': elegido['parametros'],
+        'prueba': metricas,
+        'resultados': resultados,
+    }
+    Path(args.salida).write_text(json.dumps(reporte, indent=2) + "\n", encoding="utf-8")
+    print(f"💾 Resultados guardados como: {args.salida}")
+
+    if args.guardar:
+        Modelo.guardar_modelo(modelo, df, Modelo.model_path, args.dataset)
+
+
+if __name__ == "__main__":
+    main()
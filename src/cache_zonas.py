@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Decimales de las coordenadas en la clave (5 ≈ 1.1 m en CDMX)
+PRECISION = 5
+
+# Entradas máximas; al llenarse se desaloja la usada hace más tiempo
+MAX_ENTRADAS = 10000
+
+
+class CacheZonas:
+    """
+    Caché acotada (LRU, con TTL opcional) de scores de zona por coordenadas cuantizadas.
+
+    Las unidades móviles y los sensores fijos consultan una y otra vez las
+    mismas coordenadas (o casi): con la caché, una consulta repetida es una
+    búsqueda en un diccionario en vez de dataset → raster → modelo. La clave son
+    las coordenadas redondeadas a `precision` decimales, así que todas las
+    consultas de una celda reciben el score de la primera que se calculó en ella.
+
+    Cada consulta trae la versión del predictor (modelo + datos); si cambia, la
+    caché se vacía antes de responder y nunca mezcla scores de dos versiones.
+    Es segura entre hilos; el cálculo de un fallo se hace fuera del candado.
+    """
+
+    def __init__(self, precision=PRECISION, max_entradas=MAX_ENTRADAS, ttl_s=None):
+        """
+        Args:
+            precision (int): Decimales de las coordenadas en la clave
+            max_entradas (int): Entradas máximas antes de desalojar
+            ttl_s (float, opcional): Segundos que vale una entrada (None = sin vencimiento)
+        """
+        if max_entradas < 1:
+            raise ValueError("max_entradas debe ser al menos 1")
+        self.precision = precision
+        self.max_entradas = max_entradas
+        self.ttl_s = ttl_s
+        self._escala = 10.0 ** precision
+        self._entradas = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self._aciertos = 0
+        self._fallos = 0
+        self._desalojos = 0
+        self._vencidas = 0
+        self._invalidaciones = 0
+
+    def clave(self, latitud, longitud):
+        """Coordenadas cuantizadas a `precision` decimales (enteros)"""
+        return (round(latitud * self._escala), round(longitud * self._escala))
+
+    def obtener(self, latitud, longitud, version, calcular):
+        """
+        Score de la celda de (latitud, longitud); si no está en caché (o venció)
+        se calcula con `calcular(latitud, longitud)` y se guarda.
+
+        Args:
+            latitud (float): Latitud de la ubicación
+            longitud (float): Longitud de la ubicación
+            version (str): Versión del predictor con el que se calcula
+            calcular (callable): Función (latitud, longitud) → score
+
+        Returns:
+            float: Score de riesgo de zona
+        """
+        clave = self.clave(latitud, longitud)
+        with self._lock:
+            if version != self._version:
+                self._invalidar(version)
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                score, vence = entrada
+                if vence is None or vence > time.monotonic():
+                    self._entradas.move_to_end(clave)
+                    self._aciertos += 1
+                    return score
+                del self._entradas[clave]
+                self._vencidas += 1
+            self._fallos += 1
+
+        score = calcular(latitud, longitud)
+        vence = None if self.ttl_s is None else time.monotonic() + self.ttl_s
+        with self._lock:
+            # Si mientras tanto cambió la versión, este score ya no se guarda
+            if version == self._version:
+                self._entradas[clave] = (score, vence)
+                self._entradas.move_to_end(clave)
+                if len(self._entradas) > self.max_entradas:
+                    self._entradas.popitem(last=False)
+                    self._desalojos += 1
+        return score
+
+    def _invalidar(self, version):
+        if self._version is not None:
+            self._invalidaciones += 1
+        self._entradas.clear()
+        self._version = version
+
+    def limpiar(self):
+        """Vacía la caché (las estadísticas se conservan)"""
+        with self._lock:
+            self._invalidar(None)
+
+    def estadisticas(self):
+        """
+        Returns:
+            dict: entradas, aciertos, fallos, desalojos, vencidas, invalidaciones y tasa_aciertos
+        """
+        with self._lock:
+            consultas = self._aciertos + self._fallos
+            return {
+                'entradas': len(self._entradas),
+                'aciertos': self._aciertos,
+                'fallos': self._fallos,
+                'desalojos': self._desalojos,
+                'vencidas': self._vencidas,
+                'invalidaciones': self._invalidaciones,
+                'tasa_aciertos': self._aciertos / consultas if consultas else 0.0,
+            }
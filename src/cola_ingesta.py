@@ -0,0 +1,138 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Lecturas que se pueden acumular antes de responder 503 al sensor
+MAX_PENDIENTES = 1000
+
+# Hilos que procesan lecturas (predicción + alertas)
+N_TRABAJADORES = 2
+
+# Esperas recientes con las que se calculan los percentiles
+MUESTRAS_ESPERA = 2048
+
+
+class ColaIngesta:
+    """
+    Cola acotada de lecturas con un grupo de hilos trabajadores.
+
+    `encolar` solo guarda la lectura y regresa de inmediato, así la respuesta
+    HTTP no espera al modelo. Si la cola está llena devuelve False y quien la
+    usa responde 503 (back-pressure explícito en lugar de acumular memoria).
+    """
+
+    def __init__(self, procesar, max_pendientes=MAX_PENDIENTES, n_trabajadores=N_TRABAJADORES):
+        """
+        Args:
+            procesar (callable): f(lectura) que hace la predicción y las alertas
+            max_pendientes (int): Tamaño máximo de la cola
+            n_trabajadores (int): Hilos que consumen la cola
+        """
+        self._procesar = procesar
+        self.max_pendientes = int(max_pendientes)
+        self.n_trabajadores = int(n_trabajadores)
+        self._cola = queue.Queue(maxsize=self.max_pendientes)
+        self._hilos = []
+        self._lock = threading.Lock()
+        self._esperas = deque(maxlen=MUESTRAS_ESPERA)
+        self._contadores = {'encoladas': 0, 'rechazadas': 0, 'procesadas': 0, 'errores': 0}
+        self._espera_max = 0.0
+        self._profundidad_max = 0
+
+    def __len__(self):
+        return self._cola.qsize()
+
+    def iniciar(self):
+        """Arranca los hilos trabajadores (idempotente)"""
+        with self._lock:
+            if self._hilos:
+                return self
+            for i in range(self.n_trabajadores):
+                hilo = threading.Thread(target=self._trabajar, name=f"ingesta-{i}", daemon=True)
+                hilo.start()
+                self._hilos.append(hilo)
+        return self
+
+    def encolar(self, lectura):
+        """
+        Agrega una lectura a la cola sin bloquear.
+
+        Returns:
+            bool: False si la cola está llena (la lectura se descarta)
+        """
+        try:
+            self._cola.put_nowait((time.perf_counter(), lectura))
+        except queue.Full:
+            with self._lock:
+                self._contadores['rechazadas'] += 1
+            return False
+        with self._lock:
+            self._contadores['encoladas'] += 1
+            self._profundidad_max = max(self._profundidad_max, self._cola.qsize())
+        return True
+
+    def _trabajar(self):
+        while True:
+            elemento = self._cola.get()
+            if elemento is None:
+                self._cola.task_done()
+                return
+            encolado, lectura = elemento
+            espera = time.perf_counter() - encolado
+            try:
+                self._procesar(lectura)
+                error = False
+            except Exception:
+                logger.exception(f"Error procesando lectura {lectura}")
+                error = True
+            with self._lock:
+                self._esperas.append(espera)
+                self._espera_max = max(self._espera_max, espera)
+                self._contadores['errores' if error else 'procesadas'] += 1
+            self._cola.task_done()
+
+    def esperar(self):
+        """Bloquea hasta que todas las lecturas encoladas se hayan procesado"""
+        self._cola.join()
+
+    def detener(self):
+        """Procesa lo pendiente y detiene los hilos"""
+        with self._lock:
+            hilos, self._hilos = self._hilos, []
+        for _ in hilos:
+            self._cola.put(None)
+        for hilo in hilos:
+            hilo.join()
+
+    def estadisticas(self):
+        """
+        Profundidad de la cola, contadores y tiempos de espera en cola.
+
+        Returns:
+            dict: profundidad, max_pendientes, contadores y espera_ms
+                  (media, p50, p99 de las últimas lecturas y máximo histórico)
+        """
+        with self._lock:
+            esperas = np.array(self._esperas) * 1000
+            resumen = dict(self._contadores)
+            espera_max = self._espera_max * 1000
+            profundidad_max = self._profundidad_max
+        resumen.update({
+            'profundidad': self._cola.qsize(),
+            'profundidad_max': profundidad_max,
+            'max_pendientes': self.max_pendientes,
+            'trabajadores': self.n_trabajadores,
+            'espera_ms': {
+                'media': round(float(esperas.mean()), 3) if esperas.size else 0.0,
+                'p50': round(float(np.percentile(esperas, 50)), 3) if esperas.size else 0.0,
+                'p99': round(float(np.percentile(esperas, 99)), 3) if esperas.size else 0.0,
+                'max': round(espera_max, 3),
+            },
+        })
+        return resumen
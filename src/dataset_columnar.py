@@ -0,0 +1,212 @@
+import logging
+from pathlib import Path
+
+import numpy as np
+
+from bosque_compilado import hash_entrenamiento
+
+logger = logging.getLogger(__name__)
+
+# Versión del formato del archivo .npz del dataset columnar
+VERSION_COLUMNAR = 1
+
+COLUMNAS = ['latitud', 'longitud', 'intensidad_mm', 'area_inundable_pct',
+            'riesgo_zona_score', 'nivel_riesgo_zona']
+
+# Columnas que se guardan tal cual en float64: las coordenadas deben conservar todos
+# sus dígitos para que coincidan las búsquedas con tolerancia y el modelo entrenado
+COLUMNAS_EXACTAS = ('latitud', 'longitud')
+
+# Máximo de valores distintos para guardar una columna como categórica (códigos + categorías)
+MAX_CATEGORIAS = 65535
+
+
+def ruta_columnar(ruta_csv):
+    """dataset_procesado.csv → dataset_procesado.npz"""
+    return Path(ruta_csv).with_suffix(".npz")
+
+
+def _codificar(valores):
+    """Códigos uint8/uint16 y categorías si hay pocos valores distintos, si no None"""
+    categorias, codigos = np.unique(valores, return_inverse=True)
+    if len(categorias) > MAX_CATEGORIAS:
+        return None
+    tipo = np.uint8 if len(categorias) <= 256 else np.uint16
+    return codigos.astype(tipo), categorias
+
+
+def guardar_columnar(columnas, ruta, ruta_csv=None):
+    """
+    Guarda el dataset procesado como .npz sin comprimir.
+
+    Las coordenadas quedan en float64; las demás columnas, que en el dataset
+    solo toman unos cuantos valores (rangos de intensidad y área, su score y
+    el nivel), se guardan como códigos uint8/uint16 más sus categorías, así
+    que se decodifican sin pérdida.
+
+    Args:
+        columnas (dict | pd.DataFrame): Columnas de COLUMNAS
+        ruta (str | Path): Archivo .npz de salida
+        ruta_csv (str | Path, opcional): CSV equivalente; se guardan su tamaño, su
+            fecha de modificación y su SHA-256 para detectar si el CSV cambió
+            después (ver vigente)
+    """
+    arreglos = {'version': np.int32(VERSION_COLUMNAR)}
+    if ruta_csv is not None and Path(ruta_csv).exists():
+        estado = Path(ruta_csv).stat()
+        arreglos['tam_csv'] = np.int64(estado.st_size)
+        arreglos['mtime_csv'] = np.int64(estado.st_mtime_ns)
+        arreglos['hash_csv'] = np.str_(hash_entrenamiento(ruta_csv))
+    for nombre in COLUMNAS:
+        valores = np.asarray(columnas[nombre])
+        if nombre == 'nivel_riesgo_zona':
+            valores = valores.astype(str)
+        elif nombre not in COLUMNAS_EXACTAS:
+            valores = valores.astype(np.float64)
+        codificado = None if nombre in COLUMNAS_EXACTAS else _codificar(valores)
+        if codificado is None:
+            arreglos[nombre] = np.ascontiguousarray(valores, dtype=np.float64)
+        else:
+            arreglos[f'{nombre}__codigos'], arreglos[f'{nombre}__categorias'] = codificado
+    np.savez(Path(ruta), **arreglos)
+
+
+def csv_a_columnar(ruta_csv, tam_bloque=None):
+    """
+    Genera el .npz columnar a partir del CSV procesado.
+
+    Se parte del CSV ya escrito (y no de los valores en memoria) para que las
+    columnas sean exactamente las que obtiene quien lee el CSV con pandas.
+
+    Args:
+        ruta_csv (str | Path): dataset_procesado.csv
+        tam_bloque (int, opcional): Leer el CSV por bloques de estas filas
+
+    Returns:
+        Path: Ruta del .npz
+    """
+    import pandas as pd
+
+    partes = {nombre: [] for nombre in COLUMNAS}
+    bloques = pd.read_csv(Path(ruta_csv), usecols=COLUMNAS, chunksize=tam_bloque) if tam_bloque else \
+        [pd.read_csv(Path(ruta_csv), usecols=COLUMNAS)]
+    for bloque in bloques:
+        for nombre in COLUMNAS:
+            partes[nombre].append(bloque[nombre].to_numpy(dtype=str if nombre == 'nivel_riesgo_zona' else np.float64))
+    columnas = {nombre: np.concatenate(valores) for nombre, valores in partes.items()}
+    guardar_columnar(columnas, ruta_columnar(ruta_csv), ruta_csv)
+    return ruta_columnar(ruta_csv)
+
+
+def cargar_columnar(ruta, columnas=None, decodificar=True):
+    """
+    Lee un .npz de guardar_columnar.
+
+    Args:
+        ruta (str | Path): Archivo .npz
+        columnas (list, opcional): Solo estas columnas (por defecto todas)
+        decodificar (bool): False devuelve las categóricas como (códigos, categorías)
+
+    Returns:
+        dict: nombre → np.ndarray (o tupla (códigos, categorías))
+    """
+    with np.load(Path(ruta)) as datos:
+        version = int(datos['version'])
+        if version != VERSION_COLUMNAR:
+            raise ValueError(f"Versión de dataset columnar no soportada: {version}")
+        resultado = {}
+        for nombre in columnas or COLUMNAS:
+            if nombre in datos:
+                resultado[nombre] = datos[nombre]
+                continue
+            codigos, categorias = datos[f'{nombre}__codigos'], datos[f'{nombre}__categorias']
+            resultado[nombre] = categorias[codigos] if decodificar else (codigos, categorias)
+        return resultado
+
+
+# (npz, tamaño y fecha del npz y del CSV) → resultado de vigente, para no volver a
+# calcular el SHA-256 del mismo CSV en cada recarga del proceso
+_verificados = {}
+
+
+def vigente(ruta_csv):
+    """
+    True si existe el .npz del CSV y corresponde a él (mismo contenido del CSV
+    al guardarse, o el CSV ya no existe). Un tamaño distinto lo descarta de
+    inmediato y mismo tamaño y fecha de modificación lo aceptan sin leer el
+    CSV; solo si la fecha cambió (p. ej. tras un git checkout) se compara el
+    SHA-256, así una edición que conserva el largo (39.2 → 48.4) también se detecta.
+    """
+    ruta_csv, ruta_npz = Path(ruta_csv), ruta_columnar(ruta_csv)
+    if not ruta_npz.exists():
+        return False
+    if not ruta_csv.exists():
+        return True
+    estado_csv, estado_npz = ruta_csv.stat(), ruta_npz.stat()
+    clave = (str(ruta_npz), estado_npz.st_size, estado_npz.st_mtime_ns, estado_csv.st_size, estado_csv.st_mtime_ns)
+    if clave not in _verificados:
+        with np.load(ruta_npz) as datos:
+            guardado = {c: datos[c].item() for c in ('tam_csv', 'mtime_csv', 'hash_csv') if c in datos}
+        if guardado.get('tam_csv') != estado_csv.st_size:
+            _verificados[clave] = False
+        elif guardado.get('mtime_csv') == estado_csv.st_mtime_ns:
+            _verificados[clave] = True
+        else:
+            _verificados[clave] = guardado.get('hash_csv') == hash_entrenamiento(ruta_csv)
+    if not _verificados[clave]:
+        logger.warning(f"⚠️ {ruta_npz.name} no corresponde a {ruta_csv.name} (se modificó el CSV); "
+                       f"se usa el CSV. Regenera ambos con: python3 procesar_dataset.py")
+        return False
+    return True
+
+
+def leer_columnas(ruta_csv, columnas=None):
+    """
+    Columnas del dataset procesado; prefiere el .npz columnar y si no existe (o
+    no corresponde al CSV) lee el CSV.
+
+    Returns:
+        tuple: (dict nombre → np.ndarray, ruta del archivo leído)
+    """
+    columnas = columnas or COLUMNAS
+    if vigente(ruta_csv):
+        return cargar_columnar(ruta_columnar(ruta_csv), columnas), ruta_columnar(ruta_csv)
+    import pandas as pd
+
+    dataset = pd.read_csv(Path(ruta_csv), usecols=columnas)
+    return {nombre: dataset[nombre].to_numpy() for nombre in columnas}, Path(ruta_csv)
+
+
+def leer_dataframe(ruta_csv):
+    """
+    Dataset procesado como DataFrame (para entrenar); prefiere el .npz columnar.
+    `nivel_riesgo_zona` queda como categórica.
+
+    Returns:
+        tuple: (pd.DataFrame, ruta del archivo leído)
+    """
+    import pandas as pd
+
+    if not vigente(ruta_csv):
+        return pd.read_csv(Path(ruta_csv)), Path(ruta_csv)
+    datos = cargar_columnar(ruta_columnar(ruta_csv), decodificar=False)
+    df = pd.DataFrame({nombre: valores for nombre, valores in datos.items() if not isinstance(valores, tuple)})
+    for nombre, valores in datos.items():
+        if isinstance(valores, tuple):
+            codigos, categorias = valores
+            if nombre == 'nivel_riesgo_zona':
+                df[nombre] = pd.Categorical.from_codes(codigos, categorias.astype(object))
+            else:
+                df[nombre] = categorias[codigos]
+    return df[COLUMNAS], ruta_columnar(ruta_csv)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Genera el .npz columnar a partir del CSV procesado")
+    parser.add_argument("csv", nargs="?", default=str(Path(__file__).resolve().parent / "dataset_procesado.csv"))
+    parser.add_argument("--bloques", type=int, metavar="FILAS", help="Leer el CSV por bloques de FILAS filas")
+    args = parser.parse_args()
+    ruta = csv_a_columnar(args.csv, args.bloques)
+    print(f"💾 Versión columnar guardada como: {ruta}")
@@ -0,0 +1,141 @@
+import math
+import threading
+from collections import deque
+
+# Constante de tiempo del promedio exponencial (segundos)
+TAU_EWMA_S = 60.0
+
+# Ventanas (segundos) de mínimo/máximo móvil: 5 min y 1 h
+VENTANAS_S = (300, 3600)
+
+
+class VentanaMinMax:
+    """
+    Mínimo y máximo de los valores de los últimos `ventana_s` segundos.
+
+    Usa dos deques monótonas: cada valor entra y sale a lo más una vez, así
+    que actualizar cuesta O(1) amortizado sin importar cuántas lecturas caben
+    en la ventana.
+    """
+
+    def __init__(self, ventana_s):
+        self.ventana_s = float(ventana_s)
+        self._minimos = deque()  # (ts, valor) con valores crecientes
+        self._maximos = deque()  # (ts, valor) con valores decrecientes
+
+    def agregar(self, ts, valor):
+        while self._minimos and self._minimos[-1][1] >= valor:
+            self._minimos.pop()
+        self._minimos.append((ts, valor))
+        while self._maximos and self._maximos[-1][1] <= valor:
+            self._maximos.pop()
+        self._maximos.append((ts, valor))
+
+        limite = ts - self.ventana_s
+        while self._minimos[0][0] < limite:
+            self._minimos.popleft()
+        while self._maximos[0][0] < limite:
+            self._maximos.popleft()
+
+    @property
+    def minimo(self):
+        return self._minimos[0][1] if self._minimos else None
+
+    @property
+    def maximo(self):
+        return self._maximos[0][1] if self._maximos else None
+
+
+class EstadisticasSensor:
+    """
+    Estado incremental de un sensor: promedio exponencial (EWMA) del
+    porcentaje, mínimo/máximo en ventanas móviles y tasa de subida en %/min.
+
+    Cada lectura se procesa en tiempo constante sin releer el historial. El
+    EWMA usa un peso que depende del tiempo transcurrido (1 - e^(-Δt/τ)), así
+    lecturas irregulares pesan según su separación real. La tasa de subida es
+    el EWMA de la pendiente entre lecturas consecutivas.
+    """
+
+    def __init__(self, tau_s=TAU_EWMA_S, ventanas_s=VENTANAS_S):
+        self.tau_s = float(tau_s)
+        self.ventanas = [VentanaMinMax(v) for v in ventanas_s]
+        self.n = 0
+        self.ts = None
+        self.pct = None
+        self.ewma_pct = None
+        self.tasa_subida = 0.0
+
+    def actualizar(self, ts, pct):
+        """
+        Agrega una lectura.
+
+        Args:
+            ts (float): Timestamp Unix de la lectura
+            pct (float): Porcentaje medido por el sensor
+
+        Returns:
+            dict: Estado después de la lectura (ver `resumen`)
+        """
+        ts, pct = float(ts), float(pct)
+        if self.ts is None:
+            self.ewma_pct = pct
+        else:
+            # Lecturas fuera de orden se tratan como simultáneas a la última
+            ts = max(ts, self.ts)
+            dt = ts - self.ts
+            alfa = 1.0 - math.exp(-dt / self.tau_s)
+            self.ewma_pct += alfa * (pct - self.ewma_pct)
+            if dt > 0:
+                pendiente = (pct - self.pct) / dt * 60.0
+                self.tasa_subida += alfa * (pendiente - self.tasa_subida)
+
+        for ventana in self.ventanas:
+            ventana.agregar(ts, pct)
+        self.ts, self.pct = ts, pct
+        self.n += 1
+        return self.resumen()
+
+    def resumen(self):
+        """
+        Returns:
+            dict: n, ewma_pct, tasa_subida (%/min) y min/max por ventana
+                  (claves pct_min_<s>s / pct_max_<s>s)
+        """
+        resumen = {
+            'n': self.n,
+            'ewma_pct': round(self.ewma_pct, 3) if self.ewma_pct is not None else None,
+            'tasa_subida': round(self.tasa_subida, 3),
+        }
+        for ventana in self.ventanas:
+            segundos = int(ventana.ventana_s)
+            resumen[f'pct_min_{segundos}s'] = ventana.minimo
+            resumen[f'pct_max_{segundos}s'] = ventana.maximo
+        return resumen
+
+
+class EstadisticasFlota:
+    """Estadísticas incrementales por sensor_id (thread-safe)"""
+
+    def __init__(self, tau_s=TAU_EWMA_S, ventanas_s=VENTANAS_S):
+        self.tau_s = tau_s
+        self.ventanas_s = ventanas_s
+        self._sensores = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sensores)
+
+    def actualizar(self, sensor_id, ts, pct):
+        """Agrega una lectura del sensor y devuelve su resumen"""
+        with self._lock:
+            estadisticas = self._sensores.get(sensor_id)
+            if estadisticas is None:
+                estadisticas = self._sensores[sensor_id] = EstadisticasSensor(self.tau_s, self.ventanas_s)
+            return estadisticas.actualizar(ts, pct)
+
+    def resumen(self, sensor_id):
+        """Resumen actual del sensor, o None si no ha enviado lecturas"""
+        with self._lock:
+            estadisticas = self._sensores.get(sensor_id)
+            return estadisticas.resumen() if estadisticas is not None else None
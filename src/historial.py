@@ -0,0 +1,384 @@
+import logging
+import re
+import sqlite3
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Lecturas por transacción (group commit)
+TAM_LOTE = 1000
+
+# Tiempo máximo que una lectura espera en memoria antes de escribirse (segundos)
+INTERVALO_S = 0.5
+
+# Lecturas en memoria antes de empezar a descartar (≈ 10 s a 10k lecturas/s)
+MAX_PENDIENTES = 100000
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS lecturas (
+    id INTEGER PRIMARY KEY,
+    sensor_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    v REAL,
+    pct REAL,
+    nivel_sensor INTEGER,
+    riesgo_score REAL,
+    alerta TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_lecturas_sensor_ts ON lecturas (sensor_id, ts);
+CREATE TABLE IF NOT EXISTS rollups (
+    resolucion INTEGER NOT NULL,
+    sensor_id TEXT NOT NULL,
+    inicio INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    v_min REAL,
+    v_max REAL,
+    v_suma REAL,
+    pct_min REAL,
+    pct_max REAL,
+    pct_suma REAL,
+    alerta_max INTEGER,
+    PRIMARY KEY (resolucion, sensor_id, inicio)
+) WITHOUT ROWID;
+"""
+
+COLUMNAS = ('sensor_id', 'ts', 'v', 'pct', 'nivel_sensor', 'riesgo_score', 'alerta')
+
+# Resoluciones (segundos) de los agregados que se mantienen al escribir: 1 min, 15 min, 1 h
+RESOLUCIONES = (60, 900, 3600)
+
+NIVELES_ALERTA = ('VERDE', 'AMARILLO', 'ROJO')
+NIVEL_ALERTA = {alerta: nivel for nivel, alerta in enumerate(NIVELES_ALERTA)}
+
+UNIDADES_TIEMPO = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Acumula un agregado nuevo sobre el existente (misma resolución, sensor y cubeta)
+UPSERT_ROLLUP = """
+INSERT INTO rollups (resolucion, sensor_id, inicio, n, v_min, v_max, v_suma,
+                     pct_min, pct_max, pct_suma, alerta_max)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (resolucion, sensor_id, inicio) DO UPDATE SET
+    n = n + excluded.n,
+    v_min = min(v_min, excluded.v_min),
+    v_max = max(v_max, excluded.v_max),
+    v_suma = v_suma + excluded.v_suma,
+    pct_min = min(pct_min, excluded.pct_min),
+    pct_max = max(pct_max, excluded.pct_max),
+    pct_suma = pct_suma + excluded.pct_suma,
+    alerta_max = max(alerta_max, excluded.alerta_max)
+"""
+
+
+def parsear_resolucion(valor):
+    """
+    Convierte "1m", "15m", "1h", "1d" o segundos ("300") a segundos.
+
+    Raises:
+        ValueError: Si el formato no es válido o la resolución no es positiva
+    """
+    coincidencia = re.fullmatch(r"\s*(\d+)\s*([smhd]?)\s*", str(valor))
+    if coincidencia is None or int(coincidencia.group(1)) <= 0:
+        raise ValueError(f"Resolución inválida: {valor}")
+    return int(coincidencia.group(1)) * UNIDADES_TIEMPO[coincidencia.group(2) or 's']
+
+
+def agregar_lote(filas):
+    """
+    Agregados por (resolución, sensor, cubeta) de un lote de lecturas.
+
+    Returns:
+        list[tuple]: Filas para UPSERT_ROLLUP
+    """
+    agregados = {}
+    for sensor_id, ts, v, pct, _, _, alerta in filas:
+        if not isinstance(ts, (int, float)):
+            continue
+        nivel = NIVEL_ALERTA.get(alerta, 0)
+        for resolucion in RESOLUCIONES:
+            clave = (resolucion, sensor_id, int(ts // resolucion) * resolucion)
+            a = agregados.get(clave)
+            if a is None:
+                agregados[clave] = [1, v, v, v, pct, pct, pct, nivel]
+            else:
+                a[0] += 1
+                a[1] = min(a[1], v)
+                a[2] = max(a[2], v)
+                a[3] += v
+                a[4] = min(a[4], pct)
+                a[5] = max(a[5], pct)
+                a[6] += pct
+                a[7] = max(a[7], nivel)
+    return [clave + tuple(a) for clave, a in agregados.items()]
+
+
+def conectar(ruta):
+    """Conexión SQLite en modo WAL (lectores concurrentes con un solo escritor)"""
+    conexion = sqlite3.connect(str(ruta), timeout=30)
+    conexion.execute("PRAGMA journal_mode=WAL")
+    # En WAL, NORMAL no hace fsync en cada commit (solo en los checkpoints)
+    conexion.execute("PRAGMA synchronous=NORMAL")
+    return conexion
+
+
+class HistorialLecturas:
+    """
+    Historial persistente de lecturas y alertas en SQLite.
+
+    `registrar` solo agrega la fila a un búfer en memoria; un hilo escritor
+    la guarda junto con las demás pendientes en una sola transacción (cada
+    `tam_lote` filas o cada `intervalo_s`), así la petición HTTP no paga
+    ninguna escritura a disco.
+    """
+
+    def __init__(self, ruta, tam_lote=TAM_LOTE, intervalo_s=INTERVALO_S, max_pendientes=MAX_PENDIENTES):
+        """
+        Args:
+            ruta (str | Path): Archivo SQLite
+            tam_lote (int): Filas por transacción
+            intervalo_s (float): Espera máxima de una fila en el búfer (segundos)
+            max_pendientes (int): Filas en el búfer antes de descartar
+        """
+        self.ruta = Path(ruta)
+        self.tam_lote = int(tam_lote)
+        self.intervalo_s = float(intervalo_s)
+        self.max_pendientes = int(max_pendientes)
+        self._pendientes = []
+        self._condicion = threading.Condition()
+        self._recibidas = 0
+        self._escritas = 0
+        self._rechazadas = 0
+        self._descartadas = 0
+        self._transacciones = 0
+        self._cerrado = False
+        self._lleno = False
+        self._vaciar = False
+
+        conexion = conectar(self.ruta)
+        with conexion:
+            conexion.executescript(ESQUEMA)
+            # Historial creado antes de los agregados: se calculan una vez a partir de las lecturas
+            if (conexion.execute("SELECT 1 FROM rollups LIMIT 1").fetchone() is None and
+                    conexion.execute("SELECT 1 FROM lecturas LIMIT 1").fetchone() is not None):
+                self._reconstruir_rollups(conexion)
+        conexion.close()
+
+        self._hilo = threading.Thread(target=self._escribir, name="historial", daemon=True)
+        self._hilo.start()
+
+    def registrar(self, sensor_id, ts, v, pct, nivel_sensor, riesgo_score, alerta):
+        """
+        Agrega una lectura al búfer (no bloquea).
+
+        Returns:
+            bool: False si el búfer está lleno y la lectura se descartó
+        """
+        return self.registrar_lote([(sensor_id, ts, v, pct, nivel_sensor, riesgo_score, alerta)]) == 1
+
+    def registrar_lote(self, filas):
+        """
+        Agrega varias lecturas al búfer (tuplas en el orden de COLUMNAS).
+
+        Returns:
+            int: Lecturas aceptadas
+        """
+        with self._condicion:
+            if self._cerrado:
+                raise RuntimeError("El historial está cerrado")
+            espacio = max(self.max_pendientes - len(self._pendientes), 0)
+            aceptadas = filas[:espacio] if len(filas) > espacio else filas
+            self._pendientes.extend(aceptadas)
+            self._recibidas += len(aceptadas)
+            if len(aceptadas) < len(filas):
+                self._descartadas += len(filas) - len(aceptadas)
+                if not self._lleno:
+                    # Un aviso por episodio; el total queda en estadisticas()['descartadas']
+                    logger.warning(f"Búfer del historial lleno ({self.max_pendientes}): descartando lecturas")
+                    self._lleno = True
+            if len(self._pendientes) >= self.tam_lote:
+                self._condicion.notify_all()
+        return len(aceptadas)
+
+    def _escribir(self):
+        conexion = conectar(self.ruta)
+        while True:
+            with self._condicion:
+                if len(self._pendientes) < self.tam_lote and not self._cerrado and not self._vaciar:
+                    self._condicion.wait(self.intervalo_s)
+                lote, self._pendientes = self._pendientes, []
+                self._lleno = self._vaciar = False
+                cerrar = self._cerrado
+            for inicio in range(0, len(lote), self.tam_lote):
+                escritas, rechazadas, transacciones = self._guardar_bloque(conexion, lote[inicio:inicio + self.tam_lote])
+                with self._condicion:
+                    self._escritas += escritas
+                    self._rechazadas += rechazadas
+                    self._transacciones += transacciones
+                    self._condicion.notify_all()
+            if cerrar:
+                conexion.close()
+                return
+
+    def _guardar_bloque(self, conexion, filas):
+        """
+        Guarda un bloque en una transacción; si SQLite lo rechaza, se reintenta
+        fila por fila para que una fila inválida no se lleve a las demás.
+
+        Returns:
+            tuple: (filas guardadas, filas rechazadas, transacciones confirmadas)
+        """
+        try:
+            with conexion:
+                self.guardar(conexion, filas)
+            return len(filas), 0, 1
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"Error guardando {len(filas)} lecturas en el historial ({e}); se reintenta una por una")
+        escritas = 0
+        for fila in filas:
+            try:
+                with conexion:
+                    self.guardar(conexion, [fila])
+                escritas += 1
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                logger.error(f"Lectura rechazada por el historial: {fila} ({e})")
+        return escritas, len(filas) - escritas, escritas
+
+    def guardar(self, conexion, filas):
+        """Escribe un lote de filas y actualiza sus agregados dentro de la transacción abierta"""
+        conexion.executemany(
+            "INSERT INTO lecturas (sensor_id, ts, v, pct, nivel_sensor, riesgo_score, alerta) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", filas)
+        conexion.executemany(UPSERT_ROLLUP, agregar_lote(filas))
+
+    def _reconstruir_rollups(self, conexion):
+        logger.info("Calculando agregados del historial existente...")
+        nivel = " ".join(f"WHEN '{alerta}' THEN {n}" for alerta, n in NIVEL_ALERTA.items())
+        for resolucion in RESOLUCIONES:
+            conexion.execute(
+                f"INSERT INTO rollups SELECT ?, sensor_id, CAST(ts / ? AS INTEGER) * ? AS inicio, "
+                f"COUNT(*), MIN(v), MAX(v), SUM(v), MIN(pct), MAX(pct), SUM(pct), "
+                f"MAX(CASE alerta {nivel} ELSE 0 END) "
+                f"FROM lecturas WHERE typeof(ts) IN ('integer', 'real') GROUP BY sensor_id, inicio",
+                (resolucion, resolucion, resolucion))
+
+    def vaciar(self, timeout=None):
+        """
+        Espera a que todo lo registrado hasta ahora esté en disco.
+
+        Returns:
+            bool: False si se agotó el timeout
+        """
+        with self._condicion:
+            objetivo = self._recibidas
+            # Si el escritor todavía no está esperando, el aviso se perdería: queda marcado
+            self._vaciar = True
+            self._condicion.notify_all()
+            return self._condicion.wait_for(lambda: self._escritas + self._rechazadas >= objetivo, timeout)
+
+    def cerrar(self):
+        """Escribe lo pendiente y detiene el hilo escritor"""
+        with self._condicion:
+            self._cerrado = True
+            self._condicion.notify_all()
+        self._hilo.join()
+
+    def consultar(self, sensor_id, desde=None, hasta=None, limite=None):
+        """
+        Lecturas de un sensor en un rango de tiempo, en orden cronológico.
+
+        Args:
+            sensor_id (str): Identificador del sensor
+            desde (float, opcional): Timestamp inicial (inclusive)
+            hasta (float, opcional): Timestamp final (exclusivo)
+            limite (int, opcional): Máximo de lecturas (las más recientes)
+
+        Returns:
+            list[dict]: Lecturas con las columnas de COLUMNAS
+        """
+        consulta = ("SELECT sensor_id, ts, v, pct, nivel_sensor, riesgo_score, alerta FROM lecturas "
+                    "WHERE sensor_id = ? AND ts >= ? AND ts < ? ORDER BY ts DESC")
+        parametros = [sensor_id, float('-inf') if desde is None else desde,
+                      float('inf') if hasta is None else hasta]
+        if limite is not None:
+            consulta += " LIMIT ?"
+            parametros.append(int(limite))
+        conexion = conectar(self.ruta)
+        try:
+            filas = conexion.execute(consulta, parametros).fetchall()
+        finally:
+            conexion.close()
+        return [dict(zip(COLUMNAS, fila)) for fila in reversed(filas)]
+
+    def consultar_agregado(self, sensor_id, resolucion, desde=None, hasta=None):
+        """
+        Serie de un sensor a la resolución pedida (min/max/media de v y pct,
+        alerta máxima y número de lecturas por cubeta).
+        
+        Se lee el agregado más grueso cuya resolución divide a la pedida (p. ej.
+        30 min → agregados de 15 min), así el costo depende de los puntos que se
+        devuelven y no de las lecturas guardadas. Resoluciones menores a 1 min
+        se calculan a partir de las lecturas.
+
+        Args:
+            sensor_id (str): Identificador del sensor
+            resolucion (int): Tamaño de cubeta en segundos
+            desde (float, opcional): Timestamp inicial (se alinea al inicio de su cubeta)
+            hasta (float, opcional): Se incluyen las cubetas que empiezan antes de este timestamp
+
+        Returns:
+            tuple[str, list[dict]]: Fuente usada ('rollup_<s>' o 'lecturas') y cubetas en orden
+        """
+        resolucion = int(resolucion)
+        base = max((r for r in RESOLUCIONES if resolucion % r == 0), default=None)
+        desde = float('-inf') if desde is None else (float(desde) // resolucion) * resolucion
+        hasta = float('inf') if hasta is None else float(hasta)
+
+        if base is not None:
+            fuente = f"rollup_{base}"
+            consulta = ("SELECT (inicio / ?) * ? AS cubeta, SUM(n), MIN(v_min), MAX(v_max), SUM(v_suma), "
+                        "MIN(pct_min), MAX(pct_max), SUM(pct_suma), MAX(alerta_max) FROM rollups "
+                        "WHERE resolucion = ? AND sensor_id = ? AND inicio >= ? AND inicio < ? "
+                        "GROUP BY cubeta ORDER BY cubeta")
+            parametros = (resolucion, resolucion, base, sensor_id, desde, hasta)
+        else:
+            fuente = "lecturas"
+            nivel = " ".join(f"WHEN '{alerta}' THEN {n}" for alerta, n in NIVEL_ALERTA.items())
+            consulta = ("SELECT CAST(ts / ? AS INTEGER) * ? AS cubeta, COUNT(*), MIN(v), MAX(v), SUM(v), "
+                        f"MIN(pct), MAX(pct), SUM(pct), MAX(CASE alerta {nivel} ELSE 0 END) FROM lecturas "
+                        "WHERE sensor_id = ? AND ts >= ? AND ts < ? GROUP BY cubeta ORDER BY cubeta")
+            parametros = (resolucion, resolucion, sensor_id, desde, hasta)
+
+        conexion = conectar(self.ruta)
+        try:
+            filas = conexion.execute(consulta, parametros).fetchall()
+        finally:
+            conexion.close()
+
+        cubetas = [{
+            'inicio': inicio,
+            'n': n,
+            'v_min': v_min,
+            'v_max': v_max,
+            'v_media': v_suma / n,
+            'pct_min': pct_min,
+            'pct_max': pct_max,
+            'pct_media': pct_suma / n,
+            'alerta_max': NIVELES_ALERTA[alerta_max],
+        } for inicio, n, v_min, v_max, v_suma, pct_min, pct_max, pct_suma, alerta_max in filas]
+        return fuente, cubetas
+
+    def estadisticas(self):
+        """
+        Returns:
+            dict: recibidas, escritas, rechazadas (por SQLite), pendientes,
+                descartadas (búfer lleno) y transacciones
+        """
+        with self._condicion:
+            return {
+                'recibidas': self._recibidas,
+                'escritas': self._escritas,
+                'rechazadas': self._rechazadas,
+                'pendientes': len(self._pendientes),
+                'descartadas': self._descartadas,
+                'transacciones': self._transacciones,
+            }
@@ -0,0 +1,80 @@
+import math
+
+import numpy as np
+
+# Tolerancia de ±0.0001 grados (≈ 10 metros) usada para considerar que una
+# coordenada "existe" en el dataset procesado
+TOLERANCIA_GRADOS = 0.0001
+
+
+class IndiceEspacial:
+    """
+    Índice espacial en memoria basado en una rejilla hash de lat/lon.
+
+    Cada celda mide 2 × tolerancia por lado y cada punto del dataset se registra
+    en todas las celdas que toca su caja de ±tolerancia (a lo más 4). Así una
+    consulta es una sola búsqueda en diccionario más la verificación exacta de
+    los pocos candidatos de esa celda, sin importar el tamaño del dataset.
+
+    Se conserva el orden original de las filas: si varias filas coinciden se
+    devuelve la primera, igual que `dataset[mascara].iloc[0]`.
+    """
+
+    def __init__(self, latitudes, longitudes, valores, tolerancia=TOLERANCIA_GRADOS):
+        self.tolerancia = tolerancia
+        self._tam_celda = 2 * tolerancia
+        self._celdas = {}
+        self._n = 0
+
+        latitudes = np.asarray(latitudes, dtype=np.float64).tolist()
+        longitudes = np.asarray(longitudes, dtype=np.float64).tolist()
+        valores = np.asarray(valores, dtype=np.float64).tolist()
+        for lat, lon, valor in zip(latitudes, longitudes, valores):
+            entrada = (lat, lon, valor)
+            for i in range(self._celda(lat - tolerancia), self._celda(lat + tolerancia) + 1):
+                for j in range(self._celda(lon - tolerancia), self._celda(lon + tolerancia) + 1):
+                    self._celdas.setdefault((i, j), []).append(entrada)
+            self._n += 1
+
+    def __len__(self):
+        return self._n
+
+    def _celda(self, grados):
+        return math.floor(grados / self._tam_celda)
+
+    def buscar(self, latitud, longitud):
+        """
+        Busca la coordenada en el índice con tolerancia de ±`tolerancia` grados.
+
+        Args:
+            latitud (float): Latitud de la ubicación
+            longitud (float): Longitud de la ubicación
+
+        Returns:
+            float | None: Valor de la primera fila que coincide, o None si no hay
+        """
+        candidatos = self._celdas.get((self._celda(latitud), self._celda(longitud)))
+        if candidatos is None:
+            return None
+
+        tolerancia = self.tolerancia
+        for lat, lon, valor in candidatos:
+            if abs(lat - latitud) < tolerancia and abs(lon - longitud) < tolerancia:
+                return valor
+        return None
+
+    def buscar_lote(self, latitudes, longitudes):
+        """
+        Versión por lotes de `buscar`.
+
+        Args:
+            latitudes (array-like): Latitudes a consultar
+            longitudes (array-like): Longitudes a consultar
+
+        Returns:
+            np.ndarray: Valores float64; NaN donde no hay coincidencia
+        """
+        buscar = self.buscar
+        valores = [buscar(lat, lon) for lat, lon in zip(np.asarray(latitudes, dtype=float).tolist(),
+                                                        np.asarray(longitudes, dtype=float).tolist())]
+        return np.array([np.nan if v is None else v for v in valores], dtype=np.float64)
@@ -0,0 +1,184 @@
+import bisect
+import threading
+import time
+
+# Límites de las cubetas de los histogramas de latencia (segundos): 10 µs a 2.5 s
+CUBETAS_S = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+             0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _etiquetas(nombres, valores, extra=""):
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _numero(valor):
+    if valor == float('inf'):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Metrica:
+    tipo = None
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def _clave(self, etiquetas):
+        return tuple(etiquetas[n] for n in self.etiquetas)
+
+    def exportar(self):
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        with self._lock:
+            valores = dict(self._valores)
+        for clave, valor in sorted(valores.items()):
+            lineas.extend(self._lineas(clave, valor))
+        return lineas
+
+    def _lineas(self, clave, valor):
+        return [f"{self.nombre}{_etiquetas(self.etiquetas, clave)} {_numero(valor)}"]
+
+
+class Contador(Metrica):
+    """Contador monótono (p. ej. lecturas por color de alerta)"""
+    tipo = "counter"
+
+    def inc(self, valor=1, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+
+    def valor(self, **etiquetas):
+        return self._valores.get(self._clave(etiquetas), 0)
+
+
+class Medidor(Metrica):
+    """Valor que sube y baja (p. ej. profundidad de una cola)"""
+    tipo = "gauge"
+
+    def set(self, valor, **etiquetas):
+        with self._lock:
+            self._valores[self._clave(etiquetas)] = valor
+
+    def limpiar(self):
+        """Quita todas las series (p. ej. la versión anterior tras una recarga)"""
+        with self._lock:
+            self._valores.clear()
+
+    def valor(self, **etiquetas):
+        return self._valores.get(self._clave(etiquetas))
+
+
+class Histograma(Metrica):
+    """Histograma acumulativo con cubetas fijas (formato de Prometheus)"""
+    tipo = "histogram"
+
+    def __init__(self, nombre, ayuda, etiquetas=(), cubetas=CUBETAS_S):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.cubetas = tuple(cubetas)
+
+    def observar(self, valor, **etiquetas):
+        clave = self._clave(etiquetas)
+        indice = bisect.bisect_left(self.cubetas, valor)
+        with self._lock:
+            serie = self._valores.get(clave)
+            if serie is None:
+                # [conteos por cubeta (la última es +Inf), suma, total]
+                serie = self._valores[clave] = [[0] * (len(self.cubetas) + 1), 0.0, 0]
+            serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def medir(self, **etiquetas):
+        """Context manager que observa la duración del bloque"""
+        return _Cronometro(self, etiquetas)
+
+    def conteo(self, **etiquetas):
+        serie = self._valores.get(self._clave(etiquetas))
+        return serie[2] if serie is not None else 0
+
+    def _lineas(self, clave, serie):
+        conteos, suma, total = serie
+        lineas = []
+        acumulado = 0
+        for limite, conteo in zip(self.cubetas + (float('inf'),), conteos):
+            acumulado += conteo
+            le = f'le="{_numero(limite)}"'
+            lineas.append(f"{self.nombre}_bucket{_etiquetas(self.etiquetas, clave, le)} {acumulado}")
+        lineas.append(f"{self.nombre}_sum{_etiquetas(self.etiquetas, clave)} {_numero(suma)}")
+        lineas.append(f"{self.nombre}_count{_etiquetas(self.etiquetas, clave)} {total}")
+        return lineas
+
+
+class _Cronometro:
+    __slots__ = ('histograma', 'etiquetas', 'inicio')
+
+    def __init__(self, histograma, etiquetas):
+        self.histograma = histograma
+        self.etiquetas = etiquetas
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histograma.observar(time.perf_counter() - self.inicio, **self.etiquetas)
+        return False
+
+
+class RegistroMetricas:
+    """Conjunto de métricas que se exportan juntas en /metrics"""
+
+    def __init__(self):
+        self._metricas = {}
+
+    def registrar(self, metrica):
+        self._metricas[metrica.nombre] = metrica
+        return metrica
+
+    def contador(self, nombre, ayuda, etiquetas=()):
+        return self.registrar(Contador(nombre, ayuda, etiquetas))
+
+    def medidor(self, nombre, ayuda, etiquetas=()):
+        return self.registrar(Medidor(nombre, ayuda, etiquetas))
+
+    def histograma(self, nombre, ayuda, etiquetas=(), cubetas=CUBETAS_S):
+        return self.registrar(Histograma(nombre, ayuda, etiquetas, cubetas))
+
+    def exportar(self):
+        """Todas las métricas en el formato de texto de Prometheus (versión 0.0.4)"""
+        lineas = []
+        for metrica in self._metricas.values():
+            lineas.extend(metrica.exportar())
+        return "\n".join(lineas) + "\n"
+
+
+# Registro del proceso y métricas compartidas por Realtime y Flask_Server
+REGISTRO = RegistroMetricas()
+
+ETAPA_SEGUNDOS = REGISTRO.histograma(
+    "tt2_etapa_segundos", "Duración de cada etapa del procesamiento de una lectura", ("etapa",))
+LECTURAS = REGISTRO.contador(
+    "tt2_lecturas_total", "Lecturas recibidas por endpoint y resultado", ("endpoint", "resultado"))
+ALERTAS = REGISTRO.contador(
+    "tt2_alertas_total", "Lecturas procesadas por color de alerta", ("alerta",))
+RIESGO_ZONA = REGISTRO.contador(
+    "tt2_riesgo_zona_total", "Lecturas procesadas por clase de riesgo de zona", ("riesgo_zona",))
+FUENTE_SCORE = REGISTRO.contador(
+    "tt2_fuente_score_total", "Scores de zona por fuente (dataset, raster, modelo o sustituto)", ("fuente",))
+MODELO_CARGA_SEGUNDOS = REGISTRO.medidor(
+    "tt2_modelo_carga_segundos", "Tiempo de carga del modelo y los datos activos")
+MODELO_INFO = REGISTRO.medidor(
+    "tt2_modelo_info", "Versión del modelo y los datos activos (valor siempre 1)", ("version",))
+RECARGAS = REGISTRO.contador(
+    "tt2_recargas_modelo_total", "Recargas del modelo en caliente por resultado", ("resultado",))
@@ -0,0 +1,126 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Tiempo máximo que una petición espera a que se junten más (segundos)
+VENTANA_S = 0.002
+
+# Máximo de filas por llamada al modelo
+MAX_LOTE = 256
+
+
+class PlanificadorMicroLotes:
+    """
+    Agrupa predicciones de una fila que llegan de hilos concurrentes.
+
+    Un hilo despachador toma la primera petición pendiente, junta las que
+    lleguen durante `ventana_s` (o hasta `max_lote`), hace una sola llamada
+    a `funcion_lote` y entrega a cada quien su resultado por un Future. La
+    latencia extra está acotada por la ventana; con `ventana_s=0` solo se
+    agrupan las peticiones que ya estaban esperando (sin latencia extra).
+    """
+
+    def __init__(self, funcion_lote, ventana_s=VENTANA_S, max_lote=MAX_LOTE):
+        """
+        Args:
+            funcion_lote (callable): f(X) con X de forma (n, k) -> arreglo de n resultados
+            ventana_s (float): Espera máxima para juntar un lote (segundos)
+            max_lote (int): Filas máximas por llamada a funcion_lote
+        """
+        self._funcion_lote = funcion_lote
+        self.ventana_s = float(ventana_s)
+        self.max_lote = int(max_lote)
+        self._cola = queue.SimpleQueue()
+        self._hilo = None
+        self._lock = threading.Lock()
+        self._lotes = 0
+        self._filas = 0
+        self._lote_max = 0
+
+    def _iniciar(self):
+        with self._lock:
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._despachar, name="micro-lotes", daemon=True)
+                self._hilo.start()
+
+    def enviar(self, *fila):
+        """
+        Encola una fila para la siguiente llamada en lote.
+
+        Returns:
+            Future: Se resuelve con el resultado de la fila
+        """
+        if self._hilo is None:
+            self._iniciar()
+        futuro = Future()
+        self._cola.put((fila, futuro))
+        return futuro
+
+    def calcular(self, *fila, timeout=None):
+        """Versión bloqueante de `enviar`: devuelve el resultado de la fila como float"""
+        return self.enviar(*fila).result(timeout)
+
+    def _juntar(self, primero):
+        lote = [primero]
+        limite = time.perf_counter() + self.ventana_s
+        while len(lote) < self.max_lote:
+            restante = limite - time.perf_counter()
+            try:
+                elemento = self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if elemento is None:
+                self._cola.put(None)  # Se atiende después de este lote
+                break
+            lote.append(elemento)
+        return lote
+
+    def _despachar(self):
+        while True:
+            primero = self._cola.get()
+            if primero is None:
+                return
+            lote = self._juntar(primero)
+            filas = np.array([fila for fila, _ in lote], dtype=np.float64)
+            try:
+                resultados = self._funcion_lote(filas)
+            except Exception as e:
+                logger.warning(f"Error en lote de {len(lote)} filas: {e}")
+                for _, futuro in lote:
+                    futuro.set_exception(e)
+                continue
+            for (_, futuro), resultado in zip(lote, resultados):
+                futuro.set_result(float(resultado))
+            with self._lock:
+                self._lotes += 1
+                self._filas += len(lote)
+                self._lote_max = max(self._lote_max, len(lote))
+
+    def detener(self):
+        """Atiende lo pendiente y detiene el hilo despachador"""
+        with self._lock:
+            hilo, self._hilo = self._hilo, None
+        if hilo is not None:
+            self._cola.put(None)
+            hilo.join()
+
+    def estadisticas(self):
+        """
+        Returns:
+            dict: lotes, filas, tamaño medio y máximo de lote
+        """
+        with self._lock:
+            return {
+                'lotes': self._lotes,
+                'filas': self._filas,
+                'lote_medio': round(self._filas / self._lotes, 2) if self._lotes else 0.0,
+                'lote_max': self._lote_max,
+                'ventana_ms': self.ventana_s * 1000,
+                'max_lote': self.max_lote,
+            }
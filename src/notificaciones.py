@@ -0,0 +1,234 @@
+import json
+import logging
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Alerta que se asume para un sensor antes de su primera lectura
+ALERTA_INICIAL = 'VERDE'
+
+# Tiempo mínimo entre dos avisos de la misma alerta para el mismo sensor (segundos)
+REAVISO_S = 300.0
+
+# Límite de envíos por canal: tasa sostenida (por segundo) y ráfaga máxima
+TASA_POR_CANAL = 1.0
+RAFAGA_POR_CANAL = 20
+
+# Envíos en curso o en espera por canal antes de descartar
+MAX_PENDIENTES_CANAL = 100
+
+REINTENTOS = 3
+ESPERA_REINTENTO_S = 0.5
+TIMEOUT_S = 5.0
+
+
+class UltimasAlertas:
+    """
+    Última alerta de cada sensor (segura entre hilos).
+
+    Es el único registro de "qué alerta tenía el sensor": lo comparten el
+    despachador de notificaciones y la bitácora JSON del servidor, así que el
+    cambio de una lectura se detecta una sola vez y ambos lo ven igual.
+    """
+
+    def __init__(self):
+        self._alertas = {}
+        self._lock = threading.Lock()
+
+    def cambiar(self, sensor_id, alerta):
+        """
+        Registra la alerta de una lectura.
+
+        Returns:
+            str | None: Alerta anterior del sensor si esta lectura la cambia, o None
+        """
+        with self._lock:
+            anterior = self._alertas.get(sensor_id, ALERTA_INICIAL)
+            self._alertas[sensor_id] = alerta
+        return anterior if anterior != alerta else None
+
+    def olvidar(self, sensor_id):
+        """Borra la alerta de un sensor (su siguiente lectura se compara con ALERTA_INICIAL)"""
+        with self._lock:
+            self._alertas.pop(sensor_id, None)
+
+
+class CanalWebhook:
+    """Canal que envía cada evento como JSON por HTTP POST"""
+
+    def __init__(self, url, timeout_s=TIMEOUT_S, nombre=None):
+        self.url = url
+        self.timeout_s = float(timeout_s)
+        self.nombre = nombre or url
+
+    def enviar(self, evento):
+        """
+        Raises:
+            OSError: Error de red, timeout o respuesta HTTP con error
+        """
+        datos = json.dumps(evento, ensure_ascii=False).encode('utf-8')
+        peticion = urllib.request.Request(self.url, data=datos, method='POST',
+                                          headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(peticion, timeout=self.timeout_s) as respuesta:
+            respuesta.read()
+
+
+class LimitadorTasa:
+    """Cubeta de fichas: `tasa_por_s` envíos sostenidos con ráfagas de hasta `rafaga`"""
+
+    def __init__(self, tasa_por_s=TASA_POR_CANAL, rafaga=RAFAGA_POR_CANAL):
+        self.tasa_por_s = float(tasa_por_s)
+        self.rafaga = float(rafaga)
+        self._fichas = self.rafaga
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def permitir(self):
+        with self._lock:
+            ahora = time.monotonic()
+            self._fichas = min(self.rafaga, self._fichas + (ahora - self._ultimo) * self.tasa_por_s)
+            self._ultimo = ahora
+            if self._fichas < 1:
+                return False
+            self._fichas -= 1
+            return True
+
+
+class DespachadorNotificaciones:
+    """
+    Envía por todos los canales los cambios de alerta de cada sensor.
+
+    `notificar` se llama con cada lectura procesada; solo compara con la
+    última alerta del sensor y, si cambió, deja el envío al hilo de cada
+    canal. Nunca espera a la red, así que un receptor lento o caído no frena
+    la ingesta ni a los demás canales: sus envíos se reintentan con timeout
+    y, si se acumulan más de `max_pendientes`, se descartan (y se cuentan).
+    Cada canal tiene un solo hilo, así recibe los eventos en orden.
+    """
+
+    def __init__(self, canales, reaviso_s=REAVISO_S, tasa_por_canal=TASA_POR_CANAL,
+                 rafaga_por_canal=RAFAGA_POR_CANAL, max_pendientes=MAX_PENDIENTES_CANAL,
+                 reintentos=REINTENTOS, espera_reintento_s=ESPERA_REINTENTO_S, ultimas_alertas=None):
+        """
+        Args:
+            canales (list): Objetos con `nombre` y `enviar(evento)` (p. ej. CanalWebhook)
+            reaviso_s (float): Tiempo mínimo entre avisos de la misma alerta por sensor
+            tasa_por_canal, rafaga_por_canal: Límite de envíos por canal (LimitadorTasa)
+            max_pendientes (int): Envíos pendientes por canal antes de descartar
+            reintentos (int): Reintentos por envío fallido (espera exponencial)
+            espera_reintento_s (float): Espera antes del primer reintento
+            ultimas_alertas (UltimasAlertas, opcional): Última alerta por sensor,
+                compartida con quien más la use (por defecto una propia)
+        """
+        self.canales = list(canales)
+        self.reaviso_s = float(reaviso_s)
+        self.max_pendientes = int(max_pendientes)
+        self.reintentos = int(reintentos)
+        self.espera_reintento_s = float(espera_reintento_s)
+        self._limitadores = {c.nombre: LimitadorTasa(tasa_por_canal, rafaga_por_canal) for c in self.canales}
+        self._pendientes = {c.nombre: 0 for c in self.canales}
+        self._ejecutores = {c.nombre: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"notificaciones-{i}")
+                            for i, c in enumerate(self.canales)}
+        self._lock = threading.Lock()
+        self.ultimas_alertas = ultimas_alertas if ultimas_alertas is not None else UltimasAlertas()
+        self._ultimo_aviso = {}   # (sensor_id, alerta) → time.monotonic() del último aviso
+        self._contadores = {'eventos': 0, 'repetidos': 0, 'enviados': 0, 'fallidos': 0,
+                            'reintentos': 0, 'limitados': 0, 'descartados': 0}
+
+    def notificar(self, sensor_id, alerta, **datos):
+        """
+        Registra la alerta de una lectura y, si cambió, envía el evento.
+
+        Args:
+            sensor_id (str): Identificador del sensor
+            alerta (str): Alerta de la lectura ('VERDE', 'AMARILLO', 'ROJO')
+            **datos: Campos extra del evento (riesgo_zona, riesgo_score, ts, ...)
+
+        Returns:
+            bool: True si se generó un evento (cambio de alerta no repetido)
+        """
+        return self.notificar_cambio(sensor_id, alerta, self.ultimas_alertas.cambiar(sensor_id, alerta), **datos)
+
+    def notificar_cambio(self, sensor_id, alerta, anterior, **datos):
+        """
+        Como `notificar`, pero con el cambio ya detectado por quien comparte
+        `ultimas_alertas` (UltimasAlertas.cambiar).
+
+        Args:
+            anterior (str | None): Alerta anterior del sensor, o None si no cambió
+
+        Returns:
+            bool: True si se generó un evento (cambio de alerta no repetido)
+        """
+        if anterior is None:
+            return False
+        ahora = time.monotonic()
+        with self._lock:
+            ultimo = self._ultimo_aviso.get((sensor_id, alerta))
+            if ultimo is not None and ahora - ultimo < self.reaviso_s:
+                # La alerta oscila: ya se avisó de este nivel hace poco
+                self._contadores['repetidos'] += 1
+                return False
+            self._ultimo_aviso[(sensor_id, alerta)] = ahora
+            self._contadores['eventos'] += 1
+
+        evento = dict(datos, sensor_id=sensor_id, alerta=alerta, anterior=anterior)
+        for canal in self.canales:
+            self._programar(canal, evento)
+        return True
+
+    def _programar(self, canal, evento):
+        if not self._limitadores[canal.nombre].permitir():
+            self._contar('limitados')
+            logger.warning(f"Límite de envíos del canal {canal.nombre}: evento de {evento['sensor_id']} descartado")
+            return
+        with self._lock:
+            if self._pendientes[canal.nombre] >= self.max_pendientes:
+                self._contadores['descartados'] += 1
+                logger.warning(f"Canal {canal.nombre} saturado: evento de {evento['sensor_id']} descartado")
+                return
+            self._pendientes[canal.nombre] += 1
+        self._ejecutores[canal.nombre].submit(self._enviar, canal, evento)
+
+    def _enviar(self, canal, evento):
+        try:
+            for intento in range(self.reintentos + 1):
+                try:
+                    canal.enviar(evento)
+                    self._contar('enviados')
+                    return
+                except Exception as e:
+                    if intento == self.reintentos:
+                        self._contar('fallidos')
+                        logger.warning(f"No se pudo notificar por {canal.nombre} tras "
+                                       f"{self.reintentos + 1} intentos: {e}")
+                        return
+                    self._contar('reintentos')
+                    time.sleep(self.espera_reintento_s * 2 ** intento)
+        finally:
+            with self._lock:
+                self._pendientes[canal.nombre] -= 1
+
+    def _contar(self, contador):
+        with self._lock:
+            self._contadores[contador] += 1
+
+    def olvidar(self, sensor_id):
+        """Borra el estado de un sensor (p. ej. al eliminarlo del registro)"""
+        self.ultimas_alertas.olvidar(sensor_id)
+
+    def cerrar(self, esperar=True):
+        """Detiene los hilos de los canales (esperando los envíos pendientes si `esperar`)"""
+        for ejecutor in self._ejecutores.values():
+            ejecutor.shutdown(wait=esperar, cancel_futures=not esperar)
+
+    def estadisticas(self):
+        """
+        Returns:
+            dict: Contadores de eventos y envíos, y envíos pendientes por canal
+        """
+        with self._lock:
+            return dict(self._contadores, pendientes=dict(self._pendientes))
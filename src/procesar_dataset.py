@@ -1,11 +1,19 @@
+import argparse
+import os
+import warnings
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
 
+from dataset_columnar import csv_a_columnar, ruta_columnar
+
 # Mapeos de rangos string a valores numéricos
 intensidad_map = {
     '41 a 54': 47.5,    # RIESGO BAJO
     '54 a 60': 57.0,    # RIESGO MEDIO-BAJO
-    '60 a 64': 62.0,    # RIESGO MEDIO-ALTO  
+    '60 a 64': 62.0,    # RIESGO MEDIO-ALTO
     '64 a 70': 67.0     # RIESGO ALTO
 }
 
@@ -17,70 +25,247 @@ area_map = {
     '100': 100.0        # RIESGO MUY ALTO
 }
 
-def procesar_dataset():
+ENTRADA = 'Dataset - Full(Dataset).csv'
+SALIDA = 'dataset_procesado.csv'
+
+COLUMNAS_ORIGINALES = ['coordinates', 'intens_mm', '%_área']
+COLUMNAS_PROCESADAS = ['latitud', 'longitud', 'intensidad_mm', 'area_inundable_pct',
+                       'riesgo_zona_score', 'nivel_riesgo_zona']
+
+# Filas por bloque en el modo por bloques (memoria acotada)
+TAM_BLOQUE = 500_000
+
+
+def clasificar_zonas(scores):
+    """
+    Clasifica scores de riesgo en 'BAJO' (≤ 45), 'MEDIO' (≤ 65) o 'ALTO' de forma vectorizada.
+    Un score NaN (rango sin mapeo) queda como 'ALTO', igual que las comparaciones fila por fila.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    return np.select([scores <= 45, scores <= 65], ['BAJO', 'MEDIO'], default='ALTO').astype(object)
+
+
+def separar_coordenadas(coordenadas):
+    """
+    Separa la columna "lat,lon" en dos arreglos float.
+
+    Todo el bloque se une en un solo texto y lo convierte np.fromstring en C,
+    en lugar de partir cada fila. Si alguna fila no tiene exactamente un
+    número, una coma y otro número, usa el método por filas (str.split), así
+    el resultado es el mismo en todos los casos.
+
+    Returns:
+        tuple: (latitudes, longitudes)
+    """
+    n = len(coordenadas)
+    if n and not coordenadas.isna().any():
+        texto = "\n".join(coordenadas.tolist())
+        # Cada fila debe tener exactamente una coma: los separadores alternan ',' y '\n'
+        bytes_texto = np.frombuffer(texto.encode(), dtype=np.uint8)
+        separadores = bytes_texto[(bytes_texto == ord(",")) | (bytes_texto == ord("\n"))]
+        if (len(separadores) == 2 * n - 1 and (separadores[0::2] == ord(",")).all()
+                and (separadores[1::2] == ord("\n")).all()):
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("error")
+                    valores = np.fromstring(texto.replace("\n", ","), dtype=np.float64, sep=",")
+            except (ValueError, DeprecationWarning):
+                valores = None
+            if valores is not None and len(valores) == 2 * n:
+                return valores[0::2], valores[1::2]
+    coords = coordenadas.str.strip('"').str.split(',', expand=True)
+    return coords[0].astype(float).to_numpy(), coords[1].astype(float).to_numpy()
+
+
+def transformar(df):
+    """
+    Convierte las columnas originales (coordinates, intens_mm, %_área) a las numéricas
+    de dataset_procesado.csv, sin eliminar duplicados.
+
+    Returns:
+        pd.DataFrame: Columnas COLUMNAS_PROCESADAS, con el mismo índice que df
+    """
+    latitud, longitud = separar_coordenadas(df['coordinates'])
+    intensidad = df['intens_mm'].map(intensidad_map).astype(float)
+    area = df['%_área'].map(area_map).astype(float)
+    # Intensidad tiene más peso (60%) que área (40%)
+    score = intensidad * 0.6 + area * 0.4
+    return pd.DataFrame({
+        'latitud': latitud,
+        'longitud': longitud,
+        'intensidad_mm': intensidad,
+        'area_inundable_pct': area,
+        'riesgo_zona_score': score,
+        'nivel_riesgo_zona': clasificar_zonas(score),
+    }, index=df.index, columns=COLUMNAS_PROCESADAS)
+
+
+def procesar_dataset(entrada=ENTRADA, salida=SALIDA, columnar=True):
     print("🔄 Cargando dataset original...")
-    
+
     # Cargar el dataset con encoding correcto
-    df = pd.read_csv('Dataset - Full(Dataset).csv', encoding='latin-1')
-    
+    df = pd.read_csv(entrada, encoding='latin-1')
+
     print(f"✅ Dataset cargado: {len(df)} filas")
     print(f"📊 Columnas originales: {list(df.columns)}")
-    
-    # Separar coordenadas en latitud y longitud
-    print("\n🗺️ Procesando coordenadas...")
-    coords = df['coordinates'].str.strip('"').str.split(',', expand=True)
-    df['latitud'] = coords[0].astype(float)
-    df['longitud'] = coords[1].astype(float)
-    
-    # Convertir intensidad de precipitación
-    print("🌧️ Procesando intensidad de precipitación...")
-    df['intensidad_mm'] = df['intens_mm'].map(intensidad_map)
-    
-    # Convertir porcentaje de área inundable
-    print("💧 Procesando porcentaje de área inundable...")
-    df['area_inundable_pct'] = df['%_área'].map(area_map)
-    
-    # Crear score de riesgo combinado (promedio ponderado)
-    # Intensidad tiene más peso (60%) que área (40%)
-    df['riesgo_zona_score'] = (df['intensidad_mm'] * 0.6 + df['area_inundable_pct'] * 0.4)
-    
-    # Clasificar zona por nivel de riesgo basado en score
-    def clasificar_zona(score):
-        if score <= 45:
-            return 'BAJO'
-        elif score <= 65:
-            return 'MEDIO'
-        else:
-            return 'ALTO'
-    
-    df['nivel_riesgo_zona'] = df['riesgo_zona_score'].apply(clasificar_zona)
-    
-    # Crear dataset procesado con columnas relevantes
-    df_procesado = df[['latitud', 'longitud', 'intensidad_mm', 'area_inundable_pct', 
-                       'riesgo_zona_score', 'nivel_riesgo_zona']].copy()
-    
+
+    # Coordenadas → latitud/longitud, rangos → valores numéricos y score de riesgo
+    # combinado (promedio ponderado) clasificado por nivel, todo vectorizado
+    print("\n🗺️ Procesando coordenadas, intensidad y área inundable...")
+    df_procesado = transformar(df)
+
     # Eliminar duplicados para optimizar el dataset
     df_procesado = df_procesado.drop_duplicates()
-    
+
     print(f"\n📈 Dataset procesado:")
     print(f"   • Filas después de eliminar duplicados: {len(df_procesado)}")
     print(f"   • Rango de intensidad: {df_procesado['intensidad_mm'].min():.1f} - {df_procesado['intensidad_mm'].max():.1f} mm")
     print(f"   • Rango de área inundable: {df_procesado['area_inundable_pct'].min():.1f} - {df_procesado['area_inundable_pct'].max():.1f} %")
     print(f"   • Rango de score de riesgo: {df_procesado['riesgo_zona_score'].min():.1f} - {df_procesado['riesgo_zona_score'].max():.1f}")
-    
+
     print(f"\n🎯 Distribución por nivel de riesgo:")
     print(df_procesado['nivel_riesgo_zona'].value_counts())
-    
+
     # Guardar dataset procesado
-    output_file = 'dataset_procesado.csv'
-    df_procesado.to_csv(output_file, index=False, encoding='utf-8')
-    print(f"\n💾 Dataset procesado guardado como: {output_file}")
-    
+    df_procesado.to_csv(salida, index=False, encoding='utf-8')
+    print(f"\n💾 Dataset procesado guardado como: {salida}")
+    if columnar:
+        csv_a_columnar(salida)
+        print(f"💾 Versión columnar guardada como: {ruta_columnar(salida)}")
+
     # Mostrar muestra del dataset procesado
     print(f"\n📋 Primeras 5 filas del dataset procesado:")
     print(df_procesado.head())
-    
+
     return df_procesado
 
+
+def _transformar_bloque(bloque):
+    """
+    Transforma un bloque y quita sus duplicados internos. También genera aquí las
+    líneas CSV de cada fila (lo más caro), así con varios procesos se paraleliza.
+
+    Returns:
+        tuple: (DataFrame sin latitud/longitud para el resumen, hash de cada fila, líneas CSV)
+    """
+    procesado = transformar(bloque).drop_duplicates()
+    hashes = pd.util.hash_pandas_object(procesado, index=False).to_numpy()
+    lineas = procesado.to_csv(index=False, header=False, lineterminator=os.linesep).split(os.linesep)[:-1]
+    return procesado.drop(columns=['latitud', 'longitud']), hashes, lineas
+
+
+class _FilasVistas:
+    """
+    Hashes (uint64) de las filas ya escritas, en un arreglo ordenado.
+
+    Permite quitar duplicados entre bloques con 8 bytes por fila única, sin
+    guardar las filas.
+    """
+
+    def __init__(self):
+        self._hashes = np.empty(0, dtype=np.uint64)
+
+    def filtrar(self, hashes):
+        """Máscara de las filas nuevas (y las agrega a las vistas)"""
+        posiciones = np.searchsorted(self._hashes, hashes)
+        vistas = np.zeros(len(hashes), dtype=bool)
+        dentro = posiciones < len(self._hashes)
+        vistas[dentro] = self._hashes[posiciones[dentro]] == hashes[dentro]
+        nuevos = np.sort(hashes[~vistas])
+        self._hashes = np.insert(self._hashes, np.searchsorted(self._hashes, nuevos), nuevos)
+        return ~vistas
+
+    def __len__(self):
+        return len(self._hashes)
+
+
+def procesar_dataset_por_bloques(entrada=ENTRADA, salida=SALIDA, tam_bloque=TAM_BLOQUE, procesos=1, columnar=True):
+    """
+    Igual que procesar_dataset, pero leyendo el CSV por bloques de `tam_bloque`
+    filas: la memoria depende del bloque y no del tamaño del archivo. Los
+    duplicados se eliminan en todo el archivo (se conserva la primera
+    aparición, en el mismo orden), así que la salida es idéntica.
+
+    Args:
+        entrada (str): CSV original (coordinates, intens_mm, %_área)
+        salida (str): CSV procesado
+        tam_bloque (int): Filas por bloque
+        procesos (int): Procesos que transforman bloques en paralelo (1 = en este proceso)
+        columnar (bool): Guardar también la versión columnar .npz
+
+    Returns:
+        dict: filas leídas, filas escritas, bloques y distribución por nivel de riesgo
+    """
+    print(f"🔄 Procesando {entrada} por bloques de {tam_bloque} filas ({procesos} procesos)...")
+    lector = pd.read_csv(entrada, encoding='latin-1', usecols=COLUMNAS_ORIGINALES,
+                         dtype=str, chunksize=tam_bloque)
+    vistas = _FilasVistas()
+    resumen = {'filas_leidas': 0, 'filas_escritas': 0, 'bloques': 0, 'niveles': {}}
+    rangos = {c: [np.inf, -np.inf] for c in ('intensidad_mm', 'area_inundable_pct', 'riesgo_zona_score')}
+
+    with open(salida, 'w', encoding='utf-8', newline='') as archivo:
+        archivo.write(','.join(COLUMNAS_PROCESADAS) + os.linesep)
+
+        def escribir(resultado, filas_leidas):
+            procesado, hashes, lineas = resultado
+            nuevas = vistas.filtrar(hashes)
+            procesado = procesado[nuevas]
+            archivo.writelines(linea + os.linesep for linea, nueva in zip(lineas, nuevas) if nueva)
+            resumen['bloques'] += 1
+            resumen['filas_leidas'] += filas_leidas
+            resumen['filas_escritas'] += len(procesado)
+            for nivel, n in procesado['nivel_riesgo_zona'].value_counts().items():
+                resumen['niveles'][nivel] = resumen['niveles'].get(nivel, 0) + int(n)
+            for columna, rango in rangos.items():
+                if len(procesado):
+                    rango[0] = min(rango[0], procesado[columna].min())
+                    rango[1] = max(rango[1], procesado[columna].max())
+
+        if procesos <= 1:
+            for bloque in lector:
+                escribir(_transformar_bloque(bloque), len(bloque))
+        else:
+            # A lo más 2 bloques en vuelo por proceso; se escriben en el orden de lectura
+            with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+                pendientes = deque()
+                for bloque in lector:
+                    pendientes.append((ejecutor.submit(_transformar_bloque, bloque), len(bloque)))
+                    if len(pendientes) >= 2 * procesos:
+                        futuro, filas = pendientes.popleft()
+                        escribir(futuro.result(), filas)
+                while pendientes:
+                    futuro, filas = pendientes.popleft()
+                    escribir(futuro.result(), filas)
+
+    print(f"✅ {resumen['filas_leidas']} filas leídas en {resumen['bloques']} bloques")
+    print(f"\n📈 Dataset procesado:")
+    print(f"   • Filas después de eliminar duplicados: {resumen['filas_escritas']}")
+    print(f"   • Rango de intensidad: {rangos['intensidad_mm'][0]:.1f} - {rangos['intensidad_mm'][1]:.1f} mm")
+    print(f"   • Rango de área inundable: {rangos['area_inundable_pct'][0]:.1f} - {rangos['area_inundable_pct'][1]:.1f} %")
+    print(f"   • Rango de score de riesgo: {rangos['riesgo_zona_score'][0]:.1f} - {rangos['riesgo_zona_score'][1]:.1f}")
+    print(f"\n🎯 Distribución por nivel de riesgo:")
+    for nivel, n in sorted(resumen['niveles'].items(), key=lambda x: -x[1]):
+        print(f"   • {nivel}: {n}")
+    print(f"\n💾 Dataset procesado guardado como: {salida}")
+    if columnar:
+        csv_a_columnar(salida, tam_bloque)
+        print(f"💾 Versión columnar guardada como: {ruta_columnar(salida)}")
+    return resumen
+
+
 if __name__ == "__main__":
-    dataset_procesado = procesar_dataset()
+    parser = argparse.ArgumentParser(description="Convierte el dataset original a dataset_procesado.csv")
+    parser.add_argument("--entrada", default=ENTRADA)
+    parser.add_argument("--salida", default=SALIDA)
+    parser.add_argument("--bloques", type=int, default=None, metavar="FILAS",
+                        help="Procesar por bloques de FILAS filas (memoria acotada, para datasets grandes)")
+    parser.add_argument("--procesos", type=int, default=1,
+                        help="Procesos que transforman bloques en paralelo (con --bloques)")
+    parser.add_argument("--sin-columnar", action="store_true",
+                        help="No generar la versión columnar .npz (solo el CSV)")
+    args = parser.parse_args()
+    if args.bloques:
+        procesar_dataset_por_bloques(args.entrada, args.salida, args.bloques, args.procesos,
+                                     columnar=not args.sin_columnar)
+    else:
+        dataset_procesado = procesar_dataset(args.entrada, args.salida, columnar=not args.sin_columnar)
@@ -0,0 +1,219 @@
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# Versión del formato del archivo .npz del raster
+VERSION_RASTER = 1
+
+
+class RasterRiesgo:
+    """
+    Raster precalculado del score de riesgo de zona sobre una caja lat/lon.
+
+    Los nodos están en `lat_min + i * paso` y `lon_min + j * paso` (inclusive en
+    ambos extremos de la caja) y los valores se guardan como float32. Una
+    consulta dentro de la caja es indexación de arreglo (vecino más cercano) o
+    interpolación bilineal entre los 4 nodos vecinos. Fuera de la caja el
+    raster no responde (None / NaN) y quien lo usa debe recurrir al modelo.
+
+    `modelo` es el hash_arreglos del bosque con el que se construyó: Realtime.py
+    ignora el raster si el modelo cargado es otro.
+    """
+
+    def __init__(self, valores, lat_min, lon_min, paso, lat_max=None, lon_max=None, modelo=None):
+        self.valores = np.asarray(valores, dtype=np.float32)
+        self.modelo = modelo
+        self.lat_min = float(lat_min)
+        self.lon_min = float(lon_min)
+        self.paso = float(paso)
+        n_lat, n_lon = self.valores.shape
+        self.lat_max = float(lat_max) if lat_max is not None else self.lat_min + (n_lat - 1) * self.paso
+        self.lon_max = float(lon_max) if lon_max is not None else self.lon_min + (n_lon - 1) * self.paso
+
+    @classmethod
+    def construir(cls, predecir_lote, lat_min, lat_max, lon_min, lon_max, paso, tam_bloque=200000, modelo=None):
+        """
+        Evalúa el modelo sobre todos los nodos de la rejilla.
+
+        Args:
+            predecir_lote (callable): f(latitudes, longitudes) -> arreglo de scores
+            lat_min, lat_max, lon_min, lon_max (float): Caja a cubrir
+            paso (float): Resolución de la rejilla en grados
+            tam_bloque (int): Puntos por llamada al modelo (limita memoria)
+            modelo (str, opcional): hash_arreglos del bosque que calcula `predecir_lote`
+
+        Returns:
+            RasterRiesgo: Raster con los scores del modelo en cada nodo
+        """
+        n_lat = int(np.ceil(round((lat_max - lat_min) / paso, 9))) + 1
+        n_lon = int(np.ceil(round((lon_max - lon_min) / paso, 9))) + 1
+        lats = lat_min + np.arange(n_lat) * paso
+        lons = lon_min + np.arange(n_lon) * paso
+
+        malla_lat, malla_lon = np.meshgrid(lats, lons, indexing='ij')
+        malla_lat, malla_lon = malla_lat.ravel(), malla_lon.ravel()
+        valores = np.empty(malla_lat.size, dtype=np.float32)
+        for inicio in range(0, malla_lat.size, tam_bloque):
+            fin = inicio + tam_bloque
+            valores[inicio:fin] = predecir_lote(malla_lat[inicio:fin], malla_lon[inicio:fin])
+
+        return cls(valores.reshape(n_lat, n_lon), lat_min, lon_min, paso, lat_max, lon_max, modelo)
+
+    @classmethod
+    def cargar(cls, ruta):
+        """Carga un raster guardado con `guardar`"""
+        with np.load(Path(ruta)) as datos:
+            version = int(datos['version'])
+            if version != VERSION_RASTER:
+                raise ValueError(f"Versión de raster no soportada: {version}")
+            lat_min, lat_max, lon_min, lon_max = datos['limites']
+            modelo = str(datos['modelo']) if 'modelo' in datos.files else ''
+            return cls(datos['valores'], lat_min, lon_min, float(datos['paso']), lat_max, lon_max,
+                       modelo or None)
+
+    def guardar(self, ruta):
+        """Guarda el raster como .npz (valores float32 + límites, paso y hash del modelo)"""
+        np.savez(
+            Path(ruta),
+            version=np.int32(VERSION_RASTER),
+            valores=self.valores,
+            limites=np.array([self.lat_min, self.lat_max, self.lon_min, self.lon_max]),
+            paso=np.float64(self.paso),
+            modelo=np.str_(self.modelo or ''),
+        )
+
+    def contiene(self, latitud, longitud):
+        return self.lat_min <= latitud <= self.lat_max and self.lon_min <= longitud <= self.lon_max
+
+    def consultar(self, latitud, longitud, interpolar=False):
+        """
+        Score de riesgo en (latitud, longitud) a partir del raster.
+
+        Args:
+            latitud (float): Latitud de la ubicación
+            longitud (float): Longitud de la ubicación
+            interpolar (bool): True para interpolación bilineal, False para el
+                nodo más cercano
+
+        Returns:
+            float | None: Score, o None si la coordenada está fuera del raster
+        """
+        if not self.contiene(latitud, longitud):
+            return None
+        return float(self.consultar_lote(np.array([latitud]), np.array([longitud]), interpolar)[0])
+
+    def consultar_lote(self, latitudes, longitudes, interpolar=False):
+        """
+        Versión vectorizada de `consultar`.
+
+        Returns:
+            np.ndarray: Scores float32; NaN para coordenadas fuera del raster
+        """
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        n_lat, n_lon = self.valores.shape
+
+        dentro = (
+            (latitudes >= self.lat_min) & (latitudes <= self.lat_max) &
+            (longitudes >= self.lon_min) & (longitudes <= self.lon_max)
+        )
+        fila = np.clip((latitudes - self.lat_min) / self.paso, 0, n_lat - 1)
+        columna = np.clip((longitudes - self.lon_min) / self.paso, 0, n_lon - 1)
+        fila = np.where(dentro, fila, 0)
+        columna = np.where(dentro, columna, 0)
+
+        if interpolar:
+            i0 = np.minimum(np.floor(fila).astype(np.intp), max(n_lat - 2, 0))
+            j0 = np.minimum(np.floor(columna).astype(np.intp), max(n_lon - 2, 0))
+            i1 = np.minimum(i0 + 1, n_lat - 1)
+            j1 = np.minimum(j0 + 1, n_lon - 1)
+            fi = (fila - i0).astype(np.float32)
+            fj = (columna - j0).astype(np.float32)
+            v = self.valores
+            resultado = (
+                v[i0, j0] * (1 - fi) * (1 - fj) + v[i0, j1] * (1 - fi) * fj +
+                v[i1, j0] * fi * (1 - fj) + v[i1, j1] * fi * fj
+            )
+        else:
+            resultado = self.valores[np.rint(fila).astype(np.intp), np.rint(columna).astype(np.intp)]
+
+        return np.where(dentro, resultado, np.float32(np.nan)).astype(np.float32)
+
+    def error_maximo(self, predecir_lote, n_muestras=20000, interpolar=False, semilla=0):
+        """
+        Compara el raster contra el modelo en puntos aleatorios de la caja.
+
+        Returns:
+            dict: {'max': float, 'medio': float, 'p99': float} errores absolutos
+        """
+        rng = np.random.default_rng(semilla)
+        lats = rng.uniform(self.lat_min, self.lat_max, n_muestras)
+        lons = rng.uniform(self.lon_min, self.lon_max, n_muestras)
+        error = np.abs(self.consultar_lote(lats, lons, interpolar) - np.asarray(predecir_lote(lats, lons)))
+        return {
+            'max': float(error.max()),
+            'medio': float(error.mean()),
+            'p99': float(np.percentile(error, 99)),
+        }
+
+
+def reconstruir(ruta, predecir_lote, modelo):
+    """
+    Vuelve a construir el raster guardado en `ruta` (misma caja y paso) con
+    otro modelo; lo usa Modelo.py al guardar un modelo nuevo.
+
+    Args:
+        ruta (str | Path): raster_riesgo.npz existente
+        predecir_lote (callable): f(latitudes, longitudes) -> arreglo de scores
+        modelo (str): hash_arreglos del bosque que calcula `predecir_lote`
+
+    Returns:
+        RasterRiesgo: Raster nuevo (ya guardado)
+    """
+    anterior = RasterRiesgo.cargar(ruta)
+    raster = RasterRiesgo.construir(predecir_lote, anterior.lat_min, anterior.lat_max,
+                                    anterior.lon_min, anterior.lon_max, anterior.paso, modelo=modelo)
+    raster.guardar(ruta)
+    return raster
+
+
+def main():
+    """Construye raster_riesgo.npz evaluando el modelo entrenado sobre la caja de CDMX"""
+    import Realtime
+    from bosque_compilado import hash_arreglos
+
+    parser = argparse.ArgumentParser(description="Precalcula el raster de riesgo de zona sobre CDMX")
+    parser.add_argument("--paso", type=float, default=0.0005,
+                        help="Resolución de la rejilla en grados (default: 0.0005 ≈ 55 m)")
+    parser.add_argument("--salida", default=str(Realtime.raster_path),
+                        help="Archivo .npz de salida")
+    parser.add_argument("--muestras", type=int, default=20000,
+                        help="Puntos aleatorios para medir el error contra el modelo")
+    args = parser.parse_args()
+
+    def predecir_lote(latitudes, longitudes):
+        import pandas as pd
+        entrada = pd.DataFrame({'latitud': latitudes, 'longitud': longitudes})
+        return Realtime.obtener_modelo_sklearn().predict(entrada)
+
+    print(f"🗺️ Construyendo raster con paso {args.paso}° ...")
+    raster = RasterRiesgo.construir(
+        predecir_lote,
+        Realtime.LAT_MIN, Realtime.LAT_MAX, Realtime.LON_MIN, Realtime.LON_MAX,
+        args.paso, modelo=hash_arreglos(Realtime.obtener_predictor().bosque),
+    )
+    print(f"   • Nodos: {raster.valores.shape[0]} × {raster.valores.shape[1]}"
+          f" ({raster.valores.nbytes / 1024:.0f} KiB en float32)")
+
+    for interpolar, nombre in ((False, "vecino más cercano"), (True, "bilineal")):
+        error = raster.error_maximo(predecir_lote, args.muestras, interpolar)
+        print(f"📏 Error vs modelo ({nombre}): máx {error['max']:.2f} | "
+              f"p99 {error['p99']:.2f} | medio {error['medio']:.3f}")
+
+    raster.guardar(args.salida)
+    print(f"💾 Raster guardado como: {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+# Niveles posibles del sensor (0=seco, 1=bajo, 2=medio, 3=alto)
+NIVELES_SENSOR = range(4)
+
+
+class RegistroSensores:
+    """
+    Registro de sensores fijos: sensor_id → coordenadas, persistido en JSON.
+
+    La zona de un sensor fijo nunca cambia, así que al registrarlo (o al
+    recargar el modelo con `recalcular`) se precalcula la fila de alerta
+    completa para cada nivel de sensor. Resolver una lectura es entonces una
+    búsqueda O(1) en diccionario, sin tocar el dataset ni el modelo.
+    """
+
+    def __init__(self, ruta, predecir):
+        """
+        Args:
+            ruta (str | Path): Archivo JSON donde se persisten los sensores
+            predecir (callable): f(latitud, longitud, nivel_sensor) -> dict con
+                la misma forma que predecir_alerta_con_coordenadas
+        """
+        self.ruta = Path(ruta)
+        self._predecir = predecir
+        self._lock = threading.Lock()
+        self._coordenadas = {}
+        self._no_persistidos = set()
+        self._alertas = {}
+
+        if self.ruta.exists():
+            with open(self.ruta, encoding='utf-8') as f:
+                for sensor_id, c in json.load(f).items():
+                    self._coordenadas[sensor_id] = (float(c['latitud']), float(c['longitud']))
+            self.recalcular()
+
+    def __len__(self):
+        return len(self._coordenadas)
+
+    def __contains__(self, sensor_id):
+        return sensor_id in self._alertas
+
+    def _precalcular(self, latitud, longitud, predecir=None):
+        predecir = predecir or self._predecir
+        return tuple(predecir(latitud, longitud, nivel) for nivel in NIVELES_SENSOR)
+
+    def _guardar(self):
+        datos = {sensor_id: {'latitud': lat, 'longitud': lon}
+                 for sensor_id, (lat, lon) in self._coordenadas.items()
+                 if sensor_id not in self._no_persistidos}
+        temporal = self.ruta.with_suffix('.tmp')
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, indent=2, ensure_ascii=False)
+        os.replace(temporal, self.ruta)
+
+    def registrar(self, sensor_id, latitud, longitud, persistir=True):
+        """
+        Registra (o mueve) un sensor y precalcula sus alertas.
+
+        Args:
+            sensor_id (str): Identificador del sensor
+            latitud (float): Latitud del sensor
+            longitud (float): Longitud del sensor
+            persistir (bool): False para sensores que no se guardan en disco
+
+        Returns:
+            dict: Fila de alerta del sensor para nivel 0 (score y clase de zona)
+        """
+        latitud, longitud = float(latitud), float(longitud)
+        alertas = self._precalcular(latitud, longitud)
+        with self._lock:
+            self._alertas[sensor_id] = alertas
+            self._coordenadas[sensor_id] = (latitud, longitud)
+            if persistir:
+                self._no_persistidos.discard(sensor_id)
+                self._guardar()
+            else:
+                self._no_persistidos.add(sensor_id)
+        return alertas[0]
+
+    def eliminar(self, sensor_id):
+        """Elimina un sensor del registro. Devuelve False si no existía."""
+        with self._lock:
+            if self._alertas.pop(sensor_id, None) is None:
+                return False
+            self._coordenadas.pop(sensor_id, None)
+            if sensor_id in self._no_persistidos:
+                self._no_persistidos.discard(sensor_id)
+            else:
+                self._guardar()
+        return True
+
+    def recalcular(self, predecir=None):
+        """
+        Recalcula las alertas de todos los sensores (p. ej. tras recargar el modelo).
+
+        Args:
+            predecir (callable, opcional): Función a usar en lugar de la del registro
+                (p. ej. la del predictor nuevo, antes de activarlo)
+        """
+        with self._lock:
+            coordenadas = dict(self._coordenadas)
+        nuevas = {sensor_id: self._precalcular(lat, lon, predecir) for sensor_id, (lat, lon) in coordenadas.items()}
+        with self._lock:
+            for sensor_id, alertas in nuevas.items():
+                # Solo si el sensor sigue registrado en las mismas coordenadas
+                if self._coordenadas.get(sensor_id) == coordenadas[sensor_id]:
+                    self._alertas[sensor_id] = alertas
+
+    def alerta(self, sensor_id, nivel_sensor):
+        """
+        Fila de alerta precalculada para una lectura del sensor.
+
+        Args:
+            sensor_id (str): Identificador del sensor
+            nivel_sensor (int): Nivel del sensor (0-3)
+
+        Returns:
+            dict | None: Copia de la fila de alerta, o None si el sensor no está registrado
+        """
+        alertas = self._alertas.get(sensor_id)
+        if alertas is None:
+            return None
+        if 0 <= nivel_sensor < len(alertas):
+            return dict(alertas[nivel_sensor])
+        # Nivel fuera de 0-3: se calcula al vuelo con las coordenadas del sensor
+        coordenadas = alertas[0]['coordenadas']
+        return self._predecir(coordenadas['latitud'], coordenadas['longitud'], nivel_sensor)
+
+    def listar(self):
+        """Sensores registrados con su score y clase de zona"""
+        return {
+            sensor_id: {
+                'coordenadas': alertas[0]['coordenadas'],
+                'riesgo_score': alertas[0]['riesgo_score'],
+                'riesgo_zona': alertas[0]['riesgo_zona'],
+            }
+            for sensor_id, alertas in list(self._alertas.items())
+        }
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test de la bitácora JSON (bitacora.py): registros fuera del hilo de la petición,
+muestreo de lecturas VERDE rutinarias, detalle completo en los cambios de alerta
+y rotación del archivo.
+cmd:
+python tests/test_bitacora.py
+"""
+
+import sys
+import os
+import json
+import logging
+import tempfile
+import threading
+from pathlib import Path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from bitacora import BitacoraJSON, MuestreoVerde
+
+
+def leer(ruta):
+    return [json.loads(linea) for linea in Path(ruta).read_text(encoding="utf-8").splitlines()]
+
+
+def test_bitacora_muestreo_y_rotacion():
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = Path(directorio) / "tt2.jsonl"
+        logger = logging.getLogger("prueba_bitacora")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        bitacora = BitacoraJSON(ruta, max_bytes=10 ** 6, muestreo_verde=0.1).iniciar(logger)
+        for i in range(100):
+            logger.info("lectura", extra={"datos": {"sensor_id": "s1", "alerta": "VERDE", "cambio": False}})
+        logger.info("cambio de alerta", extra={"datos": {"sensor_id": "s1", "alerta": "ROJO", "cambio": True}})
+        logger.info("lectura", extra={"datos": {"sensor_id": "s1", "alerta": "ROJO", "cambio": False}})
+        logger.warning("texto con %s", "argumentos")
+        bitacora.detener()
+
+        registros = leer(ruta)
+        verdes = [r for r in registros if r.get("alerta") == "VERDE"]
+        assert len(verdes) == 10
+        assert bitacora.estadisticas()["omitidos_muestreo"] == 90
+        assert [r["msg"] for r in registros[-3:]] == ["cambio de alerta", "lectura", "texto con argumentos"]
+        assert registros[-1]["nivel"] == "WARNING" and registros[-1]["logger"] == "prueba_bitacora"
+        assert logger.handlers == []
+
+        # Rotación: archivos de ~1 KB con a lo más 2 respaldos
+        ruta_rotada = Path(directorio) / "rotada.jsonl"
+        bitacora = BitacoraJSON(ruta_rotada, max_bytes=1024, respaldos=2).iniciar(logger)
+        for i in range(200):
+            logger.info("lectura", extra={"datos": {"i": i}})
+        bitacora.detener()
+        archivos = sorted(p.name for p in Path(directorio).glob("rotada.jsonl*"))
+        assert archivos == ["rotada.jsonl", "rotada.jsonl.1", "rotada.jsonl.2"]
+        assert leer(ruta_rotada)[-1]["i"] == 199
+
+
+def test_muestreo_concurrente():
+    """Los hilos de las peticiones filtran a la vez: ninguna omisión se pierde"""
+    muestreo = MuestreoVerde(0.5)
+    registro = logging.makeLogRecord({"datos": {"alerta": "VERDE", "cambio": False}})
+    pasaron = []
+
+    def filtrar():
+        pasaron.append(sum(muestreo.filter(registro) for _ in range(5000)))
+
+    hilos = [threading.Thread(target=filtrar) for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert sum(pasaron) == 20000 and muestreo.omitidas == 20000
+
+
+def test_ingest_con_bitacora():
+    import Flask_Server
+
+    cliente = Flask_Server.app.test_client()
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = Path(directorio) / "tt2.jsonl"
+        Flask_Server.app.config["LOG_JSON"] = ruta
+        Flask_Server.app.config["LOG_MUESTREO_VERDE"] = 0.5
+        try:
+            Flask_Server.iniciar_bitacora()
+            for _ in range(4):
+                cliente.post("/ingest", json={"sensor_id": "bitacora-1", "v": 0.5, "pct": 1.0})   # VERDE
+            cliente.post("/ingest", json={"sensor_id": "bitacora-1", "v": 0.9, "pct": 30.0})      # → ROJO
+            cliente.post("/ingest", json={"sensor_id": "bitacora-1", "v": 0.9, "pct": 31.0})      # ROJO
+            cliente.post("/ingest/batch", json=[{"sensor_id": "bitacora-1", "v": 0.5, "pct": 1.0}])  # → VERDE
+        finally:
+            Flask_Server.detener_bitacora()
+            Flask_Server.app.config["LOG_JSON"] = None
+            Flask_Server.app.config["LOG_MUESTREO_VERDE"] = 1.0
+
+        registros = [r for r in leer(ruta) if r.get("sensor_id") == "bitacora-1"]
+    # 4 VERDE rutinarias muestreadas a la mitad, el cambio a ROJO, la ROJO rutinaria y el cambio a VERDE del lote
+    assert [(r["msg"], r["alerta"]) for r in registros] == [
+        ("lectura", "VERDE"), ("lectura", "VERDE"), ("cambio de alerta", "ROJO"),
+        ("lectura", "ROJO"), ("cambio de alerta", "VERDE")]
+    cambio = registros[2]
+    assert cambio["anterior"] == "VERDE" and cambio["cambio"] is True
+    assert "estadisticas" in cambio and "coordenadas" in cambio
+    assert "estadisticas" not in registros[3]
+    assert registros[4]["anterior"] == "ROJO"
+
+
+if __name__ == "__main__":
+    test_bitacora_muestreo_y_rotacion()
+    test_muestreo_concurrente()
+    test_ingest_con_bitacora()
+    print("✅ Bitácora JSON correcta")
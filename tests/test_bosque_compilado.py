@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test del bosque compilado (bosque_compilado.py): resultados idénticos bit a
+bit a RandomForestRegressor.predict.
+cmd:
+python tests/test_bosque_compilado.py          # test + benchmark
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+import numpy as np
+import pandas as pd
+from joblib import load
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.tree import DecisionTreeRegressor
+
+from bosque_compilado import (BosqueCompilado, benchmark, cargar_artefacto, guardar_artefacto,
+                              hash_archivo, leer_encabezado, metadatos_modelo)
+
+MODELO_PATH = os.path.join(os.path.dirname(__file__), '../src/modelo_predictivo.pkl')
+DATASET_PATH = os.path.join(os.path.dirname(__file__), '../src/dataset_procesado.csv')
+
+
+def puntos_prueba(n=3000, semilla=0):
+    """Puntos del dataset (justo en los umbrales), aleatorios en CDMX y fuera de CDMX"""
+    rng = np.random.default_rng(semilla)
+    dataset = pd.read_csv(DATASET_PATH)
+    return np.vstack([
+        dataset[['latitud', 'longitud']].to_numpy(),
+        np.column_stack([rng.uniform(19.35, 19.65, n), rng.uniform(-99.35, -98.95, n)]),
+        np.column_stack([rng.uniform(10, 40, 100), rng.uniform(-110, -70, 100)]),
+    ])
+
+
+def test_identico_al_modelo_entrenado():
+    modelo = load(MODELO_PATH)
+    bosque = BosqueCompilado.desde_modelo(modelo)
+    X = puntos_prueba()
+    esperado = modelo.predict(pd.DataFrame(X, columns=['latitud', 'longitud']))
+
+    assert bosque.caracteristicas == ['latitud', 'longitud']
+    assert np.array_equal(bosque.predecir(X), esperado)
+    assert np.array_equal(bosque.predecir(X, tam_bloque=7), esperado)
+    assert [bosque.predecir_punto(lat, lon) for lat, lon in X[:500]] == esperado[:500].tolist()
+
+
+def test_umbrales_en_float32():
+    """Valores a ambos lados de cada umbral (donde importa el redondeo a float32)"""
+    X_train = np.random.default_rng(1).normal(size=(200, 3))
+    y_train = X_train @ np.array([1.0, -2.0, 0.5])
+    for modelo in (RandomForestRegressor(n_estimators=7, max_depth=6, random_state=0),
+                   DecisionTreeRegressor(max_depth=8, random_state=0)):
+        modelo.fit(X_train, y_train)
+        bosque = BosqueCompilado.desde_modelo(modelo)
+
+        umbrales = bosque.umbral[~bosque.es_hoja]
+        cerca = np.concatenate([umbrales, np.nextafter(umbrales, np.inf), np.nextafter(umbrales, -np.inf)])
+        X = np.tile(cerca[:, None], (1, 3))
+        assert np.array_equal(bosque.predecir(X), modelo.predict(X))
+        assert [bosque.predecir_punto(*fila) for fila in X[:200]] == modelo.predict(X[:200]).tolist()
+
+
+def test_artefacto_mapeado_en_memoria():
+    """El artefacto binario se mapea sin copias y predice igual que sklearn"""
+    modelo = load(MODELO_PATH)
+    X = puntos_prueba(500)
+    esperado = modelo.predict(pd.DataFrame(X, columns=['latitud', 'longitud']))
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, 'modelo.bin')
+        guardar_artefacto(BosqueCompilado.desde_modelo(modelo, listas=False), ruta,
+                          metadatos_modelo(modelo, DATASET_PATH, ruta_modelo=MODELO_PATH))
+
+        encabezado = leer_encabezado(ruta)
+        assert encabezado['caracteristicas'] == ['latitud', 'longitud']
+        assert encabezado['n_arboles'] == 100
+        assert encabezado['metadatos']['umbrales_riesgo'] == {'BAJO': 45, 'MEDIO': 65}
+        assert len(encabezado['metadatos']['hash_entrenamiento']) == 64
+        assert encabezado['metadatos']['hash_pkl'] == hash_archivo(MODELO_PATH)
+        assert all(d['offset'] % 64 == 0 for d in encabezado['arreglos'].values())
+
+        bosque = cargar_artefacto(ruta)
+        # Vistas de solo lectura sobre el archivo mapeado (sin copias)
+        assert not bosque.umbral.flags.owndata and not bosque.umbral.flags.writeable
+        assert np.array_equal(bosque.predecir(X), esperado)
+        assert [bosque.predecir_punto(lat, lon) for lat, lon in X[:300]] == esperado[:300].tolist()
+        del bosque
+
+        with open(ruta, 'r+b') as f:
+            f.write(b'XXXX')
+        try:
+            cargar_artefacto(ruta)
+            assert False, "Debió rechazar un artefacto inválido"
+        except ValueError:
+            pass
+
+
+if __name__ == "__main__":
+    test_identico_al_modelo_entrenado()
+    test_umbrales_en_float32()
+    test_artefacto_mapeado_en_memoria()
+    print("✅ Bosque compilado idéntico a RandomForestRegressor.predict")
+
+    resultado = benchmark(load(MODELO_PATH))
+    print(f"⏱️ Un punto: sklearn {resultado['sklearn_punto_us']:.0f} µs → "
+          f"compilado {resultado['compilado_punto_us']:.0f} µs")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test de la búsqueda de hiperparámetros (busqueda_modelo.py): pliegues en
+caché, mismo resultado con uno o varios procesos, objetivo precisión vs
+latencia y gráficas guardadas como archivo.
+cmd:
+python tests/test_busqueda_modelo.py
+"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+import numpy as np
+import pandas as pd
+
+from busqueda_modelo import buscar, elegir, frontera_pareto, graficar, pliegues, rejilla
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+DATASET = SRC_DIR / "dataset_procesado.csv"
+
+
+def test_pliegues_en_cache():
+    with tempfile.TemporaryDirectory() as directorio:
+        primera = pliegues(100, DATASET, k=4, cache_dir=directorio)
+        assert len(list(Path(directorio).glob("pliegues_*.npz"))) == 1
+        segunda = pliegues(100, DATASET, k=4, cache_dir=directorio)
+        for (e1, v1), (e2, v2) in zip(primera, segunda):
+            assert np.array_equal(e1, e2) and np.array_equal(v1, v2)
+        # Cada fila queda en validación exactamente una vez
+        assert np.array_equal(np.sort(np.concatenate([v for _, v in primera])), np.arange(100))
+
+
+def test_busqueda_paralela_igual_a_secuencial():
+    df = pd.read_csv(DATASET)
+    X, y = df[['latitud', 'longitud']].to_numpy(), df['riesgo_zona_score'].to_numpy()
+    combinaciones = rejilla(arboles=(5, 10), profundidades=(3, 6), hoja_minima=(1,))
+    with tempfile.TemporaryDirectory() as directorio:
+        particiones = pliegues(len(X), DATASET, k=3, cache_dir=directorio)
+    secuencial = buscar(X, y, combinaciones, particiones, procesos=1)
+    paralela = buscar(X, y, combinaciones, particiones, procesos=2)
+    assert len(secuencial) == 4
+    for a, b in zip(secuencial, paralela):
+        assert a['parametros'] == b['parametros']
+        assert a['rmse'] == b['rmse'] and a['rmse_pliegues'] == b['rmse_pliegues']
+        assert a['latencia_us'] > 0 and a['nodos'] > 0
+
+
+def test_objetivo_precision_vs_latencia():
+    resultados = [
+        {'parametros': 'grande', 'rmse': 5.00, 'latencia_us': 60.0},
+        {'parametros': 'mediano', 'rmse': 5.05, 'latencia_us': 30.0},
+        {'parametros': 'chico', 'rmse': 6.00, 'latencia_us': 10.0},
+        {'parametros': 'peor', 'rmse': 6.50, 'latencia_us': 40.0},
+    ]
+    assert elegir(resultados, tolerancia=0.02)['parametros'] == 'mediano'
+    assert elegir(resultados, tolerancia=0.0)['parametros'] == 'grande'
+    assert elegir(resultados, tolerancia=0.5)['parametros'] == 'chico'
+    assert [r['parametros'] for r in frontera_pareto(resultados)] == ['chico', 'mediano', 'grande']
+
+    with tempfile.TemporaryDirectory() as directorio:
+        rutas = graficar(resultados, resultados[1], np.array([40.0, 60.0]), np.array([41.0, 58.0]), directorio)
+        assert len(rutas) == 2 and all(r.exists() and r.stat().st_size > 0 for r in rutas)
+
+
+if __name__ == "__main__":
+    test_pliegues_en_cache()
+    test_busqueda_paralela_igual_a_secuencial()
+    test_objetivo_precision_vs_latencia()
+    print("✅ Búsqueda de hiperparámetros correcta")
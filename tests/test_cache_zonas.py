@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test de la caché de scores de zona (cache_zonas.py): clave cuantizada,
+desalojo LRU, vencimiento, estadísticas e invalidación al cambiar la versión
+del predictor (Realtime.configurar_cache_zonas + recargar).
+cmd:
+python tests/test_cache_zonas.py
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+import Realtime
+from cache_zonas import CacheZonas
+
+
+class Contador:
+    """Función de score que cuenta cuántas veces se llamó"""
+
+    def __init__(self):
+        self.llamadas = 0
+
+    def __call__(self, latitud, longitud):
+        self.llamadas += 1
+        return latitud + longitud
+
+
+def test_clave_cuantizada_y_lru():
+    calcular = Contador()
+    cache = CacheZonas(precision=4, max_entradas=2)
+    assert cache.obtener(19.50001, -99.10001, "v1", calcular) == 19.50001 - 99.10001
+    # Misma celda de 4 decimales: score de la primera consulta, sin calcular
+    assert cache.obtener(19.50004, -99.09996, "v1", calcular) == 19.50001 - 99.10001
+    assert cache.clave(19.50001, -99.10001) == cache.clave(19.50004, -99.09996) == (195000, -991000)
+    assert calcular.llamadas == 1
+
+    cache.obtener(19.6, -99.2, "v1", calcular)
+    cache.obtener(19.5, -99.1, "v1", calcular)  # La más reciente: se conserva
+    cache.obtener(19.4, -99.3, "v1", calcular)  # Desaloja (19.6, -99.2)
+    cache.obtener(19.5, -99.1, "v1", calcular)
+    assert calcular.llamadas == 3
+    cache.obtener(19.6, -99.2, "v1", calcular)
+    assert calcular.llamadas == 4
+
+    estadisticas = cache.estadisticas()
+    assert estadisticas['entradas'] == 2
+    assert estadisticas['aciertos'] == 3 and estadisticas['fallos'] == 4
+    assert estadisticas['desalojos'] == 2
+    assert abs(estadisticas['tasa_aciertos'] - 3 / 7) < 1e-12
+
+
+def test_vencimiento_y_version():
+    calcular = Contador()
+    cache = CacheZonas(ttl_s=0.05)
+    cache.obtener(19.5, -99.1, "v1", calcular)
+    cache.obtener(19.5, -99.1, "v1", calcular)
+    time.sleep(0.06)
+    cache.obtener(19.5, -99.1, "v1", calcular)
+    assert calcular.llamadas == 2 and cache.estadisticas()['vencidas'] == 1
+
+    # Otra versión del predictor: se vacía y se vuelve a calcular
+    cache.obtener(19.5, -99.1, "v2", calcular)
+    assert calcular.llamadas == 3
+    assert cache.estadisticas()['invalidaciones'] == 1 and cache.estadisticas()['entradas'] == 1
+
+
+def test_cache_en_realtime():
+    Realtime.calentar()
+    Realtime.configurar_cache_zonas(100)
+    try:
+        latitud, longitud = 19.45, -99.2
+        score = Realtime.obtener_riesgo_zona(latitud, longitud)
+        assert Realtime.obtener_riesgo_zona(latitud, longitud) == score
+        assert Realtime.obtener_riesgo_zona(19.5061618036, -99.1047492201) == 39.2
+        estadisticas = Realtime.estadisticas_cache_zonas()
+        assert estadisticas['aciertos'] == 1 and estadisticas['fallos'] == 2
+
+        # Recargar los mismos archivos conserva la versión (y la caché)
+        assert Realtime.recargar()['ok']
+        Realtime.obtener_riesgo_zona(latitud, longitud)
+        assert Realtime.estadisticas_cache_zonas()['aciertos'] == 2
+
+        # Con el sustituto cambia la versión: la caché no reutiliza los scores del bosque
+        assert Realtime.configurar_sustituto(0.99)['ok']
+        assert Realtime.obtener_riesgo_zona(latitud, longitud) == Realtime.obtener_predictor().riesgo_zona(latitud, longitud)
+        estadisticas = Realtime.estadisticas_cache_zonas()
+        assert estadisticas['fallos'] == 3 and estadisticas['entradas'] == 1
+        assert estadisticas['invalidaciones'] == 1
+    finally:
+        Realtime.configurar_sustituto(None)
+        Realtime.configurar_cache_zonas(None)
+    assert Realtime.estadisticas_cache_zonas() is None
+
+
+if __name__ == "__main__":
+    test_clave_cuantizada_y_lru()
+    test_vencimiento_y_version()
+    test_cache_en_realtime()
+    print("✅ Caché de scores de zona correcta")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test de la ingesta asíncrona con cola acotada (cola_ingesta.py y /ingest en modo asíncrono).
+cmd:
+python tests/test_cola_ingesta.py
+"""
+
+import sys
+import os
+import time
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from cola_ingesta import ColaIngesta
+
+
+def test_back_pressure_y_estadisticas():
+    """Con los trabajadores ocupados la cola se llena y rechaza; luego se vacía"""
+    ocupado, liberar = threading.Event(), threading.Event()
+    procesadas = []
+
+    def procesar(lectura):
+        ocupado.set()
+        liberar.wait(5)
+        if lectura == "falla":
+            raise RuntimeError("lectura inválida")
+        procesadas.append(lectura)
+
+    cola = ColaIngesta(procesar, max_pendientes=3, n_trabajadores=1).iniciar()
+    try:
+        # Una lectura ocupa al trabajador y 3 llenan la cola
+        assert cola.encolar(0)
+        assert ocupado.wait(5)
+        aceptadas = [True] + [cola.encolar(i) for i in range(1, 10)]
+        assert aceptadas == [True] * 4 + [False] * 6
+        assert len(cola) == 3 and cola.encolar("falla") is False
+
+        liberar.set()
+        cola.esperar()
+        assert cola.encolar("falla") is True
+        cola.esperar()
+
+        estadisticas = cola.estadisticas()
+        assert estadisticas['profundidad'] == 0 and estadisticas['max_pendientes'] == 3
+        assert estadisticas['procesadas'] == len(procesadas) == 4
+        assert estadisticas['errores'] == 1 and estadisticas['rechazadas'] == 7
+        assert estadisticas['profundidad_max'] == 3
+        assert estadisticas['espera_ms']['max'] >= estadisticas['espera_ms']['p50'] > 0
+    finally:
+        cola.detener()
+
+
+def test_ingest_asincrono():
+    import Flask_Server
+
+    cliente = Flask_Server.app.test_client()
+    Flask_Server.app.config["INGESTA_ASINCRONA"] = True
+    try:
+        respuesta = cliente.post("/ingest", json={"v": 0.78, "pct": 45.0})
+        assert respuesta.status_code == 202 and respuesta.get_json()["encolado"] is True
+        assert cliente.post("/ingest", json={"v": "x"}).status_code == 400
+
+        cola = Flask_Server.obtener_cola_ingesta()
+        cola.esperar()
+        estado = cliente.get("/ingest/cola").get_json()
+        assert estado["asincrona"] is True and estado["cola"]["procesadas"] >= 1
+
+        # La marca de tiempo se toma al recibir la lectura, antes de encolarla
+        encoladas = []
+        encolar_original = cola.encolar
+        cola.encolar = lambda lectura: encoladas.append(lectura) or encolar_original(lectura)
+        try:
+            antes = time.time()
+            cliente.post("/ingest", json={"v": 0.78, "pct": 45.0})
+            despues = time.time()
+            cliente.post("/ingest", json={"v": 0.78, "pct": 45.0, "ts": 1700000000})
+            cliente.post("/ingest", json={"v": 0.78, "pct": 45.0, "ts": "ayer"})
+        finally:
+            cola.encolar = encolar_original
+        cola.esperar()
+        assert antes <= encoladas[0]["ts"] <= despues
+        assert encoladas[1]["ts"] == 1700000000
+        assert isinstance(encoladas[2]["ts"], float)
+
+        # Cola llena → 503 con Retry-After
+        encolar_original = cola.encolar
+        cola.encolar = lambda lectura: False
+        try:
+            respuesta = cliente.post("/ingest", json={"v": 0.78, "pct": 45.0})
+            assert respuesta.status_code == 503 and respuesta.headers["Retry-After"] == "1"
+        finally:
+            cola.encolar = encolar_original
+    finally:
+        Flask_Server.app.config["INGESTA_ASINCRONA"] = False
+
+
+if __name__ == "__main__":
+    test_back_pressure_y_estadisticas()
+    test_ingest_asincrono()
+    print("✅ Ingesta asíncrona correcta")
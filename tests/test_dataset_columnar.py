@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test del dataset columnar (.npz): trae las mismas columnas que el CSV, se
+ignora si el CSV cambió después y Realtime da el mismo resultado con él.
+cmd:
+python tests/test_dataset_columnar.py
+"""
+
+import sys
+import os
+import contextlib
+import io
+import shutil
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+import numpy as np
+import pandas as pd
+
+import dataset_columnar
+from dataset_columnar import (COLUMNAS, cargar_columnar, csv_a_columnar, leer_columnas,
+                              leer_dataframe, ruta_columnar, vigente)
+from procesar_dataset import procesar_dataset_por_bloques
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+ORIGINAL = SRC_DIR / "Dataset - Full(Dataset).csv"
+PROCESADO = SRC_DIR / "dataset_procesado.csv"
+
+
+def test_mismas_columnas_que_el_csv():
+    esperado = pd.read_csv(PROCESADO)
+    with tempfile.TemporaryDirectory() as directorio:
+        csv = Path(directorio) / "procesado.csv"
+        shutil.copy(PROCESADO, csv)
+        for tam_bloque in (None, 50):
+            csv_a_columnar(csv, tam_bloque)
+            columnas = cargar_columnar(ruta_columnar(csv))
+            for nombre in COLUMNAS:
+                # Bit a bit: mismas coordenadas y scores que al leer el CSV con pandas
+                assert np.array_equal(columnas[nombre], esperado[nombre].to_numpy().astype(columnas[nombre].dtype)), nombre
+
+        with np.load(ruta_columnar(csv)) as datos:
+            assert datos['latitud'].dtype == np.float64
+            assert datos['nivel_riesgo_zona__codigos'].dtype == np.uint8
+
+        df, origen = leer_dataframe(csv)
+        assert origen == ruta_columnar(csv)
+        assert isinstance(df['nivel_riesgo_zona'].dtype, pd.CategoricalDtype)
+        assert df.astype({'nivel_riesgo_zona': str}).equals(esperado)
+
+
+def test_csv_modificado_usa_el_csv():
+    with tempfile.TemporaryDirectory() as directorio:
+        csv = Path(directorio) / "procesado.csv"
+        shutil.copy(PROCESADO, csv)
+        assert leer_columnas(csv, ['latitud'])[1] == csv
+        csv_a_columnar(csv)
+        assert vigente(csv)
+        assert leer_columnas(csv, ['latitud'])[1] == ruta_columnar(csv)
+
+        # Mismo tamaño y fecha: no se vuelve a leer el CSV; otra fecha con el mismo
+        # contenido (p. ej. git checkout): se compara el hash una sola vez
+        hashes = []
+        hash_original = dataset_columnar.hash_entrenamiento
+        dataset_columnar.hash_entrenamiento = lambda ruta: hashes.append(ruta) or hash_original(ruta)
+        try:
+            assert vigente(csv) and hashes == []
+            estado = csv.stat()
+            os.utime(csv, ns=(estado.st_atime_ns, estado.st_mtime_ns + 10**9))
+            assert vigente(csv) and vigente(csv) and len(hashes) == 1
+        finally:
+            dataset_columnar.hash_entrenamiento = hash_original
+
+        # Mismo largo, otro score (68.5 → 48.4): el .npz ya no corresponde
+        texto = csv.read_text(encoding='utf-8')
+        assert ',68.5,' in texto
+        editado = texto.replace(',68.5,', ',48.4,', 1)
+        csv.write_text(editado, encoding='utf-8')
+        assert len(editado) == len(texto) and not vigente(csv)
+        assert leer_columnas(csv, ['latitud'])[1] == csv
+        csv_a_columnar(csv)
+        assert vigente(csv)
+
+        # Se quita la última fila: el .npz ya no corresponde y se lee el CSV
+        lineas = csv.read_text(encoding='utf-8').splitlines(keepends=True)
+        csv.write_text("".join(lineas[:-1]), encoding='utf-8')
+        columnas, origen = leer_columnas(csv, ['latitud'])
+        assert origen == csv and len(columnas['latitud']) == len(lineas) - 2
+
+
+def test_procesar_dataset_genera_npz():
+    with tempfile.TemporaryDirectory() as directorio:
+        salida = Path(directorio) / "procesado.csv"
+        with contextlib.redirect_stdout(io.StringIO()):
+            procesar_dataset_por_bloques(ORIGINAL, salida, 100)
+        assert vigente(salida)
+        assert len(cargar_columnar(ruta_columnar(salida), ['latitud'])['latitud']) == 306
+
+
+def test_realtime_con_npz():
+    import Realtime
+    from indice_espacial import IndiceEspacial
+
+    predictor = Realtime.PredictorRiesgo.cargar()
+    assert predictor.indice_dataset.buscar(19.5061618036, -99.1047492201) == 39.2
+    # Mismo resultado que el índice armado directamente del CSV
+    esperado = pd.read_csv(PROCESADO)
+    desde_csv = IndiceEspacial(esperado['latitud'], esperado['longitud'], esperado['riesgo_zona_score'])
+    for lat, lon in esperado[['latitud', 'longitud']].to_numpy()[::17]:
+        assert predictor.indice_dataset.buscar(lat, lon) == desde_csv.buscar(lat, lon)
+
+
+if __name__ == "__main__":
+    test_mismas_columnas_que_el_csv()
+    test_csv_modificado_usa_el_csv()
+    test_procesar_dataset_genera_npz()
+    test_realtime_con_npz()
+    print("✅ El dataset columnar equivale al CSV")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test de las estadísticas incrementales por sensor (estadisticas_sensor.py) y de la
+tasa de subida como entrada opcional de las reglas de alerta.
+cmd:
+python tests/test_estadisticas_sensor.py
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+import numpy as np
+
+from estadisticas_sensor import EstadisticasSensor, VentanaMinMax
+
+
+def test_ventana_min_max():
+    """Las deques monótonas dan lo mismo que recorrer la ventana completa"""
+    rng = np.random.default_rng(0)
+    ts = np.cumsum(rng.uniform(1, 20, 3000))
+    valores = rng.uniform(0, 100, 3000).round(1)
+    ventana = VentanaMinMax(300)
+    for i in range(len(ts)):
+        ventana.agregar(ts[i], valores[i])
+        en_ventana = valores[:i + 1][ts[:i + 1] >= ts[i] - 300]
+        assert ventana.minimo == en_ventana.min() and ventana.maximo == en_ventana.max()
+
+
+def test_ewma_y_tasa_subida():
+    estadisticas = EstadisticasSensor(tau_s=60, ventanas_s=(300,))
+    # Nivel estable: EWMA = valor y tasa 0
+    for t in range(0, 600, 10):
+        resumen = estadisticas.actualizar(1700000000 + t, 20.0)
+    assert resumen['ewma_pct'] == 20.0 and resumen['tasa_subida'] == 0.0
+
+    # Subida constante de 3 %/min: la tasa converge a 3 y el EWMA se queda atrás del valor
+    for t in range(600, 1800, 10):
+        resumen = estadisticas.actualizar(1700000000 + t, 20.0 + (t - 590) * 3 / 60)
+    assert abs(resumen['tasa_subida'] - 3.0) < 0.01
+    assert resumen['ewma_pct'] < estadisticas.pct
+    assert resumen['pct_max_300s'] == estadisticas.pct
+    assert resumen['n'] == 180
+
+    # Lectura fuera de orden: se trata como simultánea y no rompe las ventanas
+    resumen = estadisticas.actualizar(1700000000, 10.0)
+    assert resumen['pct_min_300s'] == 10.0 and resumen['n'] == 181
+
+
+def test_reglas_con_tasa():
+    from Realtime import (TASA_SUBIDA_RAPIDA, determinar_alerta, determinar_alerta_lote, escalar_por_tasa,
+                          predecir_alerta)
+
+    assert escalar_por_tasa('VERDE', None) == 'VERDE'
+    assert escalar_por_tasa('VERDE', TASA_SUBIDA_RAPIDA - 0.1) == 'VERDE'
+    assert escalar_por_tasa('VERDE', TASA_SUBIDA_RAPIDA) == 'AMARILLO'
+    assert escalar_por_tasa('AMARILLO', 10) == 'ROJO' and escalar_por_tasa('ROJO', 10) == 'ROJO'
+
+    # Nivel 1 subiendo rápido en zona MEDIO pesa más que nivel 2 estable
+    assert determinar_alerta('MEDIO', 1, tasa_subida=5.0) == 'AMARILLO'
+    assert determinar_alerta('MEDIO', 1) == 'VERDE'
+
+    niveles_riesgo = ['BAJO', 'MEDIO', 'ALTO']
+    indices, niveles = np.meshgrid(range(3), range(4), indexing='ij')
+    for tasa in (np.nan, 0.0, TASA_SUBIDA_RAPIDA):
+        tasas = np.full(indices.size, tasa)
+        lote = determinar_alerta_lote(indices.ravel(), niveles.ravel(), tasas)
+        esperado = [determinar_alerta(niveles_riesgo[r], n, None if np.isnan(tasa) else tasa)
+                    for r, n in zip(indices.ravel(), niveles.ravel())]
+        assert [['VERDE', 'AMARILLO', 'ROJO'][a] for a in lote] == esperado
+
+    # Coordenadas fijas (zona MEDIO), nivel 1
+    assert predecir_alerta(1)['alerta'] == 'VERDE'
+    resultado = predecir_alerta(1, tasa_subida=3.0)
+    assert resultado['alerta'] == 'AMARILLO' and resultado['tasa_subida'] == 3.0
+    assert predecir_alerta(1)['alerta'] == 'VERDE'  # La fila precalculada no se modifica
+
+
+def test_ingest_con_estadisticas():
+    import Flask_Server
+
+    cliente = Flask_Server.app.test_client()
+    respuestas = [cliente.post("/ingest", json={"sensor_id": "tasa-1", "ts": 1700000000 + t, "v": 0.70,
+                                                "pct": 10.0 + t / 10}).get_json()
+                  for t in range(0, 600, 10)]
+    estadisticas = respuestas[-1]["estadisticas"]
+    assert estadisticas["n"] == 60 and estadisticas["pct_max_300s"] == 69.0
+    assert estadisticas["tasa_subida"] > 5.0
+
+    lectura = {"sensor_id": "tasa-1", "ts": 1700000600, "v": 0.70, "pct": 70.0}
+    sin_tasa = cliente.post("/ingest/batch", json=[lectura]).get_json()["resultados"][0]
+    Flask_Server.app.config["ALERTA_CON_TASA"] = True
+    try:
+        lectura["ts"] += 10
+        con_tasa = cliente.post("/ingest/batch", json=[lectura]).get_json()["resultados"][0]
+    finally:
+        Flask_Server.app.config["ALERTA_CON_TASA"] = False
+    # Nivel 1 en zona MEDIO: VERDE, pero sube rápido → AMARILLO
+    assert sin_tasa["alerta"] == "VERDE" and con_tasa["alerta"] == "AMARILLO"
+    assert con_tasa["estadisticas"]["n"] == 62
+
+
+if __name__ == "__main__":
+    test_ventana_min_max()
+    test_ewma_y_tasa_subida()
+    test_reglas_con_tasa()
+    test_ingest_con_estadisticas()
+    print("✅ Estadísticas por sensor correctas")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test de los endpoints de Flask_Server con el cliente de pruebas de Flask.
+cmd:
+python tests/test_flask_server.py
+"""
+
+import sys
+import os
+import subprocess
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+import Flask_Server
+from Flask_Server import app, mapear_voltajes_a_niveles
+
+
+def nivel_original(v):
+    """Mapeo de voltaje original de /ingest"""
+    if v <= 0.683:
+        return 0
+    elif v <= 0.759:
+        return 1
+    elif v <= 0.812:
+        return 2
+    return 3
+
+
+def test_mapeo_voltaje():
+    voltajes = [0.0, 0.5, 0.683, 0.6831, 0.759, 0.76, 0.812, 0.8121, 1.2, 5.0]
+    assert list(mapear_voltajes_a_niveles(voltajes)) == [nivel_original(v) for v in voltajes]
+    assert int(mapear_voltajes_a_niveles(0.7)) == 1
+
+
+def test_ingest_individual():
+    cliente = app.test_client()
+    respuesta = cliente.post("/ingest", json={"v": 0.78, "pct": 45.0})
+    assert respuesta.status_code == 200
+    assert respuesta.get_json()["ok"] is True
+
+
+def test_ingest_batch():
+    cliente = app.test_client()
+    lecturas = [
+        {"sensor_id": "s1", "ts": 1700000000, "v": 0.5, "pct": 10.0},
+        {"sensor_id": "s2", "ts": 1700000001, "v": 0.9, "pct": 95.0},
+        {"sensor_id": "s3", "ts": 1700000002, "v": "x", "pct": 1.0},
+        {"sensor_id": "s4", "ts": 1700000003, "v": 0.78, "pct": 60.0,
+         "lat": 19.5061618036, "lon": -99.1047492201},
+    ]
+    respuesta = cliente.post("/ingest/batch", json={"lecturas": lecturas})
+    assert respuesta.status_code == 200
+    resultados = respuesta.get_json()["resultados"]
+
+    assert len(resultados) == 4
+    assert resultados[0]["sensor_id"] == "s1" and resultados[0]["nivel_sensor"] == 0
+    assert resultados[1]["nivel_sensor"] == 3 and resultados[1]["ts"] == 1700000001
+    assert resultados[2]["ok"] is False
+    # Coordenada de test_fix.py: zona BAJO (39.2), nivel 2 → VERDE
+    assert resultados[3]["riesgo_score"] == 39.2
+    assert resultados[3]["alerta"] == "VERDE"
+
+    # También acepta la lista directa
+    respuesta = cliente.post("/ingest/batch", json=lecturas[:2])
+    assert len(respuesta.get_json()["resultados"]) == 2
+
+
+def test_ingest_batch_invalido():
+    cliente = app.test_client()
+    assert cliente.post("/ingest/batch", json={"v": 1}).status_code == 400
+    demasiadas = [{"v": 0.5, "pct": 1.0}] * (Flask_Server.MAX_LECTURAS_LOTE + 1)
+    assert cliente.post("/ingest/batch", json=demasiadas).status_code == 413
+
+    # Valores que pasan isinstance pero no se pueden usar: solo falla esa lectura
+    lecturas = [{"v": 0.5, "pct": 1.0, "lat": float("nan"), "lon": -99.1},
+                {"v": float("inf"), "pct": 1.0},
+                {"sensor_id": ["a"], "v": 0.5, "pct": 1.0},
+                {"sensor_id": {}, "v": 0.5, "pct": 1.0},
+                {"v": 0.5, "pct": 1.0}]
+    respuesta = cliente.post("/ingest/batch", json=lecturas)
+    assert respuesta.status_code == 200
+    resultados = respuesta.get_json()["resultados"]
+    assert [r["ok"] for r in resultados] == [False, False, False, False, True]
+    assert resultados[0]["error"] == "lat y lon deben ser números finitos"
+    assert resultados[2]["error"] == resultados[3]["error"] == "sensor_id debe ser texto"
+
+
+def test_health_calentamiento():
+    """"/" responde 503 mientras carga el modelo y 200 (con la versión) al terminar"""
+    cliente = app.test_client()
+    respuesta = cliente.get("/")
+    assert respuesta.status_code in (200, 503)
+    Flask_Server.iniciar_calentamiento().join(timeout=60)
+    respuesta = cliente.get("/")
+    assert respuesta.status_code == 200
+    assert respuesta.get_json()["status"] == "running" and respuesta.get_json()["version"]
+
+
+def test_importacion_sin_carga():
+    """Importar Flask_Server no carga el modelo, el dataset ni pandas"""
+    codigo = ("import sys, Flask_Server, Realtime; "
+              "assert Realtime._predictor is None and Realtime._registro_sensores is None; "
+              "assert 'pandas' not in sys.modules and 'joblib' not in sys.modules")
+    src = os.path.join(os.path.dirname(__file__), '../src')
+    subprocess.run([sys.executable, "-c", codigo], cwd=src, check=True)
+
+
+if __name__ == "__main__":
+    test_mapeo_voltaje()
+    test_ingest_individual()
+    test_ingest_batch()
+    test_ingest_batch_invalido()
+    test_health_calentamiento()
+    test_importacion_sin_carga()
+    print("✅ Endpoints de Flask_Server correctos")
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Test del historial de lecturas en SQLite (historial.py y /historial/<sensor_id>).
+cmd:
+python tests/test_historial.py
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+import numpy as np
+
+from historial import HistorialLecturas, parsear_resolucion
+
+ALERTAS = ('VERDE', 'AMARILLO', 'ROJO')
+
+
+def lecturas_aleatorias(n=5000, semilla=0):
+    """Lecturas cada ~10 s de dos sensores durante ~14 h"""
+    rng = np.random.default_rng(semilla)
+    ts = 1700000000 + np.cumsum(rng.uniform(5, 15, n))
+    return [(f"s{i % 2}", float(ts[i]), float(rng.uniform(0.5, 1.0)), float(rng.uniform(0, 100)),
+             0, 50.0, ALERTAS[int(rng.integers(3))]) for i in range(n)]
+
+
+def agregado_directo(filas, sensor_id, resolucion, desde, hasta):
+    """Agregación de referencia sobre las lecturas crudas"""
+    cubetas = {}
+    for s, ts, v, pct, _, _, alerta in filas:
+        if s == sensor_id and desde <= ts < hasta:
+            cubetas.setdefault(int(ts // resolucion) * resolucion, []).append((v, pct, ALERTAS.index(alerta)))
+    return [(inicio, len(c), min(x[0] for x in c), max(x[0] for x in c), sum(x[0] for x in c) / len(c),
+             max(x[2] for x in c)) for inicio, c in sorted(cubetas.items())]
+
+
+def test_escritura_agrupada():
+    """Las lecturas se escriben en pocas transacciones y se leen en orden"""
+    with tempfile.TemporaryDirectory() as carpeta:
+        historial = HistorialLecturas(os.path.join(carpeta, 'historial.db'), tam_lote=100)
+        for i in range(1000):
+            historial.registrar(f"s{i % 2}", 1700000000 + i, 0.7, 50.0, 1, 58.6, 'AMARILLO')
+        assert historial.vaciar(timeout=10)
+
+        estadisticas = historial.estadisticas()
+        assert estadisticas['escritas'] == 1000 and estadisticas['pendientes'] == 0
+        assert estadisticas['transacciones'] <= 20
+
+        lecturas = historial.consultar('s1', desde=1700000100, hasta=1700000200)
+        assert [l['ts'] for l in lecturas] == list(range(1700000101, 1700000200, 2))
+        assert lecturas[0]['alerta'] == 'AMARILLO' and lecturas[0]['nivel_sensor'] == 1
+        # Con límite: las más recientes, en orden cronológico
+        assert [l['ts'] for l in historial.consultar('s0', limite=3)] == [1700000994, 1700000996, 1700000998]
+        historial.cerrar()
+
+        # Persisten al reabrir
+        reabierto = HistorialLecturas(os.path.join(carpeta, 'historial.db'))
+        assert len(reabierto.consultar('s0')) == 500
+        reabierto.cerrar()
+
+
+def test_bufer_lleno():
+    with tempfile.TemporaryDirectory() as carpeta:
+        historial = HistorialLecturas(os.path.join(carpeta, 'historial.db'), max_pendientes=10,
+                                      intervalo_s=60, tam_lote=1000)
+        filas = [("s", float(i), 0.5, 10.0, 0, 39.2, 'VERDE') for i in range(15)]
+        assert historial.registrar_lote(filas) == 10
+        assert historial.estadisticas()['descartadas'] == 5
+        historial.cerrar()
+        assert historial.estadisticas()['escritas'] == 10
+
+
+def test_fila_rechazada_no_pierde_el_bloque():
+    """Una fila que SQLite rechaza no se lleva a las demás del bloque ni cuenta como escrita"""
+    with tempfile.TemporaryDirectory() as carpeta:
+        historial = HistorialLecturas(os.path.join(carpeta, 'historial.db'), intervalo_s=60)
+        filas = [("s", 1700000000.0 + i, 0.5, 10.0, 0, 39.2, 'VERDE') for i in range(5)]
+        filas[2] = (None, 1700000002.0, 0.5, 10.0, 0, 39.2, 'VERDE')  # sensor_id NOT NULL
+        assert historial.registrar_lote(filas) == 5
+        assert historial.vaciar(timeout=10)
+        estadisticas = historial.estadisticas()
+        assert estadisticas['escritas'] == 4 and estadisticas['rechazadas'] == 1
+        assert [l['ts'] for l in historial.consultar('s')] == [1700000000, 1700000001, 1700000003, 1700000004]
+        historial.cerrar()
+
+
+def test_agregados_por_resolucion():
+    """Los agregados incrementales coinciden con agregar las lecturas crudas"""
+    filas = lecturas_aleatorias()
+    with tempfile.TemporaryDirectory() as carpeta:
+        historial = HistorialLecturas(os.path.join(carpeta, 'historial.db'), tam_lote=256)
+        for inicio in range(0, len(filas), 300):
+            historial.registrar_lote(filas[inicio:inicio + 300])
+        historial.vaciar(timeout=10)
+
+        desde, hasta = 1700006400, 1700035200  # Múltiplos de todas las resoluciones
+        for resolucion, fuente in ((60, 'rollup_60'), (900, 'rollup_900'), (1800, 'rollup_900'),
+                                   (3600, 'rollup_3600'), (7200, 'rollup_3600'), (30, 'lecturas')):
+            usada, serie = historial.consultar_agregado('s1', resolucion, desde, hasta)
+            assert usada == fuente
+            esperado = agregado_directo(filas, 's1', resolucion, desde, hasta)
+            obtenido = [(c['inicio'], c['n'], c['v_min'], c['v_max'], c['v_media'],
+                         ALERTAS.index(c['alerta_max'])) for c in serie]
+            assert len(obtenido) == len(esperado)
+            for a, b in zip(obtenido, esperado):
+                assert a[:4] == b[:4] and a[5] == b[5] and abs(a[4] - b[4]) < 1e-9
+        historial.cerrar()
+
+        # Un historial sin agregados (creado antes) los reconstruye al abrirse
+        conexion = sqlite3.connect(os.path.join(carpeta, 'historial.db'))
+        with conexion:
+            conexion.execute("DELETE FROM rollups")
+        conexion.close()
+        reabierto = HistorialLecturas(os.path.join(carpeta, 'historial.db'))
+        _, serie = reabierto.consultar_agregado('s0', 3600)
+        assert [(c['inicio'], c['n']) for c in serie] == \
+            [(b[0], b[1]) for b in agregado_directo(filas, 's0', 3600, 0, float('inf'))]
+        reabierto.cerrar()
+
+
+def test_parsear_resolucion():
+    assert [parsear_resolucion(r) for r in ("1m", "15m", "1h", "1d", "300", 45)] == [60, 900, 3600, 86400, 300, 45]
+    for invalida in ("0m", "abc", "-5", "1w"):
+        try:
+            parsear_resolucion(invalida)
+            assert False, f"Debió rechazar {invalida}"
+        except ValueError:
+            pass
+
+
+def test_endpoint_historial():
+    import Flask_Server
+
+    cliente = Flask_Server.app.test_client()
+    ruta_original = Flask_Server.app.config["HISTORIAL_PATH"]
+    historial_original = Flask_Server._historial
+    with tempfile.TemporaryDirectory() as carpeta:
+        Flask_Server.app.config["HISTORIAL_PATH"] = os.path.join(carpeta, 'historial.db')
+        Flask_Server._historial = None
+        try:
+            cliente.post("/ingest", json={"sensor_id": "h1", "ts": 1700000000, "v": 0.9, "pct": 90.0})
+            cliente.post("/ingest/batch", json=[{"sensor_id": "h1", "ts": 1700000010, "v": 0.5, "pct": 5.0},
+                                                {"sensor_id": "h2", "ts": 1700000020, "v": 0.7, "pct": 30.0}])
+            Flask_Server.obtener_historial().vaciar(timeout=10)
+
+            lecturas = cliente.get("/historial/h1").get_json()["lecturas"]
+            assert [(l['ts'], l['nivel_sensor']) for l in lecturas] == [(1700000000, 3), (1700000010, 0)]
+            assert lecturas[0]['alerta'] == 'ROJO' and lecturas[0]['riesgo_score'] == 58.6
+            assert len(cliente.get("/historial/h1?desde=1700000005").get_json()["lecturas"]) == 1
+
+            respuesta = cliente.get("/historial/h1?resolucion=15m").get_json()
+            assert respuesta["fuente"] == "rollup_900" and respuesta["resolucion"] == 900
+            assert respuesta["serie"][0]["n"] == 2 and respuesta["serie"][0]["alerta_max"] == "ROJO"
+            assert respuesta["serie"][0]["pct_max"] == 90.0 and respuesta["serie"][0]["v_min"] == 0.5
+            assert cliente.get("/historial/h1?resolucion=xyz").status_code == 400
+
+            # Lote con "ts" null (se usa el de recepción) y con "ts" no numérico (lectura inválida)
+            respuesta = cliente.post("/ingest/batch", json=[
+                {"sensor_id": "h3", "ts": None, "v": 0.5, "pct": 5.0},
+                {"sensor_id": "h3", "ts": "ayer", "v": 0.5, "pct": 5.0},
+                {"sensor_id": "h3", "ts": 1700000030, "v": 0.5, "pct": 5.0}]).get_json()["resultados"]
+            assert respuesta[0]["ok"] and isinstance(respuesta[0]["ts"], float)
+            assert not respuesta[1]["ok"] and respuesta[1]["status"] == 400
+            assert respuesta[2]["ok"] and respuesta[2]["ts"] == 1700000030
+            Flask_Server.obtener_historial().vaciar(timeout=10)
+            assert len(cliente.get("/historial/h3").get_json()["lecturas"]) == 2
+            assert Flask_Server.obtener_historial().estadisticas()['rechazadas'] == 0
+            Flask_Server.obtener_historial().cerrar()
+        finally:
+            Flask_Server.app.config["HISTORIAL_PATH"] = ruta_original
+            Flask_Server._historial = historial_original
+
+
+if __name__ == "__main__":
+    test_escritura_agrupada()
+    test_bufer_lleno()
+    test_fila_rechazada_no_pierde_el_bloque()
+    test_agregados_por_resolucion()
+    test_parsear_resolucion()
+    test_endpoint_historial()
+    print("✅ Historial de lecturas correcto")
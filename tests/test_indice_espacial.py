@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test del índice espacial en memoria usado por obtener_riesgo_zona.
+Compara cada búsqueda contra el escaneo completo original (máscara booleana).
+cmd:
+python tests/test_indice_espacial.py
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+import numpy as np
+import pandas as pd
+
+from indice_espacial import IndiceEspacial, TOLERANCIA_GRADOS
+
+DATASET_PATH = os.path.join(os.path.dirname(__file__), '../src/dataset_procesado.csv')
+
+
+def buscar_escaneo(dataset, lat, lon):
+    """Búsqueda original: escaneo O(n) con máscara booleana"""
+    coincidencia = dataset[
+        (abs(dataset['latitud'] - lat) < TOLERANCIA_GRADOS) &
+        (abs(dataset['longitud'] - lon) < TOLERANCIA_GRADOS)
+    ]
+    if coincidencia.empty:
+        return None
+    return coincidencia['riesgo_zona_score'].iloc[0]
+
+
+def indice_del_csv(dataset):
+    """Índice armado directamente de las columnas del CSV procesado"""
+    return IndiceEspacial(dataset['latitud'], dataset['longitud'], dataset['riesgo_zona_score'])
+
+
+def test_indice_igual_a_escaneo():
+    """El índice debe devolver exactamente lo mismo que el escaneo completo"""
+    dataset = pd.read_csv(DATASET_PATH)
+    indice = indice_del_csv(dataset)
+    assert len(indice) == len(dataset)
+
+    rng = np.random.default_rng(0)
+    consultas = list(zip(dataset['latitud'], dataset['longitud']))
+    # Puntos desplazados alrededor del borde de la tolerancia
+    for lat, lon in consultas[:100]:
+        for _ in range(5):
+            d_lat, d_lon = rng.uniform(-2 * TOLERANCIA_GRADOS, 2 * TOLERANCIA_GRADOS, 2)
+            consultas.append((lat + d_lat, lon + d_lon))
+    # Puntos aleatorios en CDMX
+    consultas += list(zip(rng.uniform(19.35, 19.65, 200), rng.uniform(-99.35, -98.95, 200)))
+
+    for lat, lon in consultas:
+        assert indice.buscar(lat, lon) == buscar_escaneo(dataset, lat, lon), (lat, lon)
+
+
+def test_coordenada_conocida():
+    """La coordenada de test_fix.py debe encontrarse con score 39.2"""
+    indice = indice_del_csv(pd.read_csv(DATASET_PATH))
+    assert round(indice.buscar(19.5061618036, -99.1047492201), 1) == 39.2
+    assert indice.buscar(40.7128, -74.0060) is None
+
+
+def test_primera_fila_gana():
+    """Con varias filas dentro de la tolerancia se devuelve la primera"""
+    indice = IndiceEspacial([19.5, 19.50005, 19.5], [-99.1, -99.1, -99.10005], [1.0, 2.0, 3.0])
+    assert indice.buscar(19.50003, -99.10003) == 1.0
+    assert indice.buscar(19.50014, -99.1) == 2.0
+
+
+if __name__ == "__main__":
+    test_indice_igual_a_escaneo()
+    test_coordenada_conocida()
+    test_primera_fila_gana()
+    print("✅ Índice espacial equivalente al escaneo del dataset")
+
+    dataset = pd.read_csv(DATASET_PATH)
+    indice = indice_del_csv(dataset)
+    n = 100000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        indice.buscar(19.5061618036, -99.1047492201)
+    print(f"⏱️ Búsqueda en índice: {(time.perf_counter() - t0) / n * 1e6:.3f} µs")
+    t0 = time.perf_counter()
+    for _ in range(100):
+        buscar_escaneo(dataset, 19.5061618036, -99.1047492201)
+    print(f"⏱️ Escaneo completo: {(time.perf_counter() - t0) / 100 * 1e6:.1f} µs")
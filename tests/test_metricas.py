@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test de las métricas (metricas.py) y del endpoint /metrics en formato Prometheus.
+cmd:
+python tests/test_metricas.py
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from metricas import RegistroMetricas
+
+
+def valor_serie(texto, serie):
+    """Valor de una línea `serie valor` del texto exportado"""
+    for linea in texto.splitlines():
+        if linea.startswith(serie + " "):
+            return float(linea.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_formato_prometheus():
+    registro = RegistroMetricas()
+    contador = registro.contador("prueba_total", "Contador de prueba", ("color",))
+    histograma = registro.histograma("prueba_segundos", "Histograma de prueba", ("etapa",), cubetas=(0.1, 1.0))
+    contador.inc(color="ROJO")
+    contador.inc(2, color="ROJO")
+    contador.inc(color='con "comillas"')
+    for valor in (0.05, 0.1, 0.5, 3.0):
+        histograma.observar(valor, etapa="x")
+
+    texto = registro.exportar()
+    assert "# TYPE prueba_total counter" in texto and "# TYPE prueba_segundos histogram" in texto
+    assert valor_serie(texto, 'prueba_total{color="ROJO"}') == 3
+    assert 'prueba_total{color="con \\"comillas\\""} 1' in texto
+    # Cubetas acumulativas (le es inclusivo)
+    assert valor_serie(texto, 'prueba_segundos_bucket{etapa="x",le="0.1"}') == 2
+    assert valor_serie(texto, 'prueba_segundos_bucket{etapa="x",le="1.0"}') == 3
+    assert valor_serie(texto, 'prueba_segundos_bucket{etapa="x",le="+Inf"}') == 4
+    assert valor_serie(texto, 'prueba_segundos_count{etapa="x"}') == 4
+    assert abs(valor_serie(texto, 'prueba_segundos_sum{etapa="x"}') - 3.65) < 1e-9
+
+
+def test_endpoint_metrics():
+    import Flask_Server
+    import Realtime
+
+    cliente = Flask_Server.app.test_client()
+    antes = cliente.get("/metrics").get_data(as_text=True)
+    cliente.post("/ingest", json={"v": 0.9, "pct": 90.0})
+    cliente.post("/ingest", json={"v": "x"})
+    cliente.post("/ingest/batch", json=[{"v": 0.5, "pct": 1.0, "lat": 19.5061618036, "lon": -99.1047492201},
+                                        {"v": 0.5, "pct": 1.0, "lat": 19.45, "lon": -99.2}])
+    # Una coordenada fuera del dataset y del raster cae al modelo
+    Realtime.obtener_riesgo_zona(25.0, -100.0)
+
+    respuesta = cliente.get("/metrics")
+    assert respuesta.status_code == 200 and respuesta.mimetype == "text/plain"
+    despues = respuesta.get_data(as_text=True)
+
+    def delta(serie):
+        return valor_serie(despues, serie) - valor_serie(antes, serie)
+
+    assert delta('tt2_lecturas_total{endpoint="ingest",resultado="procesada"}') == 1
+    assert delta('tt2_lecturas_total{endpoint="ingest",resultado="invalida"}') == 1
+    assert delta('tt2_lecturas_total{endpoint="ingest_batch",resultado="procesada"}') == 2
+    assert delta('tt2_alertas_total{alerta="ROJO"}') == 1      # Coordenadas fijas (MEDIO), nivel 3
+    assert delta('tt2_riesgo_zona_total{riesgo_zona="BAJO"}') >= 1
+    assert delta('tt2_fuente_score_total{fuente="dataset"}') == 1
+    assert delta('tt2_fuente_score_total{fuente="modelo"}') >= 1
+    for etapa in ("parseo_json", "mapeo_voltaje", "alerta", "logging", "historial", "ingest", "modelo"):
+        assert delta(f'tt2_etapa_segundos_count{{etapa="{etapa}"}}') >= 1, etapa
+    assert valor_serie(despues, "tt2_modelo_carga_segundos") > 0
+    assert f'tt2_modelo_info{{version="{Realtime.obtener_predictor().version}"}} 1' in despues
+
+
+if __name__ == "__main__":
+    test_formato_prometheus()
+    test_endpoint_metrics()
+    print("✅ Métricas correctas")
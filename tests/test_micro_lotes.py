@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test del planificador de micro-lotes (micro_lotes.py).
+cmd:
+python tests/test_micro_lotes.py
+"""
+
+import sys
+import os
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+import numpy as np
+
+from micro_lotes import PlanificadorMicroLotes
+
+
+def test_lotes_concurrentes():
+    """Cada hilo recibe su propio resultado y las peticiones se agrupan"""
+    tamanos = []
+
+    def funcion_lote(X):
+        tamanos.append(len(X))
+        return X[:, 0] * 10 + X[:, 1]
+
+    planificador = PlanificadorMicroLotes(funcion_lote, ventana_s=0.02, max_lote=8)
+    resultados = {}
+    barrera = threading.Barrier(20)
+
+    def cliente(i):
+        barrera.wait()
+        resultados[i] = planificador.calcular(i, 0.5)
+
+    hilos = [threading.Thread(target=cliente, args=(i,)) for i in range(20)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    planificador.detener()
+
+    assert resultados == {i: i * 10 + 0.5 for i in range(20)}
+    assert max(tamanos) == 8 and sum(tamanos) == 20 and len(tamanos) < 20
+    estadisticas = planificador.estadisticas()
+    assert estadisticas['filas'] == 20 and estadisticas['lote_max'] == 8
+
+
+def test_error_en_lote():
+    def funcion_lote(X):
+        raise ValueError("modelo no disponible")
+
+    planificador = PlanificadorMicroLotes(funcion_lote, ventana_s=0)
+    try:
+        planificador.calcular(1.0, 2.0, timeout=5)
+        assert False, "Debió propagar el error"
+    except ValueError:
+        pass
+    planificador.detener()
+
+
+def test_riesgo_zona_con_micro_lotes():
+    """Mismo score que sin micro-lotes (el bosque por lote es idéntico al de un punto)"""
+    import Realtime
+
+    rng = np.random.default_rng(0)
+    puntos = np.column_stack([rng.uniform(19.36, 19.64, 50), rng.uniform(-99.34, -98.96, 50)])
+    predictor = Realtime.obtener_predictor()
+    esperado = [predictor.bosque.predecir_punto(lat, lon) for lat, lon in puntos]
+
+    Realtime.configurar_micro_lotes(0.001, 64)
+    try:
+        assert predictor.planificador is not None
+        predictor.raster, raster = None, predictor.raster
+        try:
+            assert [Realtime.obtener_riesgo_zona(lat, lon) for lat, lon in puntos] == esperado
+        finally:
+            predictor.raster = raster
+    finally:
+        Realtime.configurar_micro_lotes(None)
+    assert predictor.planificador is None
+
+
+def test_ingest_concurrente_en_micro_lotes():
+    """Las lecturas de /ingest con coordenadas que caen al modelo se agrupan (síncrono y con cola)"""
+    import Flask_Server
+    import Realtime
+
+    # Fuera del dataset y del raster: todas van al modelo
+    lecturas = [{"sensor_id": f"movil-{i}", "v": 0.78, "pct": 40.0, "lat": 25.0 + i * 0.001, "lon": -100.0}
+                for i in range(16)]
+    predictor = Realtime.obtener_predictor()
+    Realtime.configurar_micro_lotes(0.05, 64)
+    try:
+        # Modo síncrono: cada petición en su hilo
+        barrera = threading.Barrier(len(lecturas))
+        codigos = []
+
+        def enviar(lectura):
+            cliente = Flask_Server.app.test_client()
+            barrera.wait()
+            codigos.append(cliente.post("/ingest", json=lectura).status_code)
+
+        hilos = [threading.Thread(target=enviar, args=(lectura,)) for lectura in lecturas]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        assert codigos == [200] * len(lecturas)
+        estadisticas = predictor.planificador.estadisticas()
+        assert estadisticas['filas'] == len(lecturas)
+        assert estadisticas['lote_max'] > 1 and estadisticas['lotes'] < len(lecturas)
+
+        # Modo asíncrono: los trabajadores de la cola comparten los lotes
+        Realtime.configurar_micro_lotes(0.05, 64)
+        cola_anterior = Flask_Server._cola_ingesta
+        Flask_Server.app.config["INGESTA_ASINCRONA"] = True
+        Flask_Server.app.config["COLA_TRABAJADORES"] = 8
+        Flask_Server._cola_ingesta = None
+        try:
+            cliente = Flask_Server.app.test_client()
+            assert all(cliente.post("/ingest", json=lectura).status_code == 202 for lectura in lecturas)
+            cola = Flask_Server.obtener_cola_ingesta()
+            cola.esperar()
+            cola.detener()
+        finally:
+            Flask_Server.app.config["INGESTA_ASINCRONA"] = False
+            Flask_Server.app.config["COLA_TRABAJADORES"] = Flask_Server.N_TRABAJADORES
+            Flask_Server._cola_ingesta = cola_anterior
+        estadisticas = predictor.planificador.estadisticas()
+        assert estadisticas['filas'] == len(lecturas) and estadisticas['lote_max'] > 1
+    finally:
+        Realtime.configurar_micro_lotes(None)
+
+
+if __name__ == "__main__":
+    test_lotes_concurrentes()
+    test_error_en_lote()
+    test_riesgo_zona_con_micro_lotes()
+    test_ingest_concurrente_en_micro_lotes()
+    print("✅ Planificador de micro-lotes correcto")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test del entrenamiento incremental de Modelo.py: detecta las filas nuevas o
+cambiadas, reemplaza solo algunos árboles y reporta la diferencia contra
+reentrenar completo.
+cmd:
+python tests/test_modelo_incremental.py
+"""
+
+import sys
+import os
+import contextlib
+import io
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+import numpy as np
+import pandas as pd
+from joblib import load
+
+import Modelo
+from bosque_compilado import cargar_artefacto, hash_arreglos
+from raster_riesgo import RasterRiesgo
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+
+def silencioso(funcion, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return funcion(*args, **kwargs)
+
+
+def test_arboles_a_reemplazar():
+    assert Modelo.arboles_a_reemplazar(0, 300) == 0
+    assert Modelo.arboles_a_reemplazar(1, 300) == Modelo.MIN_ARBOLES_INCREMENTAL
+    assert Modelo.arboles_a_reemplazar(60, 300) == 20
+    assert Modelo.arboles_a_reemplazar(600, 300) == 100
+
+
+def test_refresco_incremental():
+    df = pd.read_csv(SRC_DIR / "dataset_procesado.csv")
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta_modelo = Path(directorio) / "modelo.pkl"
+        modelo, _ = silencioso(Modelo.entrenar_completo, df, grafica=None)
+        silencioso(Modelo.guardar_modelo, modelo, df, ruta_modelo, SRC_DIR / "dataset_procesado.csv")
+        assert Modelo.ruta_filas_entrenadas(ruta_modelo).exists()
+        assert ruta_modelo.with_suffix(".bin").exists()
+        # Raster (grueso) del modelo anterior junto al modelo: se reconstruye al guardar
+        RasterRiesgo.construir(lambda lat, lon: np.full(len(lat), 50.0), 19.35, 19.65, -99.35, -98.95, 0.01,
+                               modelo="anterior").guardar(Modelo.ruta_raster(ruta_modelo))
+
+        # Levantamiento: 10 scores corregidos y 3 ubicaciones nuevas
+        nuevo = df.copy()
+        nuevo.loc[:9, 'riesgo_zona_score'] += 20
+        extra = nuevo.iloc[:3].copy()
+        extra['latitud'] += 0.001
+        nuevo = pd.concat([nuevo, extra], ignore_index=True)
+
+        resultado = silencioso(Modelo.refrescar, nuevo, ruta_modelo)
+        assert resultado['nuevas'] == 13 and resultado['eliminadas'] == 0
+        assert resultado['arboles_reemplazados'] == Modelo.arboles_a_reemplazar(13, len(nuevo))
+        assert resultado['refrescos'] == 1
+        assert len(resultado['modelo'].estimators_) == Modelo.N_ARBOLES
+        assert resultado['modelo'].estimators_[0] is not modelo.estimators_[0]
+        # Los árboles más antiguos se descartan y el resto se conserva tal cual
+        n = resultado['arboles_reemplazados']
+        viejos = load(ruta_modelo).estimators_
+        assert all(np.array_equal(a.tree_.threshold, b.tree_.threshold)
+                   for a, b in zip(resultado['modelo'].estimators_[:-n], viejos[n:]))
+        for nombre in ('prueba', 'nuevas'):
+            assert resultado['metricas'][nombre]['rmse'] >= 0
+            assert nombre in resultado['metricas_completo']
+        assert resultado['segundos'] < resultado['segundos_completo']
+
+        # Después de guardar, el mismo dataset ya no tiene cambios
+        silencioso(Modelo.guardar_modelo, resultado['modelo'], nuevo, ruta_modelo,
+                   SRC_DIR / "dataset_procesado.csv", resultado['refrescos'], resultado['vistas'])
+        raster = RasterRiesgo.cargar(Modelo.ruta_raster(ruta_modelo))
+        assert raster.modelo == hash_arreglos(cargar_artefacto(ruta_modelo.with_suffix(".bin")))
+        assert raster.valores.shape == (31, 41)
+        assert raster.consultar(19.5, -99.1) == np.float32(resultado['modelo'].predict(
+            pd.DataFrame({'latitud': [19.5], 'longitud': [-99.1]}))[0])
+
+        resultado = silencioso(Modelo.refrescar, nuevo, ruta_modelo)
+        assert resultado['arboles_reemplazados'] == 0
+        assert resultado['refrescos'] == 1
+
+        # Si cambia más de la mitad del dataset se pide un entrenamiento completo
+        nuevo['riesgo_zona_score'] += 1
+        assert silencioso(Modelo.refrescar, nuevo, ruta_modelo) is None
+
+
+if __name__ == "__main__":
+    test_arboles_a_reemplazar()
+    test_refresco_incremental()
+    print("✅ Entrenamiento incremental correcto")
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Test del despachador de notificaciones (notificaciones.py) contra receptores
+HTTP locales (http.server): normal, con fallas temporales y bloqueado.
+cmd:
+python tests/test_notificaciones.py
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from notificaciones import CanalWebhook, DespachadorNotificaciones, LimitadorTasa, UltimasAlertas
+
+
+class Receptor:
+    """Servidor HTTP local que guarda los eventos recibidos"""
+
+    def __init__(self, fallas=0, demora_s=0.0):
+        self.eventos = []
+        self.intentos = 0
+        self.fallas = fallas
+        self.demora_s = demora_s
+        self.liberar = threading.Event()
+        receptor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def do_POST(self):
+                cuerpo = self.rfile.read(int(self.headers['Content-Length']))
+                receptor.intentos += 1
+                if receptor.demora_s:
+                    receptor.liberar.wait(receptor.demora_s)
+                if receptor.intentos <= receptor.fallas:
+                    self.send_response(500)
+                else:
+                    receptor.eventos.append(json.loads(cuerpo))
+                    self.send_response(200)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.servidor = ThreadingHTTPServer(('127.0.0.1', 0), Manejador)
+        self.url = f"http://127.0.0.1:{self.servidor.server_address[1]}/alerta"
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+
+    def cerrar(self):
+        self.liberar.set()
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+
+def esperar(condicion, timeout=10):
+    limite = time.monotonic() + timeout
+    while not condicion():
+        if time.monotonic() > limite:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_transiciones_y_reintentos():
+    """Solo se envían cambios de alerta; los errores HTTP se reintentan"""
+    normal, inestable = Receptor(), Receptor(fallas=2)
+    despachador = DespachadorNotificaciones(
+        [CanalWebhook(normal.url, timeout_s=2), CanalWebhook(inestable.url, timeout_s=2)],
+        reaviso_s=0, espera_reintento_s=0.01)
+    try:
+        secuencia = ['VERDE', 'VERDE', 'AMARILLO', 'AMARILLO', 'ROJO', 'ROJO', 'AMARILLO']
+        enviados = [despachador.notificar('s1', alerta, riesgo_score=58.6) for alerta in secuencia]
+        assert enviados == [False, False, True, False, True, False, True]
+
+        assert esperar(lambda: len(normal.eventos) == 3 and len(inestable.eventos) == 3)
+        assert [(e['anterior'], e['alerta']) for e in normal.eventos] == \
+            [('VERDE', 'AMARILLO'), ('AMARILLO', 'ROJO'), ('ROJO', 'AMARILLO')]
+        assert normal.eventos[0]['sensor_id'] == 's1' and normal.eventos[0]['riesgo_score'] == 58.6
+        estadisticas = despachador.estadisticas()
+        assert estadisticas['enviados'] == 6 and estadisticas['reintentos'] == 2
+        assert estadisticas['fallidos'] == 0
+    finally:
+        despachador.cerrar()
+        normal.cerrar()
+        inestable.cerrar()
+
+
+def test_oscilacion_deduplicada():
+    despachador = DespachadorNotificaciones([], reaviso_s=60)
+    alertas = ['ROJO', 'AMARILLO'] * 10
+    assert sum(despachador.notificar('s1', a) for a in alertas) == 2
+    assert despachador.estadisticas()['repetidos'] == 18
+    # Otro sensor tiene su propio estado
+    assert despachador.notificar('s2', 'ROJO')
+    despachador.cerrar()
+
+
+def test_receptor_bloqueado_no_frena():
+    """Un receptor que no responde no bloquea notificar ni a los demás canales"""
+    bloqueado, normal = Receptor(demora_s=30), Receptor()
+    despachador = DespachadorNotificaciones(
+        [CanalWebhook(bloqueado.url, timeout_s=0.5, nombre='bloqueado'), CanalWebhook(normal.url, nombre='normal')],
+        reaviso_s=0, reintentos=0, max_pendientes=3)
+    try:
+        duraciones = []
+        for i in range(10):
+            inicio = time.perf_counter()
+            despachador.notificar(f"s{i}", 'ROJO')
+            duraciones.append(time.perf_counter() - inicio)
+            time.sleep(0.02)
+        assert max(duraciones) < 0.05
+
+        assert esperar(lambda: len(normal.eventos) == 10)
+        assert [e['sensor_id'] for e in normal.eventos] == [f"s{i}" for i in range(10)]
+        # El canal bloqueado acepta a lo más 3 envíos pendientes; el resto se descarta
+        assert despachador.estadisticas()['descartados'] == 7
+        assert esperar(lambda: despachador.estadisticas()['fallidos'] == 3)
+    finally:
+        despachador.cerrar(esperar=False)
+        bloqueado.cerrar()
+        normal.cerrar()
+
+
+def test_limitador_tasa():
+    limitador = LimitadorTasa(tasa_por_s=0.001, rafaga=5)
+    assert [limitador.permitir() for _ in range(7)] == [True] * 5 + [False] * 2
+
+
+def test_ultimas_alertas_compartidas():
+    """El despachador usa el mismo registro de última alerta que quien se lo pasa"""
+    ultimas = UltimasAlertas()
+    despachador = DespachadorNotificaciones([], ultimas_alertas=ultimas)
+    assert ultimas.cambiar('s1', 'ROJO') == 'VERDE'
+    assert ultimas.cambiar('s1', 'ROJO') is None
+    assert despachador.notificar_cambio('s1', 'ROJO', 'VERDE')
+    assert not despachador.notificar_cambio('s1', 'ROJO', None)
+    # El cambio ya quedó registrado: notificar la misma alerta no es un cambio
+    assert not despachador.notificar('s1', 'ROJO')
+    despachador.olvidar('s1')
+    assert ultimas.cambiar('s1', 'VERDE') is None
+
+
+def test_ingest_notifica_cambios():
+    import Flask_Server
+
+    receptor = Receptor()
+    cliente = Flask_Server.app.test_client()
+    Flask_Server.app.config["WEBHOOKS"] = [receptor.url]
+    Flask_Server._notificador = None
+    directorio = tempfile.TemporaryDirectory()
+    Flask_Server.app.config["LOG_JSON"] = Path(directorio.name) / "tt2.jsonl"
+    try:
+        # Con bitácora JSON y webhooks a la vez: ambos ven los mismos cambios
+        Flask_Server.iniciar_bitacora()
+        assert Flask_Server.obtener_notificador().ultimas_alertas is Flask_Server.ultimas_alertas
+        # Coordenadas fijas (zona MEDIO): nivel 3 → ROJO, nivel 0 → VERDE
+        for v in (0.5, 0.9, 0.9, 0.5):
+            cliente.post("/ingest", json={"sensor_id": "notif-1", "v": v, "pct": 50.0})
+        cliente.post("/ingest/batch", json=[{"sensor_id": "notif-2", "v": 0.9, "pct": 80.0}])
+        assert esperar(lambda: len(receptor.eventos) == 3)
+        eventos = sorted((e['sensor_id'], e['anterior'], e['alerta']) for e in receptor.eventos)
+        assert eventos == [('notif-1', 'ROJO', 'VERDE'), ('notif-1', 'VERDE', 'ROJO'), ('notif-2', 'VERDE', 'ROJO')]
+        Flask_Server.detener_bitacora()
+        registros = [json.loads(linea) for linea in Flask_Server.app.config["LOG_JSON"].read_text(encoding="utf-8").splitlines()]
+        cambios = sorted((r['sensor_id'], r['anterior'], r['alerta']) for r in registros if r.get('cambio'))
+        assert cambios == eventos
+    finally:
+        Flask_Server.detener_bitacora()
+        Flask_Server.app.config["LOG_JSON"] = None
+        directorio.cleanup()
+        Flask_Server.obtener_notificador().cerrar()
+        Flask_Server.app.config["WEBHOOKS"] = []
+        Flask_Server._notificador = None
+        receptor.cerrar()
+
+
+if __name__ == "__main__":
+    test_transiciones_y_reintentos()
+    test_oscilacion_deduplicada()
+    test_receptor_bloqueado_no_frena()
+    test_limitador_tasa()
+    test_ultimas_alertas_compartidas()
+    test_ingest_notifica_cambios()
+    print("✅ Notificaciones correctas")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test de la predicción por lotes (predecir_alertas_lote) contra el ciclo
+equivalente de predecir_alerta_con_coordenadas.
+cmd:
+python tests/test_prediccion_lote.py
+"""
+
+import sys
+import os
+import time
+import contextlib
+import io
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+import numpy as np
+import pandas as pd
+
+from Realtime import (predecir_alerta_con_coordenadas, predecir_alertas_lote,
+                      determinar_alerta, determinar_alerta_lote, NIVELES_RIESGO)
+
+DATASET_PATH = os.path.join(os.path.dirname(__file__), '../src/dataset_procesado.csv')
+
+
+def generar_puntos(n, semilla=0):
+    """Mezcla de puntos del dataset, puntos aleatorios en CDMX y fuera de CDMX"""
+    rng = np.random.default_rng(semilla)
+    dataset = pd.read_csv(DATASET_PATH)
+    k = n // 3
+    filas = rng.integers(0, len(dataset), k)
+    lats = np.concatenate([dataset['latitud'].to_numpy()[filas],
+                           rng.uniform(19.35, 19.65, k),
+                           rng.uniform(25.0, 26.0, n - 2 * k)])
+    lons = np.concatenate([dataset['longitud'].to_numpy()[filas],
+                           rng.uniform(-99.35, -98.95, k),
+                           rng.uniform(-100.5, -100.0, n - 2 * k)])
+    niveles = rng.integers(0, 4, n)
+    return lats, lons, niveles
+
+
+def test_lote_igual_a_ciclo():
+    """Cada fila del lote coincide con la predicción individual"""
+    lats, lons, niveles = generar_puntos(150)
+    resultado = predecir_alertas_lote(lats, lons, niveles)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        individuales = [predecir_alerta_con_coordenadas(lat, lon, int(n))
+                        for lat, lon, n in zip(lats, lons, niveles)]
+
+    for i, esperado in enumerate(individuales):
+        assert resultado['alerta'][i] == esperado['alerta']
+        assert resultado['riesgo_zona'][i] == esperado['riesgo_zona']
+        assert round(float(resultado['riesgo_score'][i]), 1) == esperado['riesgo_score']
+
+
+def test_reglas_vectorizadas():
+    """Las reglas vectorizadas reproducen las reglas escalares, incluso fuera de 0-3"""
+    for indice, nivel_riesgo in enumerate(NIVELES_RIESGO):
+        for nivel_sensor in range(-1, 5):
+            alerta = determinar_alerta_lote(np.array([indice]), np.array([nivel_sensor]))[0]
+            assert ['VERDE', 'AMARILLO', 'ROJO'][alerta] == determinar_alerta(nivel_riesgo, nivel_sensor)
+
+
+if __name__ == "__main__":
+    test_lote_igual_a_ciclo()
+    test_reglas_vectorizadas()
+    print("✅ Predicción por lotes equivalente a la individual")
+
+    lats, lons, niveles = generar_puntos(100000)
+    t0 = time.perf_counter()
+    predecir_alertas_lote(lats, lons, niveles)
+    print(f"⏱️ 100k puntos por lotes: {time.perf_counter() - t0:.2f} s")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test de procesar_dataset: la versión vectorizada y la versión por bloques
+(con uno o varios procesos) generan exactamente dataset_procesado.csv.
+cmd:
+python tests/test_procesar_dataset.py
+"""
+
+import sys
+import os
+import contextlib
+import io
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+import numpy as np
+import pandas as pd
+
+import procesar_dataset
+from procesar_dataset import clasificar_zonas, procesar_dataset_por_bloques, separar_coordenadas
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+ORIGINAL = SRC_DIR / "Dataset - Full(Dataset).csv"
+PROCESADO = SRC_DIR / "dataset_procesado.csv"
+
+
+def silencioso(funcion, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return funcion(*args, **kwargs)
+
+
+def test_salida_identica():
+    esperado = PROCESADO.read_bytes()
+    with tempfile.TemporaryDirectory() as directorio:
+        salida = Path(directorio) / "procesado.csv"
+        silencioso(procesar_dataset.procesar_dataset, ORIGINAL, salida)
+        assert salida.read_bytes() == esperado
+        for tam_bloque, procesos in ((1, 1), (37, 1), (10000, 1), (50, 2)):
+            resumen = silencioso(procesar_dataset_por_bloques, ORIGINAL, salida, tam_bloque, procesos)
+            assert salida.read_bytes() == esperado, (tam_bloque, procesos)
+        assert resumen['filas_leidas'] == 612 and resumen['filas_escritas'] == 306
+        assert resumen['niveles'] == {'ALTO': 228, 'MEDIO': 58, 'BAJO': 20}
+
+
+def test_clasificacion_y_coordenadas():
+    scores = np.array([39.2, 45.0, 45.01, 65.0, 65.1, np.nan])
+    referencia = ['BAJO' if s <= 45 else 'MEDIO' if s <= 65 else 'ALTO' for s in scores]
+    assert list(clasificar_zonas(scores)) == referencia
+
+    # Ruta rápida (np.fromstring) y respaldo fila por fila dan lo mismo que str.split
+    for textos in (["19.5061618036,-99.1047492201", " 19.1 , -99.2"],
+                   ['"19.5,-99.1"', "19.6,-99.2"],
+                   ["19.5", "19.6,-99.2,7"]):
+        coordenadas = pd.Series(textos)
+        latitud, longitud = separar_coordenadas(coordenadas)
+        partes = coordenadas.str.strip('"').str.split(',', expand=True)
+        assert np.array_equal(latitud, partes[0].astype(float).to_numpy(), equal_nan=True)
+        assert np.array_equal(longitud, partes[1].astype(float).to_numpy(), equal_nan=True)
+
+
+if __name__ == "__main__":
+    test_salida_identica()
+    test_clasificacion_y_coordenadas()
+    print("✅ procesar_dataset genera la misma salida")
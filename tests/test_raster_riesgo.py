@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test del raster precalculado de riesgo de zona (raster_riesgo.py).
+cmd:
+python tests/test_raster_riesgo.py
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+import numpy as np
+
+from bosque_compilado import cargar_artefacto, hash_arreglos
+from raster_riesgo import RasterRiesgo
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+
+def funcion_lineal(latitudes, longitudes):
+    """Función plana: la interpolación bilineal debe reproducirla exacta"""
+    return 40.0 + 100.0 * (np.asarray(latitudes) - 19.35) + 50.0 * (np.asarray(longitudes) + 99.35)
+
+
+def construir(modelo=None):
+    return RasterRiesgo.construir(funcion_lineal, 19.35, 19.65, -99.35, -98.95, 0.01, modelo=modelo)
+
+
+def test_nodos_exactos():
+    """En los nodos de la rejilla el raster devuelve el valor del modelo"""
+    raster = construir()
+    assert raster.valores.shape == (31, 41)
+    assert raster.valores.dtype == np.float32
+    assert abs(raster.consultar(19.35, -99.35) - 40.0) < 1e-4
+    assert abs(raster.consultar(19.65, -98.95) - funcion_lineal(19.65, -98.95)) < 1e-3
+
+
+def test_interpolacion_bilineal():
+    """La bilineal sobre una función plana tiene error ~0; el vecino no"""
+    raster = construir()
+    rng = np.random.default_rng(1)
+    lats = rng.uniform(19.35, 19.65, 1000)
+    lons = rng.uniform(-99.35, -98.95, 1000)
+    esperado = funcion_lineal(lats, lons)
+    assert np.abs(raster.consultar_lote(lats, lons, interpolar=True) - esperado).max() < 1e-3
+    assert np.abs(raster.consultar_lote(lats, lons, interpolar=False) - esperado).max() <= 0.75 + 1e-3
+    assert raster.error_maximo(funcion_lineal, interpolar=True)['max'] < 1e-3
+
+
+def test_fuera_de_la_caja():
+    """Fuera de CDMX el raster no responde para que se use el modelo"""
+    raster = construir()
+    assert raster.consultar(40.7128, -74.0060) is None
+    assert np.isnan(raster.consultar_lote(np.array([40.7128, 19.5]), np.array([-74.0060, -99.1]))[0])
+
+
+def test_guardar_y_cargar():
+    raster = construir(modelo="abc123")
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, 'raster.npz')
+        raster.guardar(ruta)
+        cargado = RasterRiesgo.cargar(ruta)
+        construir().guardar(ruta)
+        assert RasterRiesgo.cargar(ruta).modelo is None
+    assert np.array_equal(cargado.valores, raster.valores)
+    assert cargado.modelo == "abc123"
+    assert cargado.consultar(19.5, -99.1, interpolar=True) == raster.consultar(19.5, -99.1, interpolar=True)
+
+
+def test_realtime_ignora_raster_de_otro_modelo():
+    """Realtime.py solo usa el raster construido con el modelo que cargó"""
+    import Realtime
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        rutas = {
+            'artefacto': Path(carpeta) / "modelo_predictivo.bin",
+            'modelo': Path(carpeta) / "modelo_predictivo.pkl",
+            'dataset': Path(carpeta) / "dataset_procesado.csv",
+            'raster': Path(carpeta) / "raster_riesgo.npz",
+        }
+        for nombre in ('artefacto', 'modelo', 'dataset'):
+            shutil.copy(SRC_DIR / rutas[nombre].name, rutas[nombre])
+        huella = hash_arreglos(cargar_artefacto(rutas['artefacto']))
+
+        for modelo, usado in ((None, False), ("otro", False), (huella, True)):
+            construir(modelo).guardar(rutas['raster'])
+            predictor = Realtime.PredictorRiesgo.cargar(**rutas)
+            assert (predictor.raster is not None) == usado, modelo
+
+
+if __name__ == "__main__":
+    test_nodos_exactos()
+    test_interpolacion_bilineal()
+    test_fuera_de_la_caja()
+    test_guardar_y_cargar()
+    test_realtime_ignora_raster_de_otro_modelo()
+    print("✅ Raster de riesgo correcto")
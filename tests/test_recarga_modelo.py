@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Test de la recarga en caliente del modelo y los datos (Realtime.recargar y
+VigilanteModelo): revisión con casos dorados, cambio atómico del predictor,
+registro de sensores recalculado y endpoint POST /modelo/recargar.
+cmd:
+python tests/test_recarga_modelo.py
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+import numpy as np
+import pandas as pd
+from joblib import dump
+from sklearn.ensemble import RandomForestRegressor
+
+import metricas
+import Realtime
+from Flask_Server import app
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+
+def copiar_archivos(directorio):
+    """Copia del modelo y el dataset (sin .npz ni raster) en `directorio`"""
+    rutas = {
+        'artefacto': Path(directorio) / "modelo_predictivo.bin",
+        'modelo': Path(directorio) / "modelo_predictivo.pkl",
+        'dataset': Path(directorio) / "dataset_procesado.csv",
+        'raster': Path(directorio) / "raster_riesgo.npz",
+    }
+    for nombre in ('artefacto', 'modelo', 'dataset'):
+        shutil.copy(SRC_DIR / rutas[nombre].name, rutas[nombre])
+    return rutas
+
+
+def cambiar_score(ruta_csv, fila, score):
+    df = pd.read_csv(ruta_csv)
+    df.loc[fila, 'riesgo_zona_score'] = score
+    df.to_csv(ruta_csv, index=False)
+    return df.loc[fila, 'latitud'], df.loc[fila, 'longitud']
+
+
+def test_recarga_y_rechazo():
+    Realtime.calentar()
+    activo = Realtime.obtener_predictor()
+    rechazadas = metricas.RECARGAS.valor(resultado="rechazada")
+
+    # Casos dorados que no se cumplen: sigue el mismo predictor
+    resultado = Realtime.recargar(casos={(19.5061618036, -99.1047492201): (40.0, 'BAJO')})
+    assert not resultado['ok'] and resultado['errores']
+    assert Realtime.obtener_predictor() is activo
+    assert metricas.RECARGAS.valor(resultado="rechazada") == rechazadas + 1
+
+    # Misma versión en disco: se recarga y da los mismos resultados
+    resultado = Realtime.recargar()
+    assert resultado['ok'] and resultado['version'] == activo.version == resultado['anterior']
+    assert Realtime.obtener_predictor() is not activo
+    assert Realtime.obtener_riesgo_zona(19.5061618036, -99.1047492201) == 39.2
+    assert Realtime.ultima_recarga()['version'] == activo.version
+    assert metricas.MODELO_INFO.valor(version=activo.version) == 1
+
+
+class ModeloConstante:
+    """Modelo que da el mismo score en todas partes (válido en rango, pero equivocado)"""
+
+    def predecir_punto(self, latitud, longitud):
+        return 50.0
+
+    def predecir(self, X):
+        return np.full(len(X), 50.0)
+
+
+def test_casos_del_modelo():
+    Realtime.calentar()
+    activo = Realtime.obtener_predictor()
+    assert Realtime.validar_predictor(activo) == []
+    # Los casos dorados del dataset no llegan al modelo; los del modelo sí
+    for latitud, longitud in Realtime.CASOS_DORADOS_MODELO:
+        assert activo.indice_dataset.buscar(latitud, longitud) is None
+    # Versión sin .pkl cuyo modelo da 50 en todas partes: BAJO y ALTO no tienen su clase
+    candidato = Realtime.PredictorRiesgo(ModeloConstante(), activo.indice_dataset)
+    errores = Realtime.validar_predictor(candidato)
+    assert len(errores) == 2 and all(e.startswith("Modelo en") for e in errores)
+    assert "se esperaba BAJO" in errores[0] and "se esperaba ALTO" in errores[1]
+    assert Realtime.validar_predictor(candidato, casos_modelo={}) == []
+    # El .pkl está bien pero un punto se sirve con otro modelo (p. ej. un .bin viejo):
+    # riesgo_zona no coincide con el .pkl; el lote grande sí (lo calcula el .pkl)
+    candidato = Realtime.PredictorRiesgo(ModeloConstante(), activo.indice_dataset,
+                                         ruta_modelo_sklearn=Realtime.model_path)
+    errores = Realtime.validar_predictor(candidato)
+    assert len(errores) == 3 and all("con riesgo_zona:" in e for e in errores)
+
+
+def test_artefacto_de_otro_pkl():
+    """Un .pkl reentrenado junto al .bin anterior: se usa el .pkl en un punto y en lotes"""
+    with tempfile.TemporaryDirectory() as directorio:
+        rutas = copiar_archivos(directorio)
+        original = Realtime.PredictorRiesgo.cargar(**rutas)
+        df = pd.read_csv(rutas['dataset'])
+        modelo = RandomForestRegressor(n_estimators=5, random_state=1)
+        modelo.fit(df[['latitud', 'longitud']], df['riesgo_zona_score'])
+        dump(modelo, rutas['modelo'])
+
+        predictor = Realtime.PredictorRiesgo.cargar(**rutas)
+        assert predictor.bosque.n_arboles == 5 and predictor.version != original.version
+        latitud, longitud = next(iter(Realtime.CASOS_DORADOS_MODELO))
+        esperado = modelo.predict(pd.DataFrame([[latitud, longitud]], columns=['latitud', 'longitud']))[0]
+        assert predictor.riesgo_zona(latitud, longitud) == esperado
+        lote = predictor.riesgo_zona_lote(np.full(Realtime.LOTE_MINIMO_SKLEARN, latitud),
+                                          np.full(Realtime.LOTE_MINIMO_SKLEARN, longitud))
+        assert np.all(lote == esperado)
+
+
+def test_version_nueva_y_registro():
+    Realtime.calentar()
+    with tempfile.TemporaryDirectory() as directorio:
+        rutas = copiar_archivos(directorio)
+        latitud, longitud = cambiar_score(rutas['dataset'], 0, 90.0)
+        registro = Realtime.obtener_registro_sensores()
+        registro.registrar("recarga", latitud, longitud, persistir=False)
+        anterior = Realtime.obtener_predictor()
+        score_anterior = anterior.riesgo_zona(latitud, longitud)
+        try:
+            resultado = Realtime.recargar(**rutas)
+            assert resultado['ok'] and resultado['version'] != anterior.version
+            assert Realtime.version_activa() == resultado['version']
+            assert Realtime.obtener_riesgo_zona(latitud, longitud) == 90.0
+            # Las peticiones que ya tenían el predictor anterior terminan con él
+            assert anterior.riesgo_zona(latitud, longitud) == score_anterior
+            # El registro se recalculó con la versión nueva
+            fila = Realtime.predecir_alerta(2, sensor_id="recarga")
+            assert fila['riesgo_score'] == 90.0 and fila['riesgo_zona'] == 'ALTO'
+        finally:
+            registro.eliminar("recarga")
+            assert Realtime.recargar()['ok']
+
+
+def test_vigilante():
+    Realtime.calentar()
+    with tempfile.TemporaryDirectory() as directorio:
+        rutas = copiar_archivos(directorio)
+        try:
+            assert Realtime.recargar(**rutas)['ok']
+            vigilante = Realtime.VigilanteModelo(60, **rutas)
+            assert vigilante.revisar() is None and vigilante.revisar() is None
+
+            latitud, longitud = cambiar_score(rutas['dataset'], 0, 90.0)
+            # Primero espera a que la huella se estabilice, luego recarga una sola vez
+            assert vigilante.revisar() is None
+            assert vigilante.revisar()['ok']
+            assert vigilante.revisar() is None
+            assert Realtime.obtener_riesgo_zona(latitud, longitud) == 90.0
+
+            # Una versión que no pasa los casos dorados no se activa ni se reintenta
+            version = Realtime.version_activa()
+            cambiar_score(rutas['dataset'], 0, 80.0)
+            df = pd.read_csv(rutas['dataset'])
+            dorada = (df['latitud'] - 19.5061618036).abs().idxmin()
+            cambiar_score(rutas['dataset'], dorada, 70.0)
+            assert vigilante.revisar() is None
+            assert not vigilante.revisar()['ok']
+            assert vigilante.revisar() is None
+            assert Realtime.version_activa() == version
+        finally:
+            assert Realtime.recargar()['ok']
+
+
+def test_endpoint_recargar():
+    cliente = app.test_client()
+    respuesta = cliente.post("/modelo/recargar")
+    assert respuesta.status_code == 200
+    version = respuesta.get_json()["version"]
+    salud = cliente.get("/").get_json()
+    assert salud["version"] == version
+    assert salud["ultima_recarga"]["ok"] is True
+
+
+if __name__ == "__main__":
+    test_recarga_y_rechazo()
+    test_casos_del_modelo()
+    test_artefacto_de_otro_pkl()
+    test_version_nueva_y_registro()
+    test_vigilante()
+    test_endpoint_recargar()
+    print("✅ Recarga en caliente correcta")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test del registro de sensores con alertas precalculadas (registro_sensores.py).
+cmd:
+python tests/test_registro_sensores.py
+"""
+
+import sys
+import os
+import json
+import tempfile
+import contextlib
+import io
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from registro_sensores import RegistroSensores
+from Realtime import predecir_alerta_con_coordenadas
+
+
+def predecir_silencioso(lat, lon, nivel):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return predecir_alerta_con_coordenadas(lat, lon, nivel)
+
+
+def test_alertas_precalculadas():
+    """Cada nivel resuelve la misma fila que la predicción directa"""
+    llamadas = []
+
+    def predecir(lat, lon, nivel):
+        llamadas.append(nivel)
+        return predecir_silencioso(lat, lon, nivel)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        registro = RegistroSensores(os.path.join(carpeta, 'sensores.json'), predecir)
+        fila = registro.registrar('s-baja', 19.5061618036, -99.1047492201)
+        assert fila['riesgo_score'] == 39.2 and fila['riesgo_zona'] == 'BAJO'
+        assert len(llamadas) == 4
+
+        for nivel in range(4):
+            assert registro.alerta('s-baja', nivel) == predecir_silencioso(19.5061618036, -99.1047492201, nivel)
+        # Las lecturas no vuelven a llamar al modelo
+        assert len(llamadas) == 4
+        assert registro.alerta('desconocido', 2) is None
+
+
+def test_persistencia():
+    """Los sensores se guardan en JSON y se recalculan al cargar"""
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, 'sensores.json')
+        registro = RegistroSensores(ruta, predecir_silencioso)
+        registro.registrar('s1', 19.5041017692, -99.0986932319)
+        registro.registrar('temporal', 19.5, -99.1, persistir=False)
+
+        with open(ruta, encoding='utf-8') as f:
+            assert set(json.load(f)) == {'s1'}
+
+        recargado = RegistroSensores(ruta, predecir_silencioso)
+        assert 's1' in recargado and 'temporal' not in recargado
+        assert recargado.alerta('s1', 3) == registro.alerta('s1', 3)
+
+        assert recargado.eliminar('s1') and not recargado.eliminar('s1')
+        assert len(RegistroSensores(ruta, predecir_silencioso)) == 0
+
+
+def test_endpoints_sensores():
+    import Flask_Server
+
+    cliente = Flask_Server.app.test_client()
+    registro = Flask_Server.obtener_registro_sensores()
+    ruta_original = registro.ruta
+    with tempfile.TemporaryDirectory() as carpeta:
+        registro.ruta = type(ruta_original)(os.path.join(carpeta, 'sensores.json'))
+        try:
+            respuesta = cliente.post("/sensores", json={"sensor_id": "rio-1", "lat": 19.5061618036,
+                                                         "lon": -99.1047492201})
+            assert respuesta.get_json()["riesgo_zona"] == "BAJO"
+            assert "rio-1" in cliente.get("/sensores").get_json()["sensores"]
+            assert cliente.post("/sensores", json={"sensor_id": Flask_Server.SENSOR_FIJO,
+                                                   "lat": 19.5, "lon": -99.1}).status_code == 400
+
+            lecturas = [{"sensor_id": "rio-1", "v": 0.9, "pct": 90.0},
+                        {"sensor_id": "otro", "v": 0.9, "pct": 90.0}]
+            resultados = cliente.post("/ingest/batch", json=lecturas).get_json()["resultados"]
+            assert resultados[0]["riesgo_zona"] == "BAJO" and resultados[0]["alerta"] == "AMARILLO"
+            # Sensor no registrado → coordenadas fijas (zona MEDIO)
+            assert resultados[1]["riesgo_zona"] == "MEDIO" and resultados[1]["alerta"] == "ROJO"
+
+            assert cliente.post("/ingest", json={"sensor_id": "rio-1", "v": 0.9, "pct": 90.0}).status_code == 200
+            assert cliente.delete("/sensores/rio-1").status_code == 200
+            assert cliente.delete("/sensores/rio-1").status_code == 404
+        finally:
+            registro.ruta = ruta_original
+
+
+def test_ingest_sensor_id_invalido():
+    """Un sensor_id que no es texto es 400 (antes era TypeError → 500), en ambos modos"""
+    import Flask_Server
+
+    cliente = Flask_Server.app.test_client()
+    for asincrona in (False, True):
+        Flask_Server.app.config["INGESTA_ASINCRONA"] = asincrona
+        try:
+            for sensor_id in (["a"], {}, 3):
+                respuesta = cliente.post("/ingest", json={"sensor_id": sensor_id, "v": 0.9, "pct": 90.0})
+                assert respuesta.status_code == 400
+                assert respuesta.get_json() == {"ok": False, "error": "sensor_id debe ser texto"}
+        finally:
+            Flask_Server.app.config["INGESTA_ASINCRONA"] = False
+    # Sin {v, pct} el modo síncrono sigue contestando 200
+    assert cliente.post("/ingest", json={"sensor_id": "rio-1"}).get_json() == {"ok": True}
+
+
+if __name__ == "__main__":
+    test_alertas_precalculadas()
+    test_persistencia()
+    test_endpoints_sensores()
+    test_ingest_sensor_id_invalido()
+    print("✅ Registro de sensores correcto")
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Test del benchmark de la ruta crítica (benchmarks/ruta_critica.py): medición y
+detección de regresiones contra la línea base.
+cmd:
+python tests/test_ruta_critica.py
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../benchmarks'))
+
+from ruta_critica import comparar, medir
+
+
+def test_medir():
+    resultado = medir(lambda: sum(range(10)), rondas=3, duracion_ronda_s=0.01)
+    assert resultado["iteraciones"] > 1
+    assert 0 < resultado["ns_op_min"] <= resultado["ns_op"] <= resultado["ns_op_max"]
+
+
+def test_comparar_detecta_regresiones():
+    linea_base = {"a": {"ns_op": 100.0}, "b": {"ns_op": 100.0}, "solo_base": {"ns_op": 1.0}}
+    resultados = {"a": {"ns_op": 120.0}, "b": {"ns_op": 130.0}, "nuevo": {"ns_op": 5.0}}
+    comparacion = {c[0]: c for c in comparar(resultados, linea_base, umbral=0.25)}
+    # Solo se comparan los casos presentes en ambos
+    assert set(comparacion) == {"a", "b"}
+    assert not comparacion["a"][4]
+    assert comparacion["b"][4] and abs(comparacion["b"][3] - 0.30) < 1e-9
+
+
+if __name__ == "__main__":
+    test_medir()
+    test_comparar_detecta_regresiones()
+    print("✅ Benchmark de la ruta crítica correcto")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test del simulador de flota (benchmarks/simulador_flota.py): curvas de los
+sensores virtuales y una corrida corta contra Flask_Server en un hilo.
+cmd:
+python tests/test_simulador_flota.py
+"""
+
+import sys
+import os
+import random
+import tempfile
+import threading
+from pathlib import Path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '../benchmarks'))
+
+from simulador_flota import GeneradorCarga, SensorVirtual, crear_flota, percentil, voltaje_desde_pct
+
+
+def test_curvas():
+    rng = random.Random(1)
+    assert abs(voltaje_desde_pct(0) - 0.6) < 1e-9 and abs(voltaje_desde_pct(100) - 3.0) < 1e-9
+
+    crecida = SensorVirtual("c", "crecida", rng)
+    inicio, pico = crecida.inicio_s, crecida.inicio_s + crecida.subida_s
+    assert crecida.nivel(inicio - 1) == crecida.base
+    assert abs(crecida.nivel(pico) - crecida.pico) < 1e-9
+    assert crecida.nivel(pico + 3600) < crecida.nivel(pico + 60) < crecida.pico
+
+    subida = SensorVirtual("s", "subida", rng)
+    assert subida.nivel(0) < subida.nivel(600) <= subida.maximo
+
+    lectura = crecida.lectura(pico, 1700000000.0)
+    assert set(lectura) == {"sensor_id", "v", "pct", "ts"} and 0 <= lectura["pct"] <= 100
+
+    flota = crear_flota(200, {"seco": 1, "crecida": 1}, intervalo_s=10, jitter_s=1, semilla=3)
+    assert {s.perfil for s in flota} == {"seco", "crecida"}
+    assert all(0 <= s.envio(0) <= 11 for s in flota)
+    assert [s.base for s in flota] == [s.base for s in crear_flota(200, {"seco": 1, "crecida": 1}, semilla=3)]
+
+
+def test_percentil():
+    valores = list(range(1, 101))
+    assert percentil(valores, 50) == 50 and percentil(valores, 99) == 99 and percentil(valores, 100) == 100
+    assert percentil([], 50) is None
+
+
+def test_carga_contra_servidor():
+    from werkzeug.serving import make_server
+    import Flask_Server
+
+    with tempfile.TemporaryDirectory() as directorio:
+        anterior = Flask_Server.app.config["HISTORIAL_PATH"]
+        Flask_Server.app.config["HISTORIAL_PATH"] = Path(directorio) / "historial.db"
+        historial = Flask_Server._historial
+        Flask_Server._historial = None
+        servidor = make_server("127.0.0.1", 0, Flask_Server.app, threaded=True)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{servidor.server_port}/ingest"
+        try:
+            flota = crear_flota(50, intervalo_s=0.5, semilla=0)
+            abierto = GeneradorCarga(url, flota, duracion_s=1.0, modo='abierto', concurrencia=8).ejecutar()
+            cerrado = GeneradorCarga(url, flota, duracion_s=0.5, modo='cerrado', concurrencia=4).ejecutar()
+        finally:
+            servidor.shutdown()
+            if Flask_Server._historial is not None:
+                Flask_Server._historial.cerrar()
+            Flask_Server._historial = historial
+            Flask_Server.app.config["HISTORIAL_PATH"] = anterior
+
+    # 50 sensores cada 0.5 s durante 1 s: 2 lecturas por sensor
+    assert abierto["enviadas"] == 100 and abierto["tasa_objetivo_rps"] == 100.0
+    for reporte in (abierto, cerrado):
+        assert reporte["tasa_error"] == 0.0 and reporte["codigos"] == {"200": reporte["enviadas"]}
+        latencia = reporte["latencia_ms"]
+        assert 0 < latencia["p50"] <= latencia["p99"] <= latencia["max"]
+    assert cerrado["enviadas"] > 0 and cerrado["throughput_rps"] > 0
+
+
+if __name__ == "__main__":
+    test_curvas()
+    test_percentil()
+    test_carga_contra_servidor()
+    print("✅ Simulador de flota correcto")
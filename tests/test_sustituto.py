@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test del modelo sustituto (árbol destilado del bosque): concordancia de
+clases BAJO/MEDIO/ALTO, metadatos del artefacto y uso en Realtime.py solo
+si la concordancia alcanza el umbral configurado.
+cmd:
+python tests/test_sustituto.py
+"""
+
+import sys
+import os
+import contextlib
+import io
+import shutil
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+import numpy as np
+import pandas as pd
+from joblib import load
+
+import Modelo
+import Realtime
+from bosque_compilado import BosqueCompilado, cargar_artefacto, hash_arreglos, leer_encabezado
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+
+def test_concordancia_clases():
+    concordancia = Modelo.concordancia_clases(np.array([40.0, 44.0, 50.0, 70.0]), np.array([41.0, 46.0, 50.0, 70.0]))
+    assert concordancia['total'] == 0.75
+    assert concordancia['por_clase'] == {'BAJO': 0.5, 'MEDIO': 1.0, 'ALTO': 1.0}
+    assert concordancia['mae'] == 0.75 and concordancia['error_max'] == 2.0
+
+
+def test_destilar_y_guardar():
+    df = pd.read_csv(SRC_DIR / "dataset_procesado.csv")
+    modelo = load(SRC_DIR / "modelo_predictivo.pkl")
+    arbol, concordancia = Modelo.destilar(modelo, df, profundidad=10, muestras=5000, hojas=256)
+    assert arbol.get_depth() <= 10 and arbol.get_n_leaves() <= 256
+    assert concordancia['total'] > 0.95
+    assert set(concordancia['por_clase']) == {'BAJO', 'MEDIO', 'ALTO'}
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta_modelo = Path(directorio) / "modelo.pkl"
+        with contextlib.redirect_stdout(io.StringIO()):
+            Modelo.guardar_sustituto(modelo, df, ruta_modelo, SRC_DIR / "dataset_procesado.csv")
+        metadatos = leer_encabezado(Modelo.ruta_sustituto(ruta_modelo))['metadatos']
+        assert metadatos['algoritmo'] == 'DecisionTreeRegressor'
+        assert metadatos['destilado_de'] == hash_arreglos(cargar_artefacto(SRC_DIR / "modelo_predictivo.bin"))
+        assert metadatos['concordancia']['total'] > 0.99
+        # Compacto: bastante más chico que el bosque del que sale
+        assert metadatos['parametros']['max_leaf_nodes'] == Modelo.HOJAS_SUSTITUTO
+        assert Modelo.ruta_sustituto(ruta_modelo).stat().st_size < (SRC_DIR / "modelo_predictivo.bin").stat().st_size / 3
+
+
+def test_realtime_usa_sustituto_segun_umbral():
+    Realtime.calentar()
+    try:
+        resultado = Realtime.configurar_sustituto(0.99)
+        assert resultado['ok']
+        predictor = Realtime.obtener_predictor()
+        assert predictor.sustituto is not None and predictor.fuente_modelo == "sustituto"
+        # Las coordenadas del dataset siguen saliendo del índice
+        assert Realtime.obtener_riesgo_zona(19.5061618036, -99.1047492201) == 39.2
+        latitudes, longitudes = np.array([19.45, 19.55, 19.60]), np.array([-99.2, -99.0, -99.3])
+        scores = predictor.riesgo_zona_lote(latitudes, longitudes)
+        assert scores.tolist() == [predictor.riesgo_zona(a, b) for a, b in zip(latitudes, longitudes)]
+        assert np.array_equal(scores, predictor.sustituto.predecir(np.column_stack([latitudes, longitudes])))
+
+        # Umbral más alto que la concordancia medida: se queda el bosque
+        assert Realtime.configurar_sustituto(1.0)['ok']
+        assert Realtime.obtener_predictor().sustituto is None
+
+        # Un sustituto destilado de otro bosque no se usa, aunque ese bosque
+        # venga del mismo dataset con los mismos hiperparámetros
+        with tempfile.TemporaryDirectory() as directorio:
+            otro = Path(directorio) / "sustituto.bin"
+            shutil.copy(SRC_DIR / "modelo_predictivo_sustituto.bin", otro)
+            bosque = Realtime.obtener_predictor().bosque
+            assert Realtime.cargar_sustituto(otro, bosque, 0.9) is not None
+            valor = np.array(bosque.valor)
+            valor[0] += 0.5
+            refrescado = BosqueCompilado(bosque.caracteristica, bosque.umbral, bosque.izquierdo, bosque.derecho,
+                                         valor, bosque.raices, bosque.profundidad, metadatos=bosque.metadatos)
+            assert Realtime.cargar_sustituto(otro, refrescado, 0.9) is None
+    finally:
+        Realtime.configurar_sustituto(None)
+    assert Realtime.obtener_predictor().sustituto is None
+
+
+if __name__ == "__main__":
+    test_concordancia_clases()
+    test_destilar_y_guardar()
+    test_realtime_usa_sustituto_segun_umbral()
+    print("✅ Modelo sustituto correcto")